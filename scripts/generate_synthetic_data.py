@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""Generate a synthetic dataset, either into the database given by the
+connection string or as Parquet files. For example, to generate a million
+transactions into a duckdb database with a defect in 1% of party types:
+
+    python scripts/generate_synthetic_data.py \\
+        --connection_string=duckdb://synthetic.ddb \\
+        --transactions=1000000 --defect E001=0.01
+"""
+
+from pathlib import Path
+
+from amlaidatatests.cli import build_parser
+from amlaidatatests.connection import connection_factory
+from amlaidatatests.synthetic import (
+    DEFECTS,
+    SyntheticDataset,
+    write_parquet,
+    write_to_connection,
+)
+
+
+def parse_defect(value: str) -> tuple[str, float]:
+    test_id, _, proportion = value.partition("=")
+    return test_id, float(proportion or 0.01)
+
+
+if __name__ == "__main__":
+    parser = build_parser()
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--defect",
+        type=parse_defect,
+        action="append",
+        default=[],
+        help="Inject a defect as TEST_ID=PROPORTION, defaulting to 1%% of "
+        f"rows. One of {', '.join(sorted(DEFECTS))}",
+    )
+    parser.add_argument(
+        "--parquet",
+        type=Path,
+        help="Write Parquet files to this directory instead of the connection",
+    )
+    args = parser.parse_args()
+    dataset = SyntheticDataset(
+        transactions=args.transactions, seed=args.seed, defects=dict(args.defect)
+    )
+    if args.parquet:
+        write_parquet(dataset, args.parquet)
+    else:
+        write_to_connection(dataset, connection_factory())
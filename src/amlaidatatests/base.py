@@ -1,21 +1,24 @@
 import contextlib
-import copy
 import datetime
 import logging
 import warnings
 from abc import ABC
 from functools import partial
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, Hashable, List, Optional
 from urllib.parse import parse_qsl, urlparse
 
 import ibis
 import pytest
-from google.api_core.exceptions import NotFound as GoogleTableNotFound
+import sqlglot as sg
+import sqlglot.expressions as sge
 from ibis import BaseBackend, Expr, IbisError, Table, _
 from ibis import selectors as s
 from ibis.common.exceptions import IbisTypeError
 
+from amlaidatatests.budget import enforce_budget
+from amlaidatatests.cache import RelationCache, TableCache
 from amlaidatatests.config import ConfigSingleton, cfg
+from amlaidatatests.estimate import estimate_queries
 from amlaidatatests.exceptions import (
     AMLAITestSeverity,
     DataTestFailure,
@@ -24,10 +27,28 @@ from amlaidatatests.exceptions import (
     get_test_configuration_file,
     get_test_failure_descriptions,
 )
+from amlaidatatests.instrumentation import (
+    QueryStats,
+    current_stats,
+    instrument,
+    record_queries,
+)
+from amlaidatatests.planner import QueryPlanner
+from amlaidatatests.pool import QueryPool
+from amlaidatatests.result_cache import cache_results
 from amlaidatatests.schema.base import ResolvedTableConfig, TableType
+from amlaidatatests.schema.diff import SchemaDiff, diff_schema
+from amlaidatatests.schema.utils import get_entity_state_windows
+from amlaidatatests.table_stats import TableStats, TableStatsCache
+from amlaidatatests.watermark import WatermarkStore
 
 logger = logging.getLogger(__name__)
 
+APPROXIMATE_COUNT_ERROR = 0.05
+""" Relative error bound of approximate distinct counts. HyperLogLog based
+implementations such as BigQuery's APPROX_COUNT_DISTINCT typically have a
+standard error of 1-2% """
+
 
 def resolve_field(table: Table, column: str) -> tuple[Table, Expr]:
     # Given a path x.y.z, resolve the field object
@@ -52,7 +73,145 @@ def resolve_field_to_level(table: Table, column: str, level: int):
     return resolve_field(table, parent_column)
 
 
+def _is_table_not_found(connection: BaseBackend, e: Exception) -> bool:
+    """Whether an exception raised getting a table is because the table does
+    not exist"""
+    if connection.name == "bigquery":
+        # Only imported on BigQuery, where google-cloud is installed
+        # pylint: disable-next=import-outside-toplevel
+        from google.api_core.exceptions import NotFound
+
+        return isinstance(e, NotFound)
+    if connection.name == "duckdb":
+        return isinstance(e, IbisError)
+    return False
+
+
+def is_unnested(schema: ibis.Schema, column: str) -> bool:
+    """Check if resolving the column requires any arrays to be unnested.
+
+    Unnesting changes the number of rows in the table, so columns which are
+    unnested cannot be aggregated alongside columns which are not.
+
+    Args:
+        schema: The schema containing the column
+        column: A dot delimited path to the column
+
+    Returns:
+        True if any level of the path, including the column itself, is an array
+    """
+    dtype = schema
+    for p in column.split("."):
+        dtype = dtype[p]
+        if dtype.is_array():
+            return True
+    return False
+
+
+def sample_table(connection: BaseBackend, table: Table, fraction: float) -> Table:
+    """Sample approximately fraction of the rows of the table, reading only a
+    sample of its storage blocks where the backend supports it
+
+    Args:
+        connection: The ibis connection the table belongs to
+        table:      The table to sample
+        fraction:   The fraction of rows to sample, between 0 and 1
+
+    Returns:
+        The sampled table
+    """
+    if connection.name == "bigquery":
+        # ibis compiles samples to a random filter on BigQuery, which still
+        # scans the whole table
+        op = table.op()
+        sampled = sg.table(
+            op.name,
+            db=op.namespace.database,
+            catalog=op.namespace.catalog,
+            quoted=True,
+        )
+        sampled.set(
+            "sample",
+            sge.TableSample(
+                method=sge.var("SYSTEM"), percent=sge.convert(fraction * 100)
+            ),
+        )
+        return connection.sql(sg.select("*").from_(sampled).sql(dialect="bigquery"))
+    return table.sample(fraction, method="block")
+
+
+def interval_window() -> Optional[tuple[datetime.datetime, datetime.datetime]]:
+    """The interval tests are restricted to by the interval_start_date and
+    interval_end_date options
+
+    Returns:
+        The start of the first day and the end of the last day of the
+        interval in UTC, with the end exclusive, or None if
+        interval_start_date is not set
+    """
+    config = cfg()
+    if not config.interval_start_date:
+        return None
+    start = datetime.date.fromisoformat(config.interval_start_date)
+    end = datetime.date.fromisoformat(config.interval_end_date)
+    if start > end:
+        raise ValueError(
+            f"interval_start_date {start} is after interval_end_date {end}"
+        )
+    return (
+        datetime.datetime.combine(start, datetime.time(), datetime.timezone.utc),
+        datetime.datetime.combine(
+            end + datetime.timedelta(days=1), datetime.time(), datetime.timezone.utc
+        ),
+    )
+
+
+def window_table(table: Table, table_config: ResolvedTableConfig) -> Table:
+    """Restrict the table to rows in the [interval_window], filtering on the
+    partition column of the table so the backend can skip the partitions or
+    blocks outside of it. Rows where the partition column is null are kept.
+
+    Args:
+        table:        The table to restrict
+        table_config: The config of the table
+
+    Returns:
+        The rows of the table in the interval, or the whole table if no
+        interval is set or the table has no partition column
+    """
+    window = interval_window()
+    column_name = table_config.partition_column
+    if window is None or column_name is None or column_name not in table.columns:
+        return table
+    start, end = window
+    column = table[column_name]
+    return table.filter(((column >= start) & (column < end)) | column.isnull())
+
+
 class AbstractBaseTest(ABC):
+    pooled: bool = True
+    """ Whether the test can be run ahead of time by the [QueryPool]. Tests
+    which do not query the table, or which raise warnings directly rather
+    than through exceptions, should set this to False """
+
+    sample_safe: bool = True
+    """ Whether the test is meaningful on a sample of the table. Tests which
+    are not, for example because they count all rows or compare rows of an
+    entity with each other, are skipped if the sample_fraction option is set """
+
+    row_level: bool = False
+    """ Whether the test checks each row of the table independently of the
+    others. If the incremental_state_path option is set, these tests only
+    validate rows added since the last run """
+
+    @property
+    def window_safe(self) -> bool:
+        """Whether the test is meaningful on the rows of the interval set by
+        the interval_start_date option. Tests which are not, for example
+        because they compare rows of an entity across its history, read the
+        whole table. Defaults to [sample_safe]"""
+        return self.sample_safe
+
     def __init__(
         self,
         table_config: ResolvedTableConfig,
@@ -94,6 +253,56 @@ class AbstractBaseTest(ABC):
 
     def _test(self, *, connection: BaseBackend) -> None: ...
 
+    @property
+    def approximate(self) -> bool:
+        """Whether the test may use approximate aggregates. Tests which error
+        on failure are always exact"""
+        return cfg().approximate and self.severity != AMLAITestSeverity.ERROR
+
+    def _nunique(self, column: Expr, where: Optional[Expr] = None) -> Expr:
+        """Count the distinct values of column, approximately if the test is
+        [approximate]. Approximate counts are accurate to within
+        [APPROXIMATE_COUNT_ERROR]"""
+        if self.approximate:
+            return column.approx_nunique(where=where)
+        return column.nunique(where=where)
+
+    def fusion_key(self, column: Optional[str]) -> Optional[Hashable]:
+        """Override to allow the query for this test to be fused with other
+        tests returning the same key. See [amlaidatatests.planner].
+
+        Args:
+            column: The fully prefixed column the test will run against, if any
+
+        Returns:
+            A hashable key identifying the relation the test aggregates over,
+            or None if the test cannot be fused
+        """
+        return None
+
+    def fusion_relation(self) -> Table:
+        """Override to provide the relation aggregated over by fused tests.
+        Only called on a test which has resolved its table"""
+        raise NotImplementedError
+
+    def fusion_aggregates(self, table: Table, column: Optional[str]) -> dict[str, Expr]:
+        """Override to provide the named scalar aggregates this test requires
+        from the relation returned by [fusion_relation]
+
+        Args:
+            table:  The relation being aggregated over
+            column: The fully prefixed column the test runs against, if any
+
+        Returns:
+            A dictionary of aggregate names and expressions
+        """
+        raise NotImplementedError
+
+    def _fused_results(self, connection: BaseBackend) -> Optional[dict[str, Any]]:
+        """Get the results of [fusion_aggregates] from the fused query this
+        test belongs to. Returns None if the test should run its own query"""
+        return QueryPlanner().fetch(self, connection)
+
     def _raise_warning(self, warning: DataTestWarning):
         # We double log here to try and capture the logs
         # both to pytest and to pytest-html
@@ -104,6 +313,18 @@ class AbstractBaseTest(ABC):
         """Add a user attribute for pytest to use in reporting"""
         request.node.user_properties.append((key, value))
 
+    @contextlib.contextmanager
+    def _record_query_stats(self, request):
+        """Record the queries executed while running the test, adding their
+        statistics as user attributes once the test completes"""
+        stats = QueryStats()
+        try:
+            with record_queries(stats):
+                yield stats
+        finally:
+            for key, value in stats.user_properties().items():
+                self._add_pytest_attribute(request, key, value)
+
     def _run_with_severity(self, f: Callable, **kwargs) -> Any | None:
         """Execute an arbitrary function, catching errors attributed to
         amlaidatatest failures. Failures are then handled according to the
@@ -134,6 +355,8 @@ class AbstractBaseTest(ABC):
             return None
         except DataTestFailure as e:
             e.test_id = self.test_id
+            if e.expr is not None:
+                e.expr = RelationCache().unmaterialize(e.expr)
             if isinstance(e, DataTestWarning):
                 self._raise_warning(e)
                 return None
@@ -176,41 +399,125 @@ class AbstractTableTest(AbstractBaseTest):
         severity: AMLAITestSeverity = AMLAITestSeverity.ERROR,
         test_id: Optional[str] = None,
     ) -> None:
-        table_config = copy.deepcopy(table_config)
-        # We don't want to get resolved table at test definition time, only at test time
+        # Table configs are immutable, so are shared between tests rather
+        # than copied. We don't want to get resolved table at test definition
+        # time, only at test time
         self.resolved_table: Optional[Table] = None
+        self.pooled_stats: Optional[QueryStats] = None
+        """ Statistics of the queries run by the [QueryPool] for this test """
         super().__init__(table_config=table_config, severity=severity, test_id=test_id)
 
+    @staticmethod
+    def lookup_table(
+        connection: BaseBackend, table_config: ResolvedTableConfig
+    ) -> Table:
+        """Get the table from the connection, without any of the filters
+        applied by [get_table]. Tables are looked up once per session, see
+        [TableCache]
+
+        Args:
+            connection:   The ibis connection the table belongs to
+            table_config: The config of the table
+
+        Returns:
+            The table
+        """
+        # Work around duckdb's inability to handle fully
+        # qualified table names
+        if connection.dialect == "duckdb":
+            return TableCache().get(
+                connection,
+                name=table_config.table.get_name().split(".")[-1],
+                database=cfg().database,
+            )
+        return TableCache().get(connection, name=table_config.table.get_name())
+
+    def get_schema_diff(self, connection: BaseBackend) -> SchemaDiff:
+        """Compare the schema of the table in the backend with the expected
+        schema. Each table is compared once, see [diff_schema]"""
+        actual = self.lookup_table(connection, self.table_config).schema()
+        return diff_schema(self.table_config.schema, actual)
+
     def get_table(
         self,
         connection: BaseBackend,
         table_config: ResolvedTableConfig,
         request: Optional[pytest.FixtureRequest] = None,
     ):
+        sample_fraction = cfg().sample_fraction
+        if sample_fraction and not self.sample_safe:
+            raise SkipTest("Skipping test: not meaningful on a sample of the table")
         try:
-            # Work around duckdb's inability to handle fully
-            # qualified table names
-            if connection.dialect == "duckdb":
-                return connection.table(
-                    name=table_config.table.get_name().split(".")[-1],
-                    database=cfg().database,
-                )
-            return connection.table(table_config.table.get_name())
+            table = self.lookup_table(connection, table_config)
         # Ibis has no consistent API around missing tables:
         # https://github.com/ibis-project/ibis/issues/9468
         # We have to workaround this whilst ensuring we don't
         # catch any errors we don't want to catch. This is
         # easier with some backends than others
-        except GoogleTableNotFound as e:
-            if connection.name != "bigquery":
-                raise e
-        except IbisError as e:
-            if connection.name != "duckdb":
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            if not _is_table_not_found(connection, e):
                 raise e
+        else:
+            if sample_fraction:
+                table = sample_table(connection, table, sample_fraction)
+            if self.window_safe:
+                table = window_table(table, table_config)
+            if self.row_level:
+                table = WatermarkStore().delta(connection, table, table_config)
+            return table
         if request:
             self._add_pytest_attribute(request, "table_missing", True)
         self._skip_test_if_optional_table(table_config=table_config)
 
+    def fusion_relation(self) -> Table:
+        return self.table
+
+    def _run_pooled(self, *, connection: BaseBackend) -> None:
+        """Resolve the table and run the test. Called from a worker thread
+        of the [QueryPool] ahead of the test being called by pytest"""
+        self.pooled_stats = QueryStats()
+        with record_queries(self.pooled_stats):
+            self.table = self.get_table(
+                connection=connection, table_config=self.table_config
+            )
+            return self._test(connection=connection)
+
+    def _run_test(self, *, connection: BaseBackend) -> None:
+        """Run the test, or collect its outcome if it has been run by the
+        [QueryPool]. Any exception raised by the test is raised again here so
+        it is handled by [_run_with_severity] as usual"""
+        pool = QueryPool()
+        if pool.enabled():
+            pool.start(connection)
+            if (future := pool.take(self)) is not None:
+                try:
+                    return future.result()
+                finally:
+                    # Queries were recorded by the worker thread
+                    stats = current_stats()
+                    if stats is not None and self.pooled_stats is not None:
+                        stats.merge(self.pooled_stats)
+        return self._test(connection=connection)
+
+    def _count_offending_rows(self, connection: BaseBackend, expr: Table) -> int:
+        """Count the rows of expr, where any row is a test failure.
+
+        If the probe_existence option is set, first checks if any row exists
+        with a query the backend can stop executing at the first row. The
+        exact count is only computed if a row is found.
+        """
+        if cfg().probe_existence and connection.execute(expr.limit(1).count()) == 0:
+            return 0
+        return connection.execute(expr.count())
+
+    def _table_stats(self, connection: BaseBackend) -> Optional[TableStats]:
+        """Get the base statistics of the table, shared between tests. See
+        [amlaidatatests.table_stats]. Returns None if the test should run its
+        own query"""
+        if not TableStatsCache.enabled():
+            return None
+        return TableStatsCache().get(connection, self.table, self.table_config)
+
     def _skip_test_if_optional_table(self, table_config: ResolvedTableConfig):
         if table_config.optional:  # is optional
             raise SkipTest(
@@ -235,31 +542,80 @@ class AbstractTableTest(AbstractBaseTest):
             TableType.OPEN_ENDED_ENTITY,
         ):
             raise ValueError(f"{table_config.table_type} is not a valid table type")
-        table = table.filter(
-            ibis.or_(
-                ~_["is_entity_deleted"],
-                _["is_entity_deleted"].isnull(),
+
+        def _latest_rows() -> Table:
+            filtered = table.filter(
+                ibis.or_(
+                    ~_["is_entity_deleted"],
+                    _["is_entity_deleted"].isnull(),
+                )
             )
+            return filtered.select(
+                s.all(),
+                row_num=ibis.row_number().over(
+                    group_by=table_config.entity_keys,
+                    order_by=ibis.desc("validity_start_time"),
+                ),
+            ).filter(_.row_num == 0)
+
+        # The window sort is expensive, so the relation is shared between all
+        # tests on the table and materialized if configured
+        key = ("latest_rows", table.op(), table_config.entity_keys)
+        return RelationCache().get(key, _latest_rows)
+
+    def get_entity_state_windows(
+        self,
+        table: Table,
+        table_config: ResolvedTableConfig,
+        key: Optional[List[str]] = None,
+    ) -> Table:
+        """Get the periods each entity in the table was valid between. See
+        [get_entity_state_windows] for details.
+
+        The windows are shared between all tests using the same table and
+        keys, and materialized if configured"""
+        cache_key = (
+            "entity_state_windows",
+            table.op(),
+            table_config.table_type,
+            table_config.entity_keys,
+            tuple(key) if key else (),
         )
-        return table.select(
-            s.all(),
-            row_num=ibis.row_number().over(
-                group_by=table_config.entity_keys,
-                order_by=ibis.desc("validity_start_time"),
+        return RelationCache().get(
+            cache_key,
+            lambda: get_entity_state_windows(
+                table_config=table_config, key=key, table=table
             ),
-        ).filter(_.row_num == 0)
+        )
+
+    @contextlib.contextmanager
+    def _hold_watermark_on_failure(self):
+        """Hold back the watermark of the table if a row level test fails, so
+        the rows it validated are validated again by the next incremental
+        run, and record that the test has run. Warnings and skips do not hold
+        back the watermark"""
+        try:
+            yield
+        except Exception:
+            if self.row_level:
+                WatermarkStore().hold(self.table_config)
+            raise
+        finally:
+            if self.row_level:
+                WatermarkStore().complete(self.table_config)
 
     def __call__(self, connection: BaseBackend, request):
         self.process_test_request(request)
         # Check if table exists
         self._pre_test_hooks(connection)
-        self.table = self._run_with_severity(
-            connection=connection,
-            f=self.get_table,
-            table_config=self.table_config,
-            request=request,
-        )
-        self._run_with_severity(connection=connection, f=self._test)
+        with self._record_query_stats(request), self._hold_watermark_on_failure():
+            self.table = self._run_with_severity(
+                connection=connection,
+                f=self.get_table,
+                table_config=self.table_config,
+                request=request,
+            )
+            self._run_with_severity(connection=connection, f=self._run_test)
 
     def _pre_test_hooks(self, connection: BaseBackend):
         """Using the global configuration, modifies the
@@ -269,6 +625,15 @@ class AbstractTableTest(AbstractBaseTest):
             connection: The ibis connection object
         """
         _cfg = ConfigSingleton.get()
+        # Record query statistics. This happens once per connection, and
+        # before sql logging so the time to compile the sql is not included
+        instrument(connection)
+        # Cached results are returned before the budget is checked and the
+        # query is executed, so they are free and not counted as queries
+        enforce_budget(connection)
+        cache_results(connection)
+        # Estimating queries replaces executing them entirely
+        estimate_queries(connection)
         # Configure dry run
         execute = connection.execute
         if _cfg.dry_run:
@@ -348,7 +713,7 @@ def use_column_prefix(cls: "AbstractColumnTest", prefix: str):
     """Context manager for managing the column prefix. If a test fails without
     cleaning up the value of cls.column, it still gets reverted due to the
     finally statement"""
-    revert = copy.deepcopy(cls.column)
+    revert = cls.column
     try:
         if prefix:
             cls.column = f"{prefix}.{cls.column}"
@@ -456,30 +821,62 @@ class AbstractColumnTest(AbstractTableTest):
         """
         # It's fine for the top level column to be missing if it's
         # an optional field. If it is, we can skip the whole test
-        self.table = self._run_with_severity(
-            connection=connection,
-            f=self.get_table,
-            table_config=self.table_config,
-            request=request,
-        )
-        self.process_test_request(request)
-        with use_column_prefix(self, prefix):
-            self._pre_test_hooks(connection)
-            self._run_with_severity(f=self._check_column_exists)
-            self._run_with_severity(connection=connection, f=self._test)
+        with self._record_query_stats(request), self._hold_watermark_on_failure():
+            self.table = self._run_with_severity(
+                connection=connection,
+                f=self.get_table,
+                table_config=self.table_config,
+                request=request,
+            )
+            self.process_test_request(request)
+            with use_column_prefix(self, prefix):
+                self._pre_test_hooks(connection)
+                self._run_with_severity(f=self._check_column_exists)
+                self._run_with_severity(connection=connection, f=self._run_test)
+
+    def column_fusion_key(
+        self, column: Optional[str], relation: Hashable = "table"
+    ) -> Optional[Hashable]:
+        """Fusion key for column tests which aggregate over the column without
+        changing the number of rows in the relation
 
-    def filter_null_parent_fields(self):
-        """Get
+        Args:
+            column:   The fully prefixed column the test will run against
+            relation: Identifies the relation being aggregated over. Defaults
+                      to "table", the unmodified table.
+
+        Returns:
+            The fusion key, or None if the column cannot be fused
+        """
+        if not isinstance(column, str):
+            return None
+        try:
+            if is_unnested(self.table_config.schema, column):
+                return None
+        except KeyError:
+            return None
+        return (self.table_config.resolved_name, relation)
+
+    def filter_null_parent_fields(
+        self, table: Optional[Table] = None, column: Optional[str] = None
+    ):
+        """Get predicates excluding rows where the parent of the column is null
+
+        Args:
+            table:  The table containing the column. Defaults to self.table
+            column: The column being tested. Defaults to self.column
 
         Returns:
-            _description_
+            A list of predicates
         """
+        table = self.table if table is None else table
+        column = self.column if column is None else column
         # If subfields exist (struct or array), we need to compare the nullness
         # of the parent as well - it doesn't make any sense to check the parent
         # if the child is also null
         predicates = []
-        if self.column.count(".") >= 1:
-            _, parent_field = resolve_field_to_level(self.table, self.column, -1)
+        if column.count(".") >= 1:
+            _, parent_field = resolve_field_to_level(table, column, -1)
             # We want to check for cases only where field is null but its parent
             # isn't
             predicates += [parent_field.notnull()]
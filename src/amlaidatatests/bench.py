@@ -0,0 +1,328 @@
+"""Benchmark of the test suite at several data sizes.
+
+Run with ``amlaidatatests bench``. For each scale, a synthetic dataset with
+that number of transactions is generated into a DuckDB database (or reused
+from a previous run in the same working directory) and the full suite is run
+against it in a separate process. The runtime, query count and query time of
+each test id, and the runtime and peak memory of each run, are written to a
+JSON results file. If a baseline results file is given, the results are
+compared against it and the command fails on any regression.
+
+This module is also the pytest plugin which records the results of each test
+in the process running the suite.
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+RESULTS_ENVIRONMENT_VARIABLE = "AMLAIDATATESTS_BENCH_RESULTS"
+""" The file the plugin writes the results of each test to """
+
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+
+_results: dict[str, dict[str, Any]] = {}
+
+
+def pytest_runtest_logreport(report) -> None:
+    """Pytest hook. Accumulates the duration of each phase of a test and the
+    query statistics recorded against it"""
+    result = _results.setdefault(report.nodeid, {"seconds": 0.0, "outcome": "passed"})
+    result["seconds"] += report.duration
+    if report.outcome != "passed":
+        result["outcome"] = report.outcome
+    result.update(dict(report.user_properties))
+
+
+def pytest_sessionfinish(session, exitstatus) -> None:
+    # pylint: disable=unused-argument
+    if path := os.environ.get(RESULTS_ENVIRONMENT_VARIABLE):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(_results, f)
+
+
+def summarize_tests(results: dict[str, dict[str, Any]]) -> dict[str, dict]:
+    """Aggregate the results of each pytest item by test id. Items without a
+    test id are kept under their node id.
+
+    Args:
+        results: The results recorded by the plugin, keyed by node id
+
+    Returns:
+        The number of items, total runtime, total queries and query time and
+        number of failures of each test id
+    """
+    summary: dict[str, dict] = {}
+    for nodeid, result in results.items():
+        test_id = result.get("test_id") or nodeid
+        entry = summary.setdefault(
+            test_id,
+            {
+                "items": 0,
+                "seconds": 0.0,
+                "query_count": 0,
+                "query_seconds": 0.0,
+                "failed": 0,
+            },
+        )
+        entry["items"] += 1
+        entry["seconds"] += result["seconds"]
+        entry["query_count"] += result.get("query_count", 0)
+        entry["query_seconds"] += result.get("query_seconds", 0.0)
+        entry["failed"] += result["outcome"] == "failed"
+    return dict(sorted(summary.items()))
+
+
+def dataset_path(workdir: Path, transactions: int, seed: int) -> Path:
+    """Generate the dataset for a scale, unless it already exists
+
+    Args:
+        workdir:      The directory datasets are kept in
+        transactions: The number of transactions in the dataset
+        seed:         The seed the dataset is generated with
+
+    Returns:
+        The path of the DuckDB database containing the dataset
+    """
+    # Imported here so the benchmark plugin is cheap to load in the suite
+    import ibis
+
+    from amlaidatatests.synthetic import SyntheticDataset, write_to_connection
+
+    path = workdir / f"synthetic_{transactions}_{seed}.ddb"
+    if path.exists():
+        return path
+    logger.info("Generating %s transactions into %s", transactions, path)
+    partial = path.with_suffix(".partial")
+    partial.unlink(missing_ok=True)
+    connection = ibis.duckdb.connect(partial)
+    write_to_connection(
+        SyntheticDataset(transactions=transactions, seed=seed), connection
+    )
+    connection.disconnect()
+    partial.rename(path)
+    return path
+
+
+def run_suite(database: Path, args: list[str]) -> dict[str, Any]:
+    """Run the suite against a DuckDB database in a separate process
+
+    Args:
+        database: The path of the database
+        args:     Additional arguments for the suite
+
+    Returns:
+        The runtime, peak memory, exit code and test results of the run. The
+        peak memory is None on platforms which cannot measure it.
+    """
+    results_path = database.with_suffix(".results.json")
+    results_path.unlink(missing_ok=True)
+    command = [
+        sys.executable,
+        "-m",
+        "amlaidatatests.cli",
+        f"--connection_string=duckdb://{database}",
+        "-p",
+        "amlaidatatests.bench",
+        "-q",
+        *args,
+    ]
+    env = {**os.environ, RESULTS_ENVIRONMENT_VARIABLE: str(results_path)}
+    start = time.perf_counter()
+    # pylint: disable-next=consider-using-with
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+    peak_rss = None
+    if hasattr(os, "wait4"):
+        # Wait on the specific process to get the resource usage of that run
+        # only
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        peak_rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    else:
+        # The resource usage of a process is not available on Windows, so
+        # only the runtime is measured
+        process.wait()
+    seconds = time.perf_counter() - start
+    tests = {}
+    if results_path.exists():
+        with open(results_path, encoding="utf-8") as f:
+            tests = summarize_tests(json.load(f))
+    return {
+        "seconds": seconds,
+        "peak_rss_bytes": peak_rss,
+        "exit_code": process.returncode,
+        "tests": tests,
+    }
+
+
+def compare(
+    baseline: dict,
+    results: dict,
+    tolerance: float = 0.25,
+    min_seconds: float = 0.5,
+) -> list[str]:
+    """Compare benchmark results against a baseline
+
+    A regression is a run or test id which is slower or uses more memory than
+    the baseline by more than the tolerance, or which executes more queries.
+    Differences in runtime smaller than min_seconds are ignored as noise.
+    Scales and test ids missing from either results are not compared, nor is
+    peak memory which either results could not measure.
+
+    Args:
+        baseline:    The baseline results
+        results:     The results to compare
+        tolerance:   The proportion a measurement may increase by
+        min_seconds: The smallest increase in runtime which is a regression
+
+    Returns:
+        A description of each regression
+    """
+
+    def slower(before: float, after: float) -> bool:
+        return after - before > max(before * tolerance, min_seconds)
+
+    regressions = []
+    for scale, run in results["scales"].items():
+        base = baseline.get("scales", {}).get(scale)
+        if base is None:
+            continue
+        if slower(base["seconds"], run["seconds"]):
+            regressions.append(
+                f"{scale}: run took {run['seconds']:.2f}s, "
+                f"baseline {base['seconds']:.2f}s"
+            )
+        if (
+            run["peak_rss_bytes"] is not None
+            and base["peak_rss_bytes"] is not None
+            and run["peak_rss_bytes"] > base["peak_rss_bytes"] * (1 + tolerance)
+        ):
+            regressions.append(
+                f"{scale}: peak memory {run['peak_rss_bytes']:,} bytes, "
+                f"baseline {base['peak_rss_bytes']:,} bytes"
+            )
+        for test_id, test in run["tests"].items():
+            base_test = base["tests"].get(test_id)
+            if base_test is None:
+                continue
+            if slower(base_test["seconds"], test["seconds"]):
+                regressions.append(
+                    f"{scale} {test_id}: took {test['seconds']:.2f}s, "
+                    f"baseline {base_test['seconds']:.2f}s"
+                )
+            if test["query_count"] > base_test["query_count"]:
+                regressions.append(
+                    f"{scale} {test_id}: executed {test['query_count']} queries, "
+                    f"baseline {base_test['query_count']}"
+                )
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="amlaidatatests bench",
+        description="Benchmark the test suite against synthetic datasets. "
+        "Unrecognized arguments are passed to the suite.",
+    )
+    parser.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SCALES,
+        help="The number of transactions in each dataset",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path("bench"),
+        help="Directory to keep generated datasets in. Datasets are reused "
+        "by later runs",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("bench_results.json"),
+        help="File to write the results to",
+    )
+    parser.add_argument(
+        "--baseline", type=Path, help="Results file to compare the results to"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Proportion by which runtime or memory may increase before it is "
+        "reported as a regression",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.5,
+        help="Increases in runtime smaller than this are ignored as noise",
+    )
+    return parser
+
+
+def entry_point(sysargs: Optional[list[str]] = None) -> int:
+    """Run the benchmark
+
+    Args:
+        sysargs: The command line arguments, excluding "bench"
+
+    Returns:
+        The exit code: 1 if there are regressions against the baseline,
+        otherwise 0
+    """
+    # pylint: disable=import-outside-toplevel
+    from amlaidatatests import __version__
+    from amlaidatatests.config import DATATEST_STRUCTURED_CONFIG, ConfigSingleton
+
+    args, suite_args = build_parser().parse_known_args(sysargs)
+    # Datasets are generated with the default table names
+    ConfigSingleton().set_config(DATATEST_STRUCTURED_CONFIG)
+    args.workdir.mkdir(parents=True, exist_ok=True)
+
+    results = {
+        "version": __version__,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "scales": {},
+    }
+    for transactions in args.scales:
+        database = dataset_path(args.workdir, transactions, args.seed)
+        run = run_suite(database, suite_args)
+        peak_memory = "unknown"
+        if run["peak_rss_bytes"] is not None:
+            peak_memory = f"{run['peak_rss_bytes'] / 2**20:.0f} MiB"
+        print(
+            f"{transactions:>12,} transactions: {run['seconds']:.2f}s, "
+            f"peak memory {peak_memory}, {len(run['tests'])} test ids"
+        )
+        results["scales"][str(transactions)] = run
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(
+        baseline, results, tolerance=args.tolerance, min_seconds=args.min_seconds
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions against {args.baseline}")
+    return 1 if regressions else 0
@@ -0,0 +1,120 @@
+"""Bytes budgets for BigQuery.
+
+On BigQuery, queries are billed by the bytes they process, so an accidental
+run over the full history of a large dataset can be expensive. When the
+maximum_bytes_billed or max_bytes_per_run options are set, the bytes each
+query would process are estimated with a dry run before it is executed.
+Tests whose queries would exceed the limit for a single query, or take the
+run over its total budget, are skipped. maximum_bytes_billed is also set on
+every BigQuery job, so BigQuery itself rejects any query whose estimate was
+too low.
+"""
+
+import threading
+from typing import Any
+
+from ibis import BaseBackend
+
+from amlaidatatests.config import cfg
+from amlaidatatests.exceptions import BudgetExceeded
+from amlaidatatests.instrumentation import current_stats
+from amlaidatatests.singleton import Singleton
+
+USD_PER_TIB = 6.25
+""" The on-demand price of BigQuery analysis in the US multi-region """
+
+
+def format_bytes(n: float) -> str:
+    """Format a number of bytes with a binary unit, e.g. 1.5 GiB"""
+    for unit in ["bytes", "KiB", "MiB", "GiB", "TiB"]:
+        if abs(n) < 1024 or unit == "TiB":
+            break
+        n /= 1024
+    return f"{n:,.0f} {unit}" if unit == "bytes" else f"{n:,.1f} {unit}"
+
+
+class BytesBudget(metaclass=Singleton):
+    """Session-wide total of the bytes estimated for executed queries"""
+
+    def __init__(self) -> None:
+        self.spent = 0
+        """ The estimated bytes of the queries executed this session """
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def enabled(connection: BaseBackend) -> bool:
+        config = cfg()
+        return (
+            connection.name == "bigquery"
+            and not config.dry_run
+            and bool(config.maximum_bytes_billed or config.max_bytes_per_run)
+        )
+
+    @staticmethod
+    def estimate(connection: BaseBackend, sql: str) -> int:
+        """Estimate the bytes a query would process with a BigQuery dry run,
+        which is not billed"""
+        # pylint: disable-next=import-outside-toplevel
+        from google.cloud import bigquery
+
+        job = connection.client.query(
+            sql, job_config=bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+        )
+        return job.total_bytes_processed or 0
+
+    def reserve(self, estimate: int) -> None:
+        """Add the estimate of a query to the bytes spent, if it is within the
+        budget
+
+        Args:
+            estimate: The estimated bytes the query will process
+
+        Raises:
+            BudgetExceeded: If the query is over either budget
+        """
+        config = cfg()
+        if config.maximum_bytes_billed and estimate > config.maximum_bytes_billed:
+            raise BudgetExceeded(
+                f"query would process {format_bytes(estimate)}, more than "
+                f"maximum_bytes_billed of {format_bytes(config.maximum_bytes_billed)}"
+            )
+        with self._lock:
+            if config.max_bytes_per_run and (
+                self.spent + estimate > config.max_bytes_per_run
+            ):
+                raise BudgetExceeded(
+                    f"query would process {format_bytes(estimate)}, taking the "
+                    f"run over max_bytes_per_run of "
+                    f"{format_bytes(config.max_bytes_per_run)} "
+                    f"({format_bytes(self.spent)} already used)"
+                )
+            self.spent += estimate
+
+    def clear(self) -> None:
+        self.spent = 0
+
+
+def enforce_budget(connection: BaseBackend) -> None:
+    """Wrap the connection so queries are checked against the bytes budgets
+    before they are executed. Does nothing if the connection has already been
+    wrapped.
+
+    Args:
+        connection: The ibis connection to wrap
+    """
+    if getattr(connection, "_amlaidatatests_budgeted", False):
+        return
+    execute = connection.execute
+
+    def _execute(expr, *args, **kwargs) -> Any:
+        budget = BytesBudget()
+        if budget.enabled(connection):
+            sql = str(connection.compile(expr, params=kwargs.get("params")))
+            estimate = budget.estimate(connection, sql)
+            budget.reserve(estimate)
+            if (stats := current_stats()) is not None:
+                stats.bytes_estimated += estimate
+        return execute(expr, *args, **kwargs)
+
+    connection.execute = _execute
+    connection._amlaidatatests_budgeted = True
@@ -0,0 +1,221 @@
+"""Session caches for relations which are shared between tests"""
+
+import hashlib
+import logging
+import threading
+from typing import Callable, Hashable, Optional
+
+import pyarrow as pa
+from ibis import BaseBackend, Expr, IbisError, Table
+
+from amlaidatatests.config import cfg
+from amlaidatatests.singleton import Singleton
+
+logger = logging.getLogger(__name__)
+
+
+class RelationCache(metaclass=Singleton):
+    """Session-wide cache of relations which many tests derive from the same
+    table, for example the latest rows of an entity table.
+
+    Relations are built once per session. If the materialize_relations option
+    is set, they are also materialized in the backend as temporary tables so
+    the underlying query is only computed once. Materialized tables are
+    released at the end of the session.
+    """
+
+    def __init__(self) -> None:
+        self.relations: dict[Hashable, Table] = {}
+        self.materialized: list[tuple[Table, Table]] = []
+        """ Materialized relations and the relations they were built from """
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable, factory: Callable[[], Table]) -> Table:
+        """Get the relation identified by key, building it with factory if
+        it has not yet been built this session
+
+        Args:
+            key:     A hashable identifier for the relation
+            factory: A function returning the relation
+
+        Returns:
+            The relation, which is materialized if configured
+        """
+        # Tests may be run concurrently, so only one builds the relation
+        with self._lock:
+            if key not in self.relations:
+                relation = factory()
+                config = cfg()
+                if (
+                    config.materialize_relations
+                    and not config.dry_run
+                    and not config.estimate
+                ):
+                    try:
+                        materialized = relation.cache()
+                    except IbisError as e:
+                        # Relations built on unbound tables can only be executed
+                        # against an explicit connection, so leave them as they are
+                        logger.debug("Unable to materialize relation %s: %s", key, e)
+                    else:
+                        self.materialized.append((materialized, relation))
+                        relation = materialized
+                self.relations[key] = relation
+            return self.relations[key]
+
+    def unmaterialize(self, expr: Expr) -> Expr:
+        """Replace any materialized relations in expr with the expressions
+        they were built from. Materialized tables only exist for the duration
+        of the session, so this is used to produce sql which the user can run.
+
+        Args:
+            expr: The expression to replace materialized relations in
+
+        Returns:
+            An equivalent expression without materialized relations
+        """
+        if not self.materialized:
+            return expr
+        replacements = {m.op(): r.op() for m, r in self.materialized}
+        return expr.op().replace(replacements).to_expr()
+
+    def clear(self) -> None:
+        """Release any materialized relations and empty the cache"""
+        for materialized, _ in self.materialized:
+            try:
+                materialized.release()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.warning("Unable to release materialized relation: %s", e)
+        self.relations = {}
+        self.materialized = []
+
+
+class TableCache(metaclass=Singleton):
+    """Session-wide cache of the tables looked up from each connection.
+
+    Looking up a table reads its metadata from the backend, which on BigQuery
+    is an API request. Each table is looked up once per session and its handle
+    and schema are shared by every test. Tables which are not found are not
+    cached. If a table is changed during a session, call [invalidate] so it is
+    looked up again.
+    """
+
+    def __init__(self) -> None:
+        self.tables: dict[Hashable, Table] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, connection: BaseBackend, name: str, database: Optional[str] = None
+    ) -> Table:
+        """Get a table from the connection, looking it up if it has not been
+        looked up this session
+
+        Args:
+            connection: The ibis connection the table belongs to
+            name:       The name of the table
+            database:   The database of the table, if not part of the name
+
+        Returns:
+            The table
+        """
+        key = (id(connection), name, database)
+        # Tests may be run concurrently, so only one looks up the table
+        with self._lock:
+            if key not in self.tables:
+                self.tables[key] = connection.table(name=name, database=database)
+            return self.tables[key]
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Look up a table again the next time it is requested
+
+        Args:
+            name: The name of the table, as passed to [get]. If None, every
+                  table is invalidated
+        """
+        with self._lock:
+            if name is None:
+                self.tables = {}
+            else:
+                self.tables = {k: v for k, v in self.tables.items() if k[1] != name}
+
+    def clear(self) -> None:
+        self.invalidate()
+
+
+LOOKUP_TABLE_MIN_VALUES = 64
+""" The smallest list of values tested against a lookup table rather than
+literals """
+
+LOOKUP_TABLE_PREFIX = "amlaidatatests_lookup_"
+""" The prefix of the names of lookup tables """
+
+
+class LookupTableCache(metaclass=Singleton):
+    """Session-wide cache of lookup tables of reference values.
+
+    Tests of a column against a long list of values, such as the valid region
+    or currency codes, would compile every value into an IN list in each
+    query. Instead the values are registered once per session as a temporary
+    table, which the tests semi-join against. Temporary tables are dropped at
+    the end of the session.
+    """
+
+    def __init__(self) -> None:
+        self.tables: dict[Hashable, Optional[Table]] = {}
+        self.created: list[tuple[BaseBackend, str]] = []
+        """ The connection and name of each table created this session """
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def table_name(values: tuple) -> str:
+        """The name of the lookup table of values. Names are derived from the
+        values, so compiled queries are the same in every session and the
+        name identifies the content of the table"""
+        digest = hashlib.sha256(repr(values).encode("utf-8")).hexdigest()
+        return f"{LOOKUP_TABLE_PREFIX}{digest[:16]}"
+
+    def get(self, connection: BaseBackend, values: tuple) -> Optional[Table]:
+        """Get the lookup table of values, registering it with the backend if
+        it has not been registered this session
+
+        Args:
+            connection: The ibis connection to register the table with
+            values:     The values of the table, in its value column
+
+        Returns:
+            The lookup table, or None if there are too few values to need a
+            table or it could not be created
+        """
+        if len(values) < LOOKUP_TABLE_MIN_VALUES:
+            return None
+        key = (id(connection), values)
+        # Tests may be run concurrently, so only one registers the table
+        with self._lock:
+            if key not in self.tables:
+                name = self.table_name(values)
+                try:
+                    table = connection.create_table(
+                        name,
+                        pa.table({"value": list(values)}),
+                        temp=True,
+                        overwrite=True,
+                    )
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    # The backend may not allow temporary tables, in which case
+                    # the values are compiled into each query as before
+                    logger.debug("Unable to create lookup table: %s", e)
+                    table = None
+                else:
+                    self.created.append((connection, name))
+                self.tables[key] = table
+            return self.tables[key]
+
+    def clear(self) -> None:
+        """Drop the lookup tables and empty the cache"""
+        for connection, name in self.created:
+            try:
+                connection.drop_table(name, force=True)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.warning("Unable to drop lookup table %s: %s", name, e)
+        self.tables = {}
+        self.created = []
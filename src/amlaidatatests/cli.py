@@ -1,4 +1,8 @@
-"""Utility CLI for amlaidatatests"""
+"""Utility CLI for amlaidatatests
+
+Only the configuration is imported at module level, so showing the version or
+help is fast. ibis, pytest and the tests themselves are imported when needed.
+"""
 
 import argparse
 import sys
@@ -7,12 +11,20 @@ from typing import List
 
 from amlaidatatests import __version__
 from amlaidatatests.config import ConfigSingleton, init_parser_options_from_config
-from amlaidatatests.connection import connection_factory
-from amlaidatatests.schema.utils import get_amlai_schema, get_table_name
-from amlaidatatests.tests import run_tests
+
+
+def run_tests(args: List[str]) -> None:
+    # pylint: disable-next=import-outside-toplevel
+    from amlaidatatests.tests import run_tests as _run_tests
+
+    _run_tests(args)
 
 
 def create_skeleton(args):
+    # pylint: disable=import-outside-toplevel
+    from amlaidatatests.connection import connection_factory
+    from amlaidatatests.schema.utils import get_amlai_schema, get_table_name
+
     cfg = ConfigSingleton.get()
     version = cfg.schema_version
     schema = get_amlai_schema(version)
@@ -46,6 +58,12 @@ def build_parser():
         dest="showsql",
         action="store_true",
     )
+    parser.add_argument(
+        "--native",
+        help="Run the tests with the native runner rather than pytest. Faster "
+        "to start, but only supports selecting tests with -k",
+        action="store_true",
+    )
     return parser
 
 
@@ -54,11 +72,23 @@ def entry_point(sysargs: List[str] | None = None) -> None:
 
     This is configured somewhat differently from the pytest dataset, which is
     somewhat clunky to configure"""
-    parser = build_parser()
-
     if sysargs is None:
         sysargs = sys.argv[1:]
 
+    if sysargs[:1] == ["bench"]:
+        # pylint: disable-next=import-outside-toplevel
+        from amlaidatatests.bench import entry_point as bench_entry_point
+
+        sys.exit(bench_entry_point(sysargs[1:]))
+
+    if sysargs[:1] == ["replicate"]:
+        # pylint: disable-next=import-outside-toplevel
+        from amlaidatatests.replicate import entry_point as replicate_entry_point
+
+        sys.exit(replicate_entry_point(sysargs[1:]))
+
+    parser = build_parser()
+
     if "--pytest-help" in sysargs:
         run_tests(["-h"])
         # will exit
@@ -68,6 +98,12 @@ def entry_point(sysargs: List[str] | None = None) -> None:
     if args.pytesthelp:
         sysargs.remove("--pytest-help")
 
+    if args.native:
+        # pylint: disable-next=import-outside-toplevel
+        from amlaidatatests.runner import run
+
+        sys.exit(run(extra, show_sql=args.showsql))
+
     # show sql really just shows the full tracebacks which
     # prints the full sql
     show_sql = ["--tb=no", "--disable-warnings"]
@@ -6,15 +6,17 @@ import importlib
 import typing
 from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Any, Generic, Optional, Type, TypeVar, Union
+from typing import TYPE_CHECKING, Any, Generic, Optional, Type, TypeVar, Union
 from urllib.parse import urlparse
 
-import pytest
 from omegaconf import OmegaConf
 from simple_parsing.docstring import get_attribute_docstring
 
 from .singleton import Singleton
 
+if TYPE_CHECKING:
+    import pytest
+
 T = TypeVar("T")
 
 
@@ -107,11 +109,83 @@ class DatatestConfig(AMLAIInstanceConfig):
     scale: float = 1.0
     """ Scale changes to modify profiling tests based on absolute values """
 
+    interval_start_date: Optional[str] = None
+    """ If set, tests only read rows of each table whose partition column is
+    between this date and interval_end_date, inclusive, so partitions outside
+    the interval are not scanned. Tests which compare rows of an entity
+    across its history still read the whole table """
+
     interval_end_date: str = field(default_factory=today_isoformat)
     """ The last date of the interval. Defaults to today. """
 
     testing_mode: bool = False
 
+    fuse_queries: bool = False
+    """ If set, combine compatible tests on the same table into a single query """
+
+    materialize_relations: bool = False
+    """ If set, relations shared between tests, such as the latest rows of
+    each entity table, are materialized once per session as temporary tables """
+
+    share_table_stats: bool = False
+    """ If set, the row count (T001), distinct primary keys (PK) and required
+    column null counts (C001) of each table are computed in a single query
+    shared by those tests. The first of them to run pays for the whole query,
+    so this only helps when most of them are selected """
+
+    probe_existence: bool = False
+    """ If set, tests which fail on any offending row first check if such a row
+    exists, and only count the offending rows if one does """
+
+    sample_fraction: Optional[float] = None
+    """ If set, run tests against a sample of approximately this fraction of
+    the rows of each table. Useful for quick smoke runs. Tests which are not
+    meaningful on a sample are skipped """
+
+    incremental_state_path: Optional[Path] = None
+    """ If set, tests which check each row independently only validate rows
+    newer than the watermark of each table stored in this file. The watermarks
+    are updated when a run finishes without failures """
+
+    approximate: bool = False
+    """ If set, tests which do not error on failure count distinct values
+    approximately, for example with HyperLogLog. Results within the error
+    margin of a test threshold are reported as inconclusive """
+
+    max_concurrent_queries: int = 1
+    """ The maximum number of tests to run concurrently. Values above 1 run
+    independent tests ahead of time in a thread pool, which reduces the run
+    time on backends with a high per-query latency such as BigQuery. Ignored
+    when tests are distributed with pytest-xdist """
+
+    maximum_bytes_billed: Optional[int] = None
+    """ On BigQuery, the maximum bytes a single query may process. Tests whose
+    queries are estimated to process more are skipped """
+
+    max_bytes_per_run: Optional[int] = None
+    """ On BigQuery, the maximum bytes all queries in a run may process. Tests
+    are skipped once their queries would take the run over this budget """
+
+    estimate: bool = False
+    """ If set, estimate the cost of the first query of each test rather than
+    executing it: the bytes processed on BigQuery, or the rows scanned on
+    DuckDB, and the number of operators in its plan. Tests are skipped and
+    their estimates listed in the summary """
+
+    result_cache_path: Optional[Path] = None
+    """ If set, cache the result of each query in this directory. Queries are
+    only executed again when their sql or the tables they read change. Results
+    are stored with pickle, which can run arbitrary code when loaded, so only
+    use a directory which no one else can write to """
+
+    result_cache_max_age: int = 86400
+    """ The age in seconds after which cached query results are executed
+    again. Set to 0 to refresh every cached result """
+
+    slowest_tests: int = 10
+    """ The number of slowest and most expensive tests to list in the
+    summary. Set to 0 to disable """
+
 
 class ConfigSingleton(Generic[T], metaclass=Singleton):
     """Singleton for all amlaidatatest configuration"""
@@ -169,7 +243,7 @@ class IngestConfigAction(argparse.Action):
 
     def __call__(
         self,
-        parser: argparse.ArgumentParser | pytest.Parser,
+        parser: "argparse.ArgumentParser | pytest.Parser",
         namespace,
         values,
         option_string=None,
@@ -197,8 +271,8 @@ def is_required(field):
 
 
 def init_parser_options_from_config(
-    parser: argparse.ArgumentParser | pytest.Parser, defaults: Optional[dict] = None
-) -> argparse.ArgumentParser | pytest.Parser:
+    parser: "argparse.ArgumentParser | pytest.Parser", defaults: Optional[dict] = None
+) -> "argparse.ArgumentParser | pytest.Parser":
     """Initialize an argparse or pytest parser from a configuration file.
 
     Argparse and pytest's configuration parser are remarkably similar, but they
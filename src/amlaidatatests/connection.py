@@ -42,12 +42,15 @@ def _verify_required_packages(scheme):
         ibis.options.pyspark.treat_nan_as_null = True
 
 
-def connection_factory(default: Optional[str] = None):
+def connection_factory(
+    default: Optional[str] = None, connection_string: Optional[str] = None
+):
     config = ConfigSingleton.get()
 
     is_real_execution = not config.dry_run
 
-    connection_string = config.get("connection_string", default)
+    if connection_string is None:
+        connection_string = config.get("connection_string", default)
     # Workaround https://github.com/ibis-project/ibis/issues/9456,
     # which means that connection details aren't properly parsed out
     result = urlparse(connection_string)
@@ -109,6 +112,10 @@ def connection_factory(default: Optional[str] = None):
     connection = ibis.connect(connection_string, **kwargs)
     if result.scheme == "bigquery":
         connection.client.default_query_job_config.labels = labels
+        if config.maximum_bytes_billed:
+            connection.client.default_query_job_config.maximum_bytes_billed = (
+                config.maximum_bytes_billed
+            )
     # We also need to set the ibis backend to avoid always passing around the connection
     # object. This allows ibis.to_sql to successfully generate sql in the right language
     ibis.set_backend(connection)
@@ -0,0 +1,109 @@
+"""Estimate mode, which reports the cost of each test without running it.
+
+The dry_run option validates the tests against an empty DuckDB database. When
+the estimate option is set, the tests instead run against the real backend,
+but their first query is estimated rather than executed:
+
+- BigQuery: the query is submitted as a dry run job, which returns the bytes
+  it would process without billing it.
+- DuckDB: the physical plan of the query is read with EXPLAIN, which gives
+  the number of rows each table scan is estimated to read.
+
+The plan complexity of each query is its number of operators: the physical
+operators in the DuckDB plan, or on other backends the relational operations
+of the ibis expression, as BigQuery dry runs do not return a plan. The
+estimates are recorded as query statistics of the test, which is then
+skipped, and are listed in the summary.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import ibis.expr.operations as ops
+from ibis import BaseBackend, Expr
+
+from amlaidatatests.budget import BytesBudget
+from amlaidatatests.config import cfg
+from amlaidatatests.exceptions import SkipTest
+from amlaidatatests.instrumentation import current_stats
+
+
+@dataclass
+class QueryEstimate:
+    """The estimated cost of a query"""
+
+    plan_operators: int
+    """ The number of operators in the plan of the query """
+    bytes_processed: Optional[int] = None
+    """ Only estimated on BigQuery """
+    rows_scanned: Optional[int] = None
+    """ Only estimated on DuckDB """
+
+
+def _plan_nodes(plan: list[dict]) -> list[dict]:
+    nodes = []
+    for node in plan:
+        nodes.append(node)
+        nodes.extend(_plan_nodes(node.get("children", [])))
+    return nodes
+
+
+def estimate_query(connection: BaseBackend, expr: Expr, **kwargs: Any) -> QueryEstimate:
+    """Estimate the cost of a query without executing it
+
+    Args:
+        connection: The ibis connection the query would be executed by
+        expr:       The expression to estimate
+        kwargs:     Arguments to execute, passed on to compile
+
+    Returns:
+        The estimated cost of the query
+    """
+    sql = str(connection.compile(expr, params=kwargs.get("params")))
+    if connection.name == "duckdb":
+        [(_, plan)] = connection.con.execute(f"EXPLAIN (FORMAT JSON) {sql}").fetchall()
+        nodes = _plan_nodes(json.loads(plan))
+        return QueryEstimate(
+            plan_operators=len(nodes),
+            rows_scanned=sum(
+                int(node["extra_info"].get("Estimated Cardinality", 0))
+                for node in nodes
+                if node["name"].strip().endswith("_SCAN")
+            ),
+        )
+    operators = len(expr.op().find(ops.Relation))
+    if connection.name == "bigquery":
+        return QueryEstimate(
+            plan_operators=operators,
+            bytes_processed=BytesBudget.estimate(connection, sql),
+        )
+    return QueryEstimate(plan_operators=operators)
+
+
+def estimate_queries(connection: BaseBackend) -> None:
+    """Wrap the connection so queries are estimated rather than executed when
+    the estimate option is set. Does nothing if the connection has already
+    been wrapped.
+
+    Args:
+        connection: The ibis connection to wrap
+    """
+    if getattr(connection, "_amlaidatatests_estimated", False):
+        return
+    execute = connection.execute
+
+    def _execute(expr, *args, **kwargs):
+        if not cfg().estimate:
+            return execute(expr, *args, **kwargs)
+        estimate = estimate_query(connection, expr, **kwargs)
+        if (stats := current_stats()) is not None:
+            stats.queries_estimated += 1
+            stats.plan_operators += estimate.plan_operators
+            stats.bytes_estimated += estimate.bytes_processed or 0
+            stats.rows_estimated += estimate.rows_scanned or 0
+        # The test cannot continue without the result of the query
+        raise SkipTest("Not executed in estimate mode")
+
+    connection.execute = _execute
+    connection._amlaidatatests_estimated = True
@@ -5,10 +5,12 @@ import functools
 import importlib
 from dataclasses import dataclass
 from enum import auto
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import ibis
-import pandas as pd
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 @dataclass
@@ -21,7 +23,10 @@ class TestConfiguration:
     interpretation: Optional[str]
 
 
-def read_test_description_file() -> pd.DataFrame:
+def read_test_description_file() -> "pd.DataFrame":
+    # pandas is slow to import, so is only imported when first needed
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
     template_res = importlib.resources.files("amlaidatatests.resources").joinpath(
         "test_descriptions_en_us.csv"
     )
@@ -81,7 +86,15 @@ class DataTestFailure(Exception):
         self.message = message
         self.expr = expr
         self.test_id = test_id
-        self.sql = str(ibis.get_backend().compile(expr)) if expr is not None else None
+
+    @property
+    def expr(self):
+        return self._expr
+
+    @expr.setter
+    def expr(self, value):
+        self._expr = value
+        self.sql = str(ibis.get_backend().compile(value)) if value is not None else None
 
     @property
     def test_id(self):
@@ -138,3 +151,29 @@ class SkipTest(Exception):
 
     def __init__(self, message: str) -> None:
         self.message = message
+
+
+class DataTestInconclusive(SkipTest):
+    """An AML AI exception representing a test which could not decide whether
+    the data passed, for example because an approximate result was within the
+    error margin of the test threshold. Reported as a skipped test.
+
+    Args:
+        message: A message for the user explaining why the test was inconclusive
+    """
+
+    def __init__(self, message: str) -> None:
+        super().__init__(f"Inconclusive: {message}")
+
+
+class BudgetExceeded(SkipTest):
+    """An AML AI exception representing a test which was not run because its
+    query would process more bytes than the configured budget. Reported as a
+    skipped test.
+
+    Args:
+        message: A message for the user explaining which budget was exceeded
+    """
+
+    def __init__(self, message: str) -> None:
+        super().__init__(f"Over budget: {message}")
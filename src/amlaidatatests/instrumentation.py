@@ -0,0 +1,109 @@
+"""Instrumentation of the queries executed by each test.
+
+The connection is wrapped once so every query records its wall time and the
+number of rows returned, and on BigQuery the bytes processed and slot time of
+its job. Estimates of queries which were not executed, in estimate mode or to
+enforce bytes budgets, are also recorded. Queries are attributed to the
+[QueryStats] of the test being run in the current thread, which is set with
+[record_queries].
+"""
+
+import contextlib
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Iterator, Optional
+
+from ibis import BaseBackend
+
+_local = threading.local()
+
+
+@dataclass
+class QueryStats:
+    """Statistics of the queries executed by a test"""
+
+    query_count: int = 0
+    query_seconds: float = 0.0
+    rows_returned: int = 0
+    bytes_processed: int = 0
+    """ Only recorded on BigQuery """
+    slot_ms: int = 0
+    """ Only recorded on BigQuery """
+    bytes_estimated: int = 0
+    """ Only recorded on BigQuery, in estimate mode or when a bytes budget is
+    set """
+    queries_estimated: int = 0
+    """ Only recorded in estimate mode """
+    plan_operators: int = 0
+    """ Only recorded in estimate mode """
+    rows_estimated: int = 0
+    """ Only recorded in estimate mode on DuckDB """
+
+    def merge(self, other: "QueryStats") -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    def user_properties(self) -> dict[str, Any]:
+        """The statistics as pytest user properties"""
+        return asdict(self)
+
+
+def current_stats() -> Optional[QueryStats]:
+    """The statistics queries in the current thread are recorded to, if any"""
+    return getattr(_local, "stats", None)
+
+
+@contextlib.contextmanager
+def record_queries(stats: QueryStats) -> Iterator[QueryStats]:
+    """Record queries executed in the current thread to stats
+
+    Args:
+        stats: The statistics to record to
+    """
+    previous = current_stats()
+    _local.stats = stats
+    try:
+        yield stats
+    finally:
+        _local.stats = previous
+
+
+def instrument(connection: BaseBackend) -> None:
+    """Wrap the connection so queries are recorded. Does nothing if the
+    connection has already been instrumented.
+
+    Args:
+        connection: The ibis connection to instrument
+    """
+    if getattr(connection, "_amlaidatatests_instrumented", False):
+        return
+    execute = connection.execute
+
+    def _execute(expr, *args, **kwargs):
+        start = time.perf_counter()
+        result = execute(expr, *args, **kwargs)
+        if (stats := current_stats()) is not None:
+            stats.query_count += 1
+            stats.query_seconds += time.perf_counter() - start
+            # Scalar expressions return a single value
+            stats.rows_returned += len(result) if hasattr(result, "__len__") else 1
+        return result
+
+    connection.execute = _execute
+
+    if connection.name == "bigquery":
+        raw_sql = connection.raw_sql
+
+        def _raw_sql(*args, **kwargs):
+            # Queries are run as BigQuery jobs, whose statistics are only
+            # available on the result of raw_sql
+            result = raw_sql(*args, **kwargs)
+            if (stats := current_stats()) is not None:
+                stats.bytes_processed += result.total_bytes_processed or 0
+                stats.slot_ms += result.slot_millis or 0
+            return result
+
+        connection.raw_sql = _raw_sql
+
+    connection._amlaidatatests_instrumented = True
@@ -1,38 +1,40 @@
+import csv
+import functools
 import importlib.resources
 
-import pandas as pd
 
+def _read_codes(resource: str) -> tuple[str, ...]:
+    """Read the code column of a csv file in amlaidatatests.resources"""
+    template_res = importlib.resources.files("amlaidatatests.resources").joinpath(
+        resource
+    )
+    with template_res.open(encoding="utf-8", newline="") as template_file:
+        return tuple(row["code"] for row in csv.DictReader(template_file))
 
-def get_valid_region_codes() -> list:
-    """Get a list of valid ISO 3166-2 currency codes
 
-    The current list of currency codes was obtained from ...
+@functools.cache
+def get_valid_region_codes() -> tuple[str, ...]:
+    """Get the valid ISO 3166-2 region codes
+
+    The current list of region codes was obtained from ...
+
+    The codes are read once per process.
 
     Returns:
-        A list of valid currency codes
+        A tuple of valid region codes
     """
-
-    template_res = importlib.resources.files("amlaidatatests.resources").joinpath(
-        "country_codes.csv"
-    )
-    with importlib.resources.as_file(template_res) as template_file:
-        return pd.read_csv(template_file, na_values=[], keep_default_na=False)[
-            "code"
-        ].to_list()
+    return _read_codes("country_codes.csv")
 
 
-def get_valid_currency_codes() -> list:
-    """Get a list of valid 3-character ISO 4217 currency codes
+@functools.cache
+def get_valid_currency_codes() -> tuple[str, ...]:
+    """Get the valid 3-character ISO 4217 currency codes
 
     The current list of currency codes was obtained from ...
 
+    The codes are read once per process.
+
     Returns:
-        A list of valid currency codes
+        A tuple of valid currency codes
     """
-    template_res = importlib.resources.files("amlaidatatests.resources").joinpath(
-        "currency_codes.csv"
-    )
-    with importlib.resources.as_file(template_res) as template_file:
-        return pd.read_csv(template_file, na_values=[], keep_default_na=False)[
-            "code"
-        ].to_list()
+    return _read_codes("currency_codes.csv")
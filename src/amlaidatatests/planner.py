@@ -0,0 +1,152 @@
+"""Query planner which fuses compatible test queries into a single query.
+
+Many tests only need one or two scalar aggregates over the same relation, for
+example the number of null values in a column. Executed individually, each of
+these tests scans the table again. When query fusion is enabled, tests which
+share a fusion key are collected into a [FusedQuery] and all of their
+aggregates are computed in a single pass. The first test in the group to run
+executes the fused query and the remaining tests read their results from it.
+"""
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Hashable, Optional
+
+from ibis import BaseBackend, IbisError
+
+from amlaidatatests.singleton import Singleton
+
+if TYPE_CHECKING:
+    from amlaidatatests.base import AbstractTableTest
+
+logger = logging.getLogger(__name__)
+
+MemberKey = tuple[int, Optional[str]]
+
+
+def _member_key(test: "AbstractTableTest", column: Optional[str]) -> MemberKey:
+    # Test objects are not hashable by value and the same test object can be
+    # run multiple times with different column prefixes
+    return (id(test), column)
+
+
+class FusedQuery:
+    """A group of tests whose aggregates are computed in a single query
+
+    Args:
+        key: The fusion key shared by all members of the group
+    """
+
+    def __init__(self, key: Hashable) -> None:
+        self.key = key
+        self.members: dict[MemberKey, tuple["AbstractTableTest", Optional[str]]] = {}
+        self.results: Optional[dict[MemberKey, Optional[dict[str, Any]]]] = None
+        self.failed = False
+        self.lock = threading.Lock()
+
+    def add(self, test: "AbstractTableTest", column: Optional[str]) -> None:
+        self.members[_member_key(test, column)] = (test, column)
+
+    def execute(self, caller: "AbstractTableTest", connection: BaseBackend) -> None:
+        """Build and execute the fused query for every member of the group.
+
+        The relation is built by the calling test, which is guaranteed to have
+        resolved the table from the connection. Members whose aggregates
+        cannot be built against the relation, for example because an optional
+        column is missing, are excluded and will be run individually.
+
+        Args:
+            caller:     The test requesting the result
+            connection: The ibis connection to execute against
+        """
+        relation = caller.fusion_relation()
+        aggregates = {}
+        names: dict[MemberKey, dict[str, str]] = {}
+        for i, (member_key, (test, column)) in enumerate(self.members.items()):
+            try:
+                member_aggregates = test.fusion_aggregates(relation, column)
+            except (IbisError, AttributeError, KeyError, NotImplementedError):
+                continue
+            names[member_key] = {}
+            for name, agg in member_aggregates.items():
+                fused_name = f"_{i}_{name}"
+                aggregates[fused_name] = agg
+                names[member_key][name] = fused_name
+
+        self.results = {}
+        if not aggregates:
+            return
+        row = connection.execute(relation.agg(**aggregates)).iloc[0]
+        for member_key, member_names in names.items():
+            self.results[member_key] = {
+                name: row[fused_name] for name, fused_name in member_names.items()
+            }
+
+
+class QueryPlanner(metaclass=Singleton):
+    """Session-wide registry of fused queries
+
+    Tests are registered before they run, normally when pytest collects them.
+    Only tests which return a fusion key from [AbstractTableTest.fusion_key]
+    are registered.
+    """
+
+    def __init__(self) -> None:
+        self.groups: dict[Hashable, FusedQuery] = {}
+        self.membership: dict[MemberKey, Hashable] = {}
+
+    def register(self, test: "AbstractTableTest", prefix: Optional[str] = None):
+        """Register a test so its aggregates are included in a fused query
+
+        Args:
+            test:   The test to register
+            prefix: The column prefix the test will be called with, if any
+        """
+        column = getattr(test, "column", None)
+        if prefix and isinstance(column, str):
+            column = f"{prefix}.{column}"
+        key = test.fusion_key(column)
+        if key is None:
+            return
+        group = self.groups.setdefault(key, FusedQuery(key))
+        group.add(test, column)
+        self.membership[_member_key(test, column)] = key
+
+    def fetch(
+        self, test: "AbstractTableTest", connection: BaseBackend
+    ) -> Optional[dict[str, Any]]:
+        """Get the fused results for the test, executing the fused query if
+        this is the first member of the group to run.
+
+        Args:
+            test:       The test requesting its results
+            connection: The ibis connection to execute against
+
+        Returns:
+            A dictionary of the aggregates returned by
+            [AbstractTableTest.fusion_aggregates], or None if the test was not
+            fused and should be executed individually
+        """
+        member_key = _member_key(test, getattr(test, "column", None))
+        key = self.membership.get(member_key)
+        if key is None:
+            return None
+        group = self.groups[key]
+        # Tests may be run concurrently, so only one member executes the query
+        with group.lock:
+            if group.failed:
+                return None
+            if group.results is None:
+                try:
+                    group.execute(caller=test, connection=connection)
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    # Fall back to running each test individually so a problem
+                    # with one member does not fail the whole group
+                    logger.warning("Fused query %s failed, running unfused: %s", key, e)
+                    group.failed = True
+                    return None
+        return group.results.get(member_key)
+
+    def clear(self) -> None:
+        self.groups = {}
+        self.membership = {}
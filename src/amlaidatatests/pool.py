@@ -0,0 +1,124 @@
+"""Pool which runs independent tests concurrently.
+
+Most of the run time of a test is spent waiting on the backend to execute its
+query. On backends with a high per-query latency, such as BigQuery, running
+tests one after another leaves the backend mostly idle. When
+max_concurrent_queries is greater than one, registered tests are run ahead of
+time in a bounded thread pool as soon as the first test is called. Each pytest
+item then collects the outcome of its test from the pool, so failures,
+warnings and skips are still reported against the correct item.
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional
+
+from ibis import BaseBackend
+
+from amlaidatatests.config import cfg
+from amlaidatatests.singleton import Singleton
+
+if TYPE_CHECKING:
+    from amlaidatatests.base import AbstractTableTest
+
+logger = logging.getLogger(__name__)
+
+CONCURRENT_BACKENDS = {"bigquery", "snowflake"}
+""" Backends whose connections can be shared between threads """
+
+
+class QueryPool(metaclass=Singleton):
+    """Session-wide pool of tests run ahead of pytest
+
+    Tests are registered before they run, normally when pytest collects them.
+    Only tests which are called without a column prefix are registered, as
+    prefixed tests share the test object between pytest items.
+    """
+
+    def __init__(self) -> None:
+        self.tests: dict[int, "AbstractTableTest"] = {}
+        self.prefixed: set[int] = set()
+        self.futures: dict[int, Future] = {}
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def enabled() -> bool:
+        """Whether tests should be run concurrently. Dry runs and sql logging
+        patch the connection for the test being run, so they are always run
+        sequentially"""
+        config = cfg()
+        return (
+            config.max_concurrent_queries > 1
+            and not config.dry_run
+            and not config.log_sql_path
+        )
+
+    @staticmethod
+    def supports(connection: BaseBackend) -> bool:
+        """Whether the backend can execute queries from multiple threads
+        through a single connection"""
+        return connection.name in CONCURRENT_BACKENDS
+
+    def register(self, test: "AbstractTableTest", prefix: Optional[str] = None):
+        """Register a test to be run by the pool
+
+        Args:
+            test:   The test to register
+            prefix: The column prefix the test will be called with, if any
+        """
+        if not test.pooled:
+            return
+        if prefix:
+            self.prefixed.add(id(test))
+            self.tests.pop(id(test), None)
+        elif id(test) not in self.prefixed:
+            self.tests[id(test)] = test
+
+    def start(self, connection: BaseBackend) -> None:
+        """Submit every registered test to the pool, in the order they were
+        registered. Does nothing if the pool has already been started.
+
+        Args:
+            connection: The ibis connection to execute against
+        """
+        with self._lock:
+            if self.executor is not None:
+                return
+            if not self.supports(connection):
+                logger.warning(
+                    "%s does not support concurrent queries, running tests "
+                    "sequentially",
+                    connection.name,
+                )
+                self.tests = {}
+            max_workers = cfg().max_concurrent_queries
+            logger.debug(
+                "Running %s tests with %s workers", len(self.tests), max_workers
+            )
+            self.executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="amlaidatatests"
+            )
+            for key, test in self.tests.items():
+                self.futures[key] = self.executor.submit(
+                    test._run_pooled, connection=connection
+                )
+
+    def take(self, test: "AbstractTableTest") -> Optional[Future]:
+        """Get the future for a test run by the pool. Each future can only be
+        taken once, so a test called again runs normally.
+
+        Args:
+            test: The test being run
+
+        Returns:
+            The future for the test, or None if it was not run by the pool
+        """
+        with self._lock:
+            return self.futures.pop(id(test), None)
+
+    def clear(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        self.__init__()
@@ -0,0 +1,258 @@
+"""Replication of the AML AI tables between backends.
+
+Run with ``amlaidatatests replicate``, for example to copy tables from
+BigQuery into a local DuckDB database to develop against:
+
+    amlaidatatests replicate --source bigquery://my-project/my_dataset \\
+        --connection_string duckdb://replica.ddb
+
+Each table is streamed from the source as Arrow record batches and inserted
+into the target (given by --connection_string) batch by batch, so memory use
+is bounded by the batch size rather than the size of the table. Tables are
+read concurrently on backends whose connections can be shared between
+threads. Batches are always written by a single thread through a bounded
+queue.
+"""
+
+import argparse
+import logging
+import queue
+import threading
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+import ibis
+import pyarrow as pa
+from ibis import BaseBackend
+
+from amlaidatatests.config import cfg, init_parser_options_from_config
+from amlaidatatests.pool import QueryPool
+from amlaidatatests.schema.utils import get_amlai_schema, get_table_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100_000
+
+_DONE = object()
+""" Sentinel put on the queue when a table has been read """
+
+
+def _nullable(t: pa.DataType) -> pa.DataType:
+    """The type with every nested field nullable"""
+    if pa.types.is_struct(t):
+        return pa.struct([pa.field(f.name, _nullable(f.type)) for f in t])
+    if pa.types.is_list(t):
+        return pa.list_(_nullable(t.value_type))
+    return t
+
+
+def arrow_schema(schema: ibis.Schema) -> pa.Schema:
+    """The schema of batches inserted into a table with an ibis schema.
+    Fields are nullable, so values which violate the schema's nullability are
+    copied as they are for the tests to find"""
+    return pa.schema([pa.field(f.name, _nullable(f.type)) for f in schema.to_pyarrow()])
+
+
+def reconcile_batch(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    """Conform a batch to the schema of the target table. Columns missing from
+    the batch are added as nulls, columns not in the schema are dropped and
+    columns are cast to the type in the schema.
+
+    Args:
+        batch:  The batch read from the source table
+        schema: The schema of the target table
+
+    Returns:
+        The batch with the columns of the schema, in the same order
+    """
+    columns = []
+    for f in schema:
+        index = batch.schema.get_field_index(f.name)
+        if index == -1:
+            columns.append(pa.nulls(batch.num_rows, type=f.type))
+        else:
+            columns.append(batch.column(index).cast(f.type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def read_batches(
+    source: BaseBackend, table_name: str, batch_size: int
+) -> Iterator[pa.RecordBatch]:
+    """Stream a table from the source as Arrow record batches
+
+    Args:
+        source:     The ibis connection to read from
+        table_name: The name of the table in the source
+        batch_size: The maximum number of rows in each batch
+    """
+    table = source.table(table_name)
+    with table.to_pyarrow_batches(chunk_size=batch_size) as reader:
+        yield from reader
+
+
+def replicate(
+    source: BaseBackend,
+    target: BaseBackend,
+    tables: dict[str, str],
+    conform: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+) -> dict[str, int]:
+    """Copy tables from the source to the target. Existing target tables are
+    replaced.
+
+    Args:
+        source:      The ibis connection to read from
+        target:      The ibis connection to write to
+        tables:      The source table name of each AML AI table to copy
+        conform:     If true, the target tables have the AML AI schema.
+                     Columns missing from the source are filled with nulls
+                     and additional columns are dropped. Otherwise the
+                     target tables have the schema of the source tables.
+        batch_size:  The maximum number of rows read and inserted at once
+        max_workers: The number of tables to read concurrently. Tables are
+                     read one at a time if the source cannot be shared
+                     between threads.
+
+    Returns:
+        The number of rows copied into each table
+    """
+    schemas = {}
+    for name, source_name in tables.items():
+        source_schema = source.table(source_name).schema()
+        schema = source_schema
+        if conform:
+            schema = get_amlai_schema(cfg().schema_version)[name].schema
+            missing = [c for c in schema.names if c not in source_schema]
+            if missing:
+                logger.warning(
+                    "%s is missing columns %s, which will be null",
+                    source_name,
+                    ", ".join(missing),
+                )
+        target.create_table(get_table_name(name), schema=schema, overwrite=True)
+        schemas[name] = arrow_schema(schema)
+
+    if not QueryPool.supports(source):
+        max_workers = 1
+    # Bound the batches held in memory, whatever the number of readers
+    batches: queue.Queue = queue.Queue(maxsize=max_workers * 2)
+    cancelled = threading.Event()
+
+    def _read(name: str) -> None:
+        try:
+            for batch in read_batches(source, tables[name], batch_size):
+                if cancelled.is_set():
+                    return
+                batches.put((name, batch))
+        finally:
+            batches.put((name, _DONE))
+
+    rows = {name: 0 for name in tables}
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="amlaidatatests-replicate"
+    ) as executor:
+        futures = [executor.submit(_read, name) for name in tables]
+        remaining = len(tables)
+        try:
+            while remaining:
+                name, batch = batches.get()
+                if batch is _DONE:
+                    remaining -= 1
+                    continue
+                batch = reconcile_batch(batch, schemas[name])
+                target.insert(
+                    get_table_name(name),
+                    obj=ibis.memtable(pa.Table.from_batches([batch])),
+                )
+                rows[name] += batch.num_rows
+        finally:
+            # Unblock readers waiting on a full queue if writing failed
+            cancelled.set()
+            while any(not f.done() for f in futures):
+                try:
+                    batches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        # Raise any error from reading the tables
+        for f in futures:
+            f.result()
+    return rows
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="amlaidatatests replicate",
+        description="Copy the AML AI tables from the source connection into "
+        "the tables named by the --connection_string, --table_name_template "
+        "and --id options",
+    )
+    parser = typing.cast(
+        argparse.ArgumentParser, init_parser_options_from_config(parser)
+    )
+    parser.add_argument(
+        "--source",
+        required=True,
+        help="Connection string of the backend to copy the tables from",
+    )
+    parser.add_argument(
+        "--source-table-template",
+        default="{name}",
+        help="Name of each table in the source, where {name} is the name of "
+        "the AML AI table",
+    )
+    parser.add_argument(
+        "--tables",
+        nargs="+",
+        help="The tables to copy. Defaults to every table in the schema",
+    )
+    parser.add_argument(
+        "--conform",
+        action="store_true",
+        help="Create the target tables with the AML AI schema rather than "
+        "the schema of the source tables",
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=4,
+        help="The number of tables to read concurrently, on backends which "
+        "support it",
+    )
+    return parser
+
+
+def entry_point(sysargs: Optional[list[str]] = None) -> int:
+    """Replicate tables between backends
+
+    Args:
+        sysargs: The command line arguments, excluding "replicate"
+
+    Returns:
+        The exit code
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from amlaidatatests.connection import connection_factory
+
+    args = build_parser().parse_args(sysargs)
+    table_names = args.tables or [
+        t.name for t in get_amlai_schema(cfg().schema_version).TABLES
+    ]
+    tables = {
+        name: args.source_table_template.format(name=name) for name in table_names
+    }
+    source = connection_factory(connection_string=args.source)
+    target = connection_factory()
+    rows = replicate(
+        source,
+        target,
+        tables,
+        conform=args.conform,
+        batch_size=args.batch_size,
+        max_workers=args.max_workers,
+    )
+    for name, count in rows.items():
+        print(f"{get_table_name(name)}: {count:,} rows")
+    return 0
@@ -0,0 +1,209 @@
+"""On-disk cache of query results between runs.
+
+When the result_cache_path option is set, the result of each query is stored
+in that directory, keyed by the compiled sql of the query and a fingerprint of
+every table it reads. Re-running the suite against unchanged tables, for
+example after fixing a single failing test, returns the stored results rather
+than executing each query again.
+
+Table fingerprints are read once per session:
+
+- BigQuery: the last modified time and row count of each table.
+- DuckDB: the modification time and size of the database file and its
+  write-ahead log.
+
+Lookup tables of reference values are not fingerprinted, as their names are
+derived from their values. Queries against other backends, in-memory databases
+or raw sql, which cannot be fingerprinted, are always executed, as are queries
+using the current time or random values, such as DT001's comparison with
+now(), whose results change between runs. Cached results older than
+result_cache_max_age are executed again; a max age of 0 refreshes the whole
+cache.
+
+Results are stored with pickle, and loading a pickle can run arbitrary code, so
+the cache directory must only be writable by trusted users. It is created
+readable and writable only by its owner.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import ibis.expr.operations as ops
+from ibis import BaseBackend, Expr
+
+from amlaidatatests.cache import LOOKUP_TABLE_PREFIX, RelationCache
+from amlaidatatests.config import cfg
+from amlaidatatests.singleton import Singleton
+
+logger = logging.getLogger(__name__)
+
+_MISS = object()
+
+_NON_DETERMINISTIC = (ops.TimestampNow, ops.DateNow, ops.RandomScalar, ops.RandomUUID)
+""" Operations whose values change between runs """
+
+
+def _bigquery_fingerprint(
+    connection: BaseBackend, table: ops.DatabaseTable
+) -> Optional[str]:
+    catalog = table.namespace.catalog or connection.current_catalog
+    database = table.namespace.database or connection.current_database
+    metadata = connection.client.get_table(f"{catalog}.{database}.{table.name}")
+    return f"{metadata.modified.isoformat()}:{metadata.num_rows}"
+
+
+def _duckdb_fingerprint(
+    connection: BaseBackend, table: ops.DatabaseTable
+) -> Optional[str]:
+    catalog = table.namespace.catalog or connection.current_catalog
+    [(path,)] = connection.con.execute(
+        "SELECT path FROM duckdb_databases() WHERE database_name = ?", [catalog]
+    ).fetchall()
+    if path is None:
+        # In-memory databases do not outlive the session
+        return None
+    fingerprint = []
+    # Changes are written to the write-ahead log until it is checkpointed
+    for file in [path, f"{path}.wal"]:
+        if os.path.exists(file):
+            stat = os.stat(file)
+            fingerprint.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+    return ":".join(fingerprint)
+
+
+_FINGERPRINTS = {"bigquery": _bigquery_fingerprint, "duckdb": _duckdb_fingerprint}
+
+
+class ResultCache(metaclass=Singleton):
+    """Session-wide access to the on-disk cache of query results"""
+
+    def __init__(self) -> None:
+        self.fingerprints: dict[tuple, Optional[str]] = {}
+        """ Fingerprints of the tables read this session """
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def path() -> Optional[Path]:
+        """The cache directory, or None if results are not cached. Sampled
+        runs read a different sample each time, so are never cached"""
+        config = cfg()
+        if config.dry_run or config.sample_fraction or not config.result_cache_path:
+            return None
+        return Path(config.result_cache_path)
+
+    def _fingerprint(
+        self, connection: BaseBackend, table: ops.DatabaseTable
+    ) -> Optional[str]:
+        key = (id(connection), table.name, table.namespace)
+        with self._lock:
+            if key not in self.fingerprints:
+                self.fingerprints[key] = _FINGERPRINTS[connection.name](
+                    connection, table
+                )
+            return self.fingerprints[key]
+
+    def key(
+        self, connection: BaseBackend, expr: Expr, *args: Any, **kwargs: Any
+    ) -> Optional[str]:
+        """The cache key of a query
+
+        Args:
+            connection: The ibis connection executing the query
+            expr:       The expression being executed
+            args:       Any other arguments to execute, such as limit
+            kwargs:     Any other arguments to execute
+
+        Returns:
+            The key, or None if the query cannot be cached
+        """
+        if connection.name not in _FINGERPRINTS:
+            return None
+        # Materialized relations have a new name each session
+        expr = RelationCache().unmaterialize(expr)
+        node = expr.op()
+        if node.find((ops.SQLQueryResult, ops.SQLStringView)):
+            # The tables read by raw sql are unknown
+            return None
+        if node.find(_NON_DETERMINISTIC):
+            # The result depends on when the query is executed
+            return None
+        fingerprints = []
+        for table in sorted(
+            node.find(ops.DatabaseTable), key=lambda t: (t.name, str(t.namespace))
+        ):
+            if table.name.startswith(LOOKUP_TABLE_PREFIX):
+                # Lookup tables are created again each session, but their
+                # content is identified by their name, which is in the sql
+                continue
+            fingerprint = self._fingerprint(connection, table)
+            if fingerprint is None:
+                return None
+            fingerprints.append(f"{table.namespace}.{table.name}={fingerprint}")
+        sql = str(connection.compile(expr))
+        content = "\n".join(
+            [sql, repr(args), repr(sorted(kwargs.items())), *fingerprints]
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any:
+        """The cached result of a query, or _MISS if there is no result newer
+        than result_cache_max_age"""
+        path = self.path() / f"{key}.pkl"
+        try:
+            age = time.time() - path.stat().st_mtime
+            if age > cfg().result_cache_max_age:
+                return _MISS
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return _MISS
+
+    def put(self, key: str, result: Any) -> None:
+        """Store the result of a query"""
+        directory = self.path()
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # Write atomically, as tests may be run concurrently
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+            pickle.dump(result, f)
+        os.replace(f.name, directory / f"{key}.pkl")
+
+    def clear(self) -> None:
+        self.fingerprints = {}
+
+
+def cache_results(connection: BaseBackend) -> None:
+    """Wrap the connection so query results are cached when the
+    result_cache_path option is set. Does nothing if the connection has
+    already been wrapped.
+
+    Args:
+        connection: The ibis connection to wrap
+    """
+    if getattr(connection, "_amlaidatatests_cached", False):
+        return
+    execute = connection.execute
+
+    def _execute(expr, *args, **kwargs):
+        cache = ResultCache()
+        key = None
+        if cache.path() is not None:
+            key = cache.key(connection, expr, *args, **kwargs)
+        if key is None:
+            return execute(expr, *args, **kwargs)
+        result = cache.get(key)
+        if result is not _MISS:
+            logger.debug("Using cached result %s", key)
+            return result
+        result = execute(expr, *args, **kwargs)
+        cache.put(key, result)
+        return result
+
+    connection.execute = _execute
+    connection._amlaidatatests_cached = True
@@ -0,0 +1,358 @@
+"""Native runner for the test suite.
+
+Running the suite through pytest carries a fixed overhead for collection,
+parametrize id generation, node id rewriting and reporting hooks, which is
+significant in frequent CI runs. The native runner, enabled with the --native
+option, builds the same list of tests directly from the test modules in
+amlaidatatests.tests. It expands their parametrize marks, calls each test
+function in order and writes the same amlaidatatests summary as the pytest
+runner.
+
+The native runner supports selecting tests with -k; other pytest options are
+ignored. Tests are scheduled exactly as they are under pytest, so query fusion
+and concurrent queries are supported.
+"""
+
+import argparse
+import importlib
+import inspect
+import itertools
+import logging
+import os
+import pkgutil
+import shutil
+import sys
+import time
+import traceback
+import warnings
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Any, Callable, Iterator, Optional
+
+import pytest
+from ibis import BaseBackend
+
+try:
+    # pytest has no public api for -k expressions
+    from _pytest.mark.expression import Expression
+except ImportError:  # pragma: no cover
+    Expression = None
+
+import amlaidatatests.tests
+from amlaidatatests.base import AbstractBaseTest
+from amlaidatatests.connection import connection_factory
+from amlaidatatests.tests.conftest import (
+    AMLAITestReport,
+    expect_tests,
+    finish_session,
+    register_tests,
+    render_summary,
+)
+
+logger = logging.getLogger(__name__)
+
+# pytest does not export the type of the parameter sets made by pytest.param
+ParameterSet = type(pytest.param(None))
+
+_MARKUP = {"red": 31, "green": 32, "yellow": 33, "blue": 34, "bold": 1}
+
+
+@dataclass
+class _Node:
+    user_properties: list[tuple[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class _Request:
+    """The subset of the pytest request fixture used by the tests"""
+
+    node: _Node = field(default_factory=_Node)
+
+
+@dataclass
+class TestItem:
+    """A single call of a test function"""
+
+    __test__ = False
+
+    nodeid: str
+    module: ModuleType
+    function: Callable
+    params: dict[str, Any]
+
+    @property
+    def name(self) -> str:
+        return self.nodeid.rsplit("::", maxsplit=1)[-1]
+
+
+@dataclass
+class TestResult:
+    """The outcome of a test item"""
+
+    __test__ = False
+
+    item: TestItem
+    outcome: str
+    """ One of passed, failed, skipped or xfailed """
+    seconds: float
+    user_properties: list[tuple[str, Any]]
+    message: Optional[str] = None
+    longrepr: Optional[str] = None
+    warnings: list[str] = field(default_factory=list)
+
+    def report(self, message: Optional[str] = None) -> AMLAITestReport:
+        return AMLAITestReport(
+            message=self.message if message is None else message,
+            nodeid=self.item.nodeid,
+            user_properties=dict(self.user_properties),
+        )
+
+
+class _TerminalReporter:
+    """The subset of the pytest terminal reporter used to render the
+    summary, writing to stdout"""
+
+    def __init__(self) -> None:
+        self.markup = sys.stdout.isatty() and "NO_COLOR" not in os.environ
+        self.width = shutil.get_terminal_size(fallback=(80, 24)).columns
+
+    def _markup(self, content: str, **markup: bool) -> str:
+        codes = [str(_MARKUP[k]) for k, v in markup.items() if v and k in _MARKUP]
+        if not (self.markup and codes and content):
+            return content
+        return f"\x1b[{';'.join(codes)}m{content}\x1b[0m"
+
+    def ensure_newline(self) -> None:
+        self.write("\n")
+
+    def section(self, title: str, sep: str = "=", **markup: bool) -> None:
+        # As in pytest, the title is centred in a line of separators
+        fill = sep * max((self.width - len(title) - 2) // (2 * len(sep)), 1)
+        line = f"{fill} {title} {fill}"
+        if len(line) + len(sep.rstrip()) <= self.width:
+            line += sep.rstrip()
+        self.write(f"{line}\n", **markup)
+
+    def write(self, content: str, **markup: bool) -> None:
+        sys.stdout.write(self._markup(content, **markup))
+        sys.stdout.flush()
+
+
+def _parametrize_id(value: Any, argname: str, index: int) -> str:
+    """Id of a parameter, as generated by pytest and the
+    pytest_make_parametrize_id hook"""
+    if isinstance(value, AbstractBaseTest):
+        return value.id
+    if isinstance(value, (str, int, float, bool)):
+        return str(value)
+    return f"{argname}{index}"
+
+
+def _expand(function: Callable) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Expand the parametrize marks of a test function into the id and
+    parameters of each call, in the order pytest generates them"""
+    dimensions = []
+    for mark in getattr(function, "pytestmark", []):
+        if mark.name != "parametrize":
+            continue
+        argnames, argvalues = mark.args[:2]
+        if isinstance(argnames, str):
+            argnames = [a.strip() for a in argnames.split(",")]
+        calls = []
+        for index, value in enumerate(argvalues):
+            param_id = None
+            if isinstance(value, ParameterSet):
+                value, param_id = value.values, value.id
+                if len(argnames) == 1:
+                    value = value[0]
+            values = dict(zip(argnames, value if len(argnames) > 1 else [value]))
+            if param_id is None:
+                param_id = "-".join(
+                    _parametrize_id(v, a, index) for a, v in values.items()
+                )
+            calls.append((param_id, values))
+        dimensions.append(calls)
+    for combination in itertools.product(*dimensions):
+        params = {}
+        for _, values in combination:
+            params.update(values)
+        yield "-".join(i for i, _ in combination), params
+
+
+def collect(keyword: Optional[str] = None) -> list[TestItem]:
+    """Build the list of tests from the test modules
+
+    Args:
+        keyword: A pytest -k expression to select tests with
+
+    Returns:
+        The selected tests, in the order pytest runs them
+    """
+    if keyword and Expression is None:
+        raise RuntimeError(
+            "-k is not supported by the native runner with this version of pytest"
+        )
+    expression = Expression.compile(keyword) if keyword else None
+    items = []
+    package = amlaidatatests.tests
+    for module_info in sorted(pkgutil.iter_modules(package.__path__)):
+        if not module_info.name.startswith("test_"):
+            continue
+        module = importlib.import_module(f"{package.__name__}.{module_info.name}")
+        file_name = f"{module_info.name}.py"
+        for name, function in vars(module).items():
+            if not (name.startswith("test_") and inspect.isfunction(function)):
+                continue
+            for param_id, params in _expand(function):
+                item_name = f"{name}[{param_id}]" if param_id else name
+                nodeid = f"{file_name}::{item_name}"
+                # Keyword matching is a case insensitive substring match on
+                # the names of the item and its parents, as in pytest
+                names = [package.__name__.rsplit(".")[-1], file_name, item_name]
+                if expression is not None and not expression.evaluate(
+                    lambda k, names=names: any(k.lower() in n.lower() for n in names)
+                ):
+                    continue
+                items.append(TestItem(nodeid, module, function, params))
+    return items
+
+
+def _exception_message(e: BaseException) -> str:
+    return traceback.format_exception_only(e)[-1].strip()
+
+
+def run_item(
+    item: TestItem, connection: BaseBackend, missing_tables: dict[str, str]
+) -> TestResult:
+    """Call a test function, recording its outcome and any warnings
+
+    Args:
+        item:           The test to run
+        connection:     The ibis connection to test against
+        missing_tables: The first test of each module which found its table
+                        missing. Later tests in the module are not run.
+    """
+    request = _Request()
+    user_properties = request.node.user_properties
+    available = {
+        "connection": connection,
+        "request": request,
+        "record_property": lambda k, v: user_properties.append((k, v)),
+        **item.params,
+    }
+    parameters = inspect.signature(item.function).parameters
+    kwargs = {k: v for k, v in available.items() if k in parameters}
+
+    outcome, message, longrepr = "passed", None, None
+    start = time.perf_counter()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        try:
+            if test_name := missing_tables.get(item.module.__name__):
+                pytest.xfail(
+                    "Skipping test as a previous test was unable "
+                    f"to query table ({test_name})"
+                )
+            item.function(**kwargs)
+        except pytest.skip.Exception as e:
+            outcome, message = "skipped", f"Skipped: {e.msg}"
+        except pytest.xfail.Exception as e:
+            outcome, message = "xfailed", e.msg
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            outcome, message = "failed", _exception_message(e)
+            longrepr = "".join(traceback.format_exception(e))
+    seconds = time.perf_counter() - start
+    if dict(user_properties).get("table_missing"):
+        missing_tables.setdefault(item.module.__name__, item.function.__name__)
+    return TestResult(
+        item=item,
+        outcome=outcome,
+        seconds=seconds,
+        user_properties=user_properties,
+        message=message,
+        longrepr=longrepr,
+        warnings=[
+            str(w.message)
+            for w in caught
+            if not issubclass(w.category, DeprecationWarning)
+        ],
+    )
+
+
+def run(sysargs: list[str], show_sql: bool = False) -> int:
+    """Run the suite with the native runner. The configuration must already
+    have been parsed.
+
+    Args:
+        sysargs:  Arguments not consumed by the configuration parser
+        show_sql: Show the full failure of each failed test, including sql
+
+    Returns:
+        The exit code, following pytest's exit codes
+    """
+    parser = argparse.ArgumentParser(prog="amlaidatatests --native", add_help=False)
+    parser.add_argument("-k", dest="keyword")
+    args, unsupported = parser.parse_known_args(sysargs)
+    if unsupported:
+        logger.warning(
+            "Ignoring options not supported by the native runner: %s",
+            " ".join(unsupported),
+        )
+
+    reporter = _TerminalReporter()
+    start = time.perf_counter()
+    items = collect(args.keyword)
+    # Tests which are not selected still hold back watermarks
+    expect_tests(item.params for item in (collect() if args.keyword else items))
+    register_tests(item.params for item in items)
+    connection = connection_factory()
+
+    results: list[TestResult] = []
+    missing_tables: dict[str, str] = {}
+    completed = False
+    try:
+        for item in items:
+            result = run_item(item, connection, missing_tables)
+            results.append(result)
+            reporter.write(
+                {"passed": ".", "failed": "F", "skipped": "s", "xfailed": "x"}[
+                    result.outcome
+                ]
+            )
+        completed = True
+    finally:
+        finish_session(completed=completed and bool(results))
+    failed = any(r.outcome == "failed" for r in results)
+    reporter.ensure_newline()
+
+    if show_sql:
+        for result in results:
+            if result.longrepr:
+                reporter.section(result.item.nodeid, sep="_", red=True, bold=True)
+                reporter.write(result.longrepr)
+
+    by_outcome: dict[str, list[TestResult]] = {}
+    for result in results:
+        by_outcome.setdefault(result.outcome, []).append(result)
+    render_summary(
+        reporter,
+        passed_tests=[r.report() for r in by_outcome.get("passed", [])],
+        failed_tests=[r.report() for r in by_outcome.get("failed", [])],
+        skipped_tests=[r.report() for r in by_outcome.get("skipped", [])],
+        errored_tests=[],
+        warned_tests=[r.report(w) for r in results for w in r.warnings],
+    )
+
+    counts = [
+        f"{len(by_outcome[o])} {o}"
+        for o in ["failed", "passed", "skipped", "xfailed"]
+        if o in by_outcome
+    ]
+    if n_warnings := sum(len(r.warnings) for r in results):
+        counts.append(f"{n_warnings} warning{'s' if n_warnings > 1 else ''}")
+    seconds = time.perf_counter() - start
+    summary = ", ".join(counts) or "no tests ran"
+    reporter.section(f"{summary} in {seconds:.2f}s", bold=True)
+    if not results:
+        return pytest.ExitCode.NO_TESTS_COLLECTED
+    return pytest.ExitCode.TESTS_FAILED if failed else pytest.ExitCode.OK
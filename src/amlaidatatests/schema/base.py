@@ -20,18 +20,38 @@ class TableType(enum.Enum):
     """ An immutable event whose existence is closed """
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TableConfig:
-    """Configuration object for tables in an aml ai schema"""
+    """Configuration object for tables in an aml ai schema. Configs are
+    immutable, so are shared between every test of the table rather than
+    copied"""
 
     name: str
     schema: Schema
-    entity_keys: Optional[list[str]] = None
+    entity_keys: Optional[tuple[str, ...]] = None
+    """ The columns identifying an entity. Lists are converted to tuples so
+    the config stays immutable """
     optional: bool = False
     table_type: TableType = TableType.CLOSED_ENDED_ENTITY
+    partition_column: Optional[str] = None
+    """ The timestamp column the table is typically partitioned on. Used to
+    restrict tests to the interval_start_date and interval_end_date options """
+
+    @property
+    def primary_key(self) -> list[str]:
+        """The columns uniquely identifying a row. Entity tables hold a row
+        per version of each entity, so also include validity_start_time"""
+        keys = list(self.entity_keys or [])
+        if self.table_type == TableType.EVENT:
+            return keys
+        return keys + ["validity_start_time"]
+
+    def __post_init__(self):
+        if self.entity_keys is not None:
+            object.__setattr__(self, "entity_keys", tuple(self.entity_keys))
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, frozen=True, slots=True)
 class ResolvedTableConfig(TableConfig):
     """A TableConfig which also includes an ibis table
     object.
@@ -46,8 +66,11 @@ class ResolvedTableConfig(TableConfig):
     table: Table
 
     def __post_init__(self):
-        self.resolved_name = self.table.get_name()
-        self.schema = self.table.schema()
+        # slots dataclasses do not support zero-argument super()
+        TableConfig.__post_init__(self)
+        # The config is frozen, so derived fields are set directly
+        object.__setattr__(self, "resolved_name", self.table.get_name())
+        object.__setattr__(self, "schema", self.table.schema())
 
 
 class BaseSchemaConfiguration(ABC):
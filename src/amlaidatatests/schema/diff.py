@@ -0,0 +1,178 @@
+"""Comparison of the schema of a table in the backend with its expected schema.
+
+The schema tests (F001, F003 and F004) each check a part of the schema of a
+table. Rather than each test walking the schema again, [diff_schema] compares
+the whole schema once and the tests read their result from the [SchemaDiff].
+Diffs are cached by the schemas compared, so each table is only compared once
+per session.
+
+Nested fields are addressed by their dot delimited path, as in
+[amlaidatatests.base.resolve_field]. Arrays are transparent, so the field x of
+an array of structs a has the path a.x.
+"""
+
+import functools
+from dataclasses import dataclass
+from typing import Iterator, Optional, cast
+
+from ibis import Schema
+from ibis.expr.datatypes import Array, DataType, Struct
+
+
+@dataclass(frozen=True)
+class ColumnDiff:
+    """The difference between the expected and actual type of a column"""
+
+    expected: DataType
+    actual: DataType
+    mismatch: Optional[str]
+    """ The path of the first field whose actual type is incompatible with
+    its expected type, or None if the types are compatible """
+    extra_fields: tuple[str, ...]
+    """ Paths of struct fields which are not in the expected type """
+    stricter: tuple[tuple[DataType, DataType], ...]
+    """ Expected and actual types of fields which are not nullable, but are
+    allowed to be """
+
+    @property
+    def compatible(self) -> bool:
+        return self.mismatch is None
+
+
+@dataclass(frozen=True)
+class SchemaDiff:
+    """The difference between the expected and actual schema of a table"""
+
+    expected_paths: frozenset[str]
+    """ The path of every field in the expected schema """
+    actual_paths: frozenset[str]
+    """ The path of every field in the actual schema """
+    columns: dict[str, ColumnDiff]
+    """ The difference of each column in both schemas """
+    excess_columns: tuple[str, ...]
+    """ Columns which are not in the expected schema """
+
+    @property
+    def missing_paths(self) -> frozenset[str]:
+        return self.expected_paths - self.actual_paths
+
+
+class _Mismatch(Exception):
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.path = path
+
+
+def _field_paths(dtype: DataType, path: str) -> Iterator[str]:
+    yield path
+    if dtype.is_array():
+        yield from _field_paths(cast(Array, dtype).value_type, path)
+        return
+    if dtype.is_struct():
+        for name, field_dtype in cast(Struct, dtype).items():
+            yield from _field_paths(field_dtype, f"{path}.{name}")
+
+
+def schema_paths(schema: Schema) -> frozenset[str]:
+    """The path of every field in the schema, including nested fields"""
+    return frozenset(
+        p for name, dtype in schema.items() for p in _field_paths(dtype, name)
+    )
+
+
+def _compare(
+    expected: DataType,
+    actual: DataType,
+    path: str,
+    extra_fields: list[str],
+    stricter: list[tuple[DataType, DataType]],
+) -> None:
+    if expected.name != actual.name:
+        raise _Mismatch(path)
+    if expected.nullable != actual.nullable:
+        if not actual.nullable:
+            stricter.append((expected, actual))
+        if not expected.nullable:
+            raise _Mismatch(path)
+    if expected.is_struct():
+        expected = cast(Struct, expected)
+        actual = cast(Struct, actual)
+        for name, actual_field in actual.items():
+            expected_field = expected.get(name)
+            if expected_field is None:
+                extra_fields.append(f"{path}.{name}")
+            else:
+                _compare(
+                    expected_field,
+                    actual_field,
+                    f"{path}.{name}",
+                    extra_fields,
+                    stricter,
+                )
+        # Nullable fields are not required, so may be missing
+        for name, expected_field in expected.items():
+            if name not in actual and not expected_field.nullable:
+                raise _Mismatch(f"{path}.{name}")
+    if expected.is_array():
+        _compare(
+            cast(Array, expected).value_type,
+            cast(Array, actual).value_type,
+            path,
+            extra_fields,
+            stricter,
+        )
+
+
+def diff_types(expected: DataType, actual: DataType, path: str) -> ColumnDiff:
+    """Compare the actual type of a column, including any nested fields, with
+    its expected type.
+
+    The types are compatible if they have the same name, nullable types are
+    not nullable only where allowed and every required struct field is
+    present. Struct fields are matched by name, so their order is ignored.
+
+    Args:
+        expected: The expected type
+        actual:   The type in the backend
+        path:     The path of the column
+
+    Returns:
+        The difference between the types
+    """
+    extra_fields: list[str] = []
+    stricter: list[tuple[DataType, DataType]] = []
+    mismatch = None
+    try:
+        _compare(expected, actual, path, extra_fields, stricter)
+    except _Mismatch as e:
+        mismatch = e.path
+    return ColumnDiff(
+        expected=expected,
+        actual=actual,
+        mismatch=mismatch,
+        extra_fields=tuple(extra_fields),
+        stricter=tuple(stricter),
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def diff_schema(expected: Schema, actual: Schema) -> SchemaDiff:
+    """Compare the schema of a table in the backend with its expected schema
+
+    Args:
+        expected: The expected schema of the table
+        actual:   The schema of the table in the backend
+
+    Returns:
+        The difference between the schemas
+    """
+    return SchemaDiff(
+        expected_paths=schema_paths(expected),
+        actual_paths=schema_paths(actual),
+        columns={
+            name: diff_types(dtype, actual[name], name)
+            for name, dtype in expected.items()
+            if name in actual
+        },
+        excess_columns=tuple(c for c in actual.names if c not in expected),
+    )
@@ -1,11 +1,11 @@
 import datetime
 import importlib
-from dataclasses import asdict
+from dataclasses import fields
 from string import Template
 from typing import List, Optional
 
 import ibis
-from ibis import _
+from ibis import Table, _
 
 from amlaidatatests.config import ConfigSingleton
 from amlaidatatests.schema.base import (
@@ -67,8 +67,9 @@ def resolve_table_config(
     cfg = ConfigSingleton.get()
     name = get_table_name(name)
     # Concert from TableConfig to ResolvedTableConfig
-    # does not have argument name
-    dct = asdict(table_config)
+    # does not have argument name. The fields are not copied, as asdict would,
+    # since configs are immutable
+    dct = {f.name: getattr(table_config, f.name) for f in fields(table_config)}
     del dct["schema"]
     resolved_table_config = ResolvedTableConfig(
         table=ibis.table(
@@ -82,7 +83,9 @@ def resolve_table_config(
 
 
 def get_entity_state_windows(
-    table_config: ResolvedTableConfig, key: List[str] | None = None
+    table_config: ResolvedTableConfig,
+    key: List[str] | None = None,
+    table: Optional[Table] = None,
 ):
     """Generate a table indicating the time periods an entity
     was valid between.
@@ -96,6 +99,9 @@ def get_entity_state_windows(
                 For example, we might want to group by account_id
                 on a transaction table. Setting this value will produce a group
                 by to the transaction level.
+        table: Optional table to compute the windows over, for example the
+                table bound to a connection. Defaults to the table in
+                table_config.
 
     Returns:
         _description_
@@ -111,7 +117,7 @@ def get_entity_state_windows(
     #
     # |party_id|window_id| window_start_time|window_end_time|is_entity_deleted
     # |   1    |    0    |      00:00:00    |     null      |     False
-    table = table_config.table
+    table = table_config.table if table is None else table
 
     key = [] if not key else key
 
@@ -14,28 +14,37 @@ from . import (
 
 class SchemaConfiguration(BaseSchemaConfiguration):
     TABLES = [
-        TableConfig(name="party", schema=party_schema, entity_keys=["party_id"]),
+        TableConfig(
+            name="party",
+            schema=party_schema,
+            entity_keys=["party_id"],
+            partition_column="validity_start_time",
+        ),
         TableConfig(
             name="transaction",
             schema=transaction_schema,
             table_type=TableType.OPEN_ENDED_ENTITY,
             entity_keys=["transaction_id"],
+            partition_column="book_time",
         ),
         TableConfig(
             name="account_party_link",
             schema=account_party_link_schema,
             entity_keys=["account_id", "party_id"],
+            partition_column="validity_start_time",
         ),
         TableConfig(
             name="risk_case_event",
             schema=risk_case_event_schema,
             table_type=TableType.EVENT,
             entity_keys=["risk_case_event_id"],
+            partition_column="event_time",
         ),
         TableConfig(
             name="party_supplementary_data",
             schema=party_supplementary_data_schema,
             optional=True,
             entity_keys=["party_id", "party_supplementary_data_id"],
+            partition_column="validity_start_time",
         ),
     ]
@@ -0,0 +1,785 @@
+"""Synthetic AML AI datasets for scale testing.
+
+Generates data for every table in the configured schema version at a given
+number of transactions, with every other table scaled in proportion. Values
+are generated column by column with NumPy and assembled into Arrow tables
+which conform to the ibis schemas in the schema module, so a dataset can be
+written to Parquet or loaded into any backend ibis can insert into.
+
+A clean dataset is internally consistent: parties join before their accounts
+are linked, transactions are booked while the account is linked, and each
+risk case follows the AML_PROCESS_START, AML_SAR, AML_EXIT, AML_PROCESS_END
+order around transactions of the party. Defects can then be injected into a
+proportion of the rows of a table to make a specific test fail, see
+[DEFECTS].
+
+The transaction table is generated in chunks, so datasets larger than memory
+can be streamed to their destination.
+"""
+
+import datetime
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Mapping, Optional, Sequence
+
+import ibis
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from ibis import BaseBackend
+from ibis.expr.datatypes import DataType
+
+from amlaidatatests.config import cfg
+from amlaidatatests.io import get_valid_region_codes
+from amlaidatatests.schema.base import TableConfig
+from amlaidatatests.schema.utils import get_amlai_schema, get_table_name
+
+logger = logging.getLogger(__name__)
+
+TRANSACTIONS_PER_PARTY = 100
+""" The number of transactions generated for each party """
+RISK_CASES_PER_PARTY = 0.02
+""" The proportion of parties with a risk case """
+SUPPLEMENTARY_DATA_PER_PARTY = 0.3
+""" The proportion of parties with supplementary data """
+SUPPLEMENTARY_DATA_IDS = ["psd_income", "psd_net_worth"]
+
+TRANSACTION_TYPES = ["WIRE", "CASH", "CHECK", "CARD", "OTHER"]
+CIVIL_STATUS_CODES = [
+    "SINGLE",
+    "MARRIED",
+    "LEGALLY_DIVORCED",
+    "DIVORCED",
+    "WIDOW",
+    "STABLE_UNION",
+    "SEPARATED",
+    "UNKNOWN",
+]
+EDUCATION_LEVEL_CODES = [
+    "LESS_THAN_PRIMARY_EDUCATION",
+    "PRIMARY_EDUCATION",
+    "LOWER_SECONDARY_EDUCATION",
+    "UPPER_SECONDARY_EDUCATION",
+    "POST_SECONDARY_NON_TERTIARY_EDUCATION",
+    "SHORT_CYCLE_TERTIARY_EDUCATION",
+    "BACHELORS_OR_EQUIVALENT",
+    "MASTERS_OR_EQUIVALENT",
+    "DOCTORAL_OR_EQUIVALENT",
+    "NOT_ELSEWHERE_CLASSIFIED",
+    "UNKNOWN",
+]
+SOURCE_SYSTEMS = ["CORE_BANKING", "CARDS", "PAYMENTS"]
+CURRENCY_CODE = "USD"
+
+_US_PER_DAY = 86_400_000_000
+_UTC = datetime.timezone.utc
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=_UTC)
+_FUTURE = datetime.datetime(2100, 1, 1, tzinfo=_UTC)
+""" A time after any run of the suite, so after now() """
+
+
+@dataclass
+class SyntheticDataset:
+    """Parameters and shared state of a dataset being generated
+
+    Args:
+        transactions: The number of transactions to generate. The number of
+                      rows in the other tables is derived from it.
+        seed:         Seed for the random number generator. The same seed and
+                      parameters always generate the same dataset.
+        months:       The number of whole months transactions are booked
+                      over, ending at least a month before the reference
+                      date so risk case events are never after it.
+        reference_date: The date the dataset is generated as of. It is fixed
+                      by default, so datasets do not depend on when they are
+                      generated.
+        defects:      The proportion of rows to inject each defect into,
+                      keyed by the id of the test the defect targets.
+                      See [DEFECTS].
+        chunk_size:   The maximum number of transactions generated at once
+    """
+
+    transactions: int
+    seed: int = 0
+    months: int = 24
+    reference_date: datetime.date = datetime.date(2025, 1, 1)
+    defects: Mapping[str, float] = field(default_factory=dict)
+    chunk_size: int = 1_000_000
+
+    def __post_init__(self):
+        unknown = set(self.defects) - set(DEFECTS)
+        if unknown:
+            raise ValueError(
+                f"Unknown defects {sorted(unknown)}. Known defects are "
+                f"{sorted(DEFECTS)}"
+            )
+        self.rng = np.random.default_rng(self.seed)
+        # Transactions are spread evenly over whole months, so the monthly
+        # volume profile is flat
+        latest = self.reference_date - datetime.timedelta(days=31)
+        end = datetime.datetime(latest.year, latest.month, 1, tzinfo=_UTC)
+        month = end.year * 12 + end.month - 1 - self.months
+        start = end.replace(year=month // 12, month=month % 12 + 1)
+        self.start = _to_us(start)
+        """ Start of the transaction period in microseconds since the epoch """
+        self.end = _to_us(end)
+        """ End of the transaction period in microseconds since the epoch """
+        self.parties = max(self.transactions // TRANSACTIONS_PER_PARTY, 10)
+
+
+def _to_us(value: datetime.datetime) -> int:
+    return (value - _EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def _year(year: int) -> int:
+    return _to_us(datetime.datetime(year, 1, 1, tzinfo=_UTC))
+
+
+def _ids(prefix: str, values: np.ndarray) -> pa.Array:
+    """Build string identifiers from a prefix and integers"""
+    return pc.binary_join_element_wise(prefix, pa.array(values).cast(pa.string()), "")
+
+
+def _choice(
+    rng: np.random.Generator,
+    values: Sequence[str],
+    n: int,
+    p: Optional[Sequence[float]] = None,
+) -> pa.Array:
+    return pa.array(values, pa.string()).take(rng.choice(len(values), size=n, p=p))
+
+
+def _timestamps(values: np.ndarray) -> pa.Array:
+    return pa.array(values, pa.timestamp("us", tz="UTC"))
+
+
+def _dates(values: np.ndarray) -> pa.Array:
+    return pa.array((values // _US_PER_DAY).astype(np.int32), pa.date32())
+
+
+def _uniform_times(rng: np.random.Generator, low, high, n: int) -> np.ndarray:
+    """Uniformly distributed timestamps in microseconds between low and
+    high, which may be arrays"""
+    return (low + rng.random(n) * (np.asarray(high) - low)).astype(np.int64)
+
+
+def _currency_values(
+    rng: np.random.Generator, dtype: DataType, n: int, mean: float
+) -> pa.Array:
+    return pa.StructArray.from_arrays(
+        [
+            pa.array(rng.lognormal(np.log(mean), 1.5, n).astype(np.int64)),
+            pa.array(rng.integers(0, 1_000_000_000, n)),
+            pa.array(np.full(n, CURRENCY_CODE)),
+        ],
+        fields=list(dtype.to_pyarrow()),
+    )
+
+
+def _regions(rng: np.random.Generator, dtype: DataType, n: int) -> pa.Array:
+    """A list of one region code for each row"""
+    value_type = dtype.value_type
+    regions = pa.StructArray.from_arrays(
+        [_choice(rng, get_valid_region_codes(), n)],
+        fields=list(value_type.to_pyarrow()),
+    )
+    offsets = pa.array(np.arange(n + 1, dtype=np.int32))
+    return pa.ListArray.from_arrays(offsets, regions, type=dtype.to_pyarrow())
+
+
+def random_values(
+    rng: np.random.Generator, dtype: DataType, n: int, end: int
+) -> pa.Array:
+    """Generate arbitrary values of an ibis data type. Used for any column
+    without a specific generator
+
+    Args:
+        rng:   The random number generator
+        dtype: The type of the values
+        n:     The number of values
+        end:   The latest time generated, in microseconds since the epoch
+
+    Returns:
+        An arrow array of the values
+    """
+    if dtype.is_struct():
+        return pa.StructArray.from_arrays(
+            [random_values(rng, t, n, end) for t in dtype.types],
+            fields=list(dtype.to_pyarrow()),
+        )
+    if dtype.is_array():
+        offsets = pa.array(np.arange(n + 1, dtype=np.int32))
+        values = random_values(rng, dtype.value_type, n, end)
+        return pa.ListArray.from_arrays(offsets, values, type=dtype.to_pyarrow())
+    if dtype.is_string():
+        return _ids("value_", rng.integers(0, max(n, 1), n))
+    if dtype.is_boolean():
+        return pa.array(np.zeros(n, dtype=bool))
+    if dtype.is_timestamp():
+        return _timestamps(rng.integers(0, end, n))
+    if dtype.is_date():
+        return _dates(rng.integers(0, end, n))
+    if dtype.is_numeric():
+        return pa.array(rng.integers(0, 1000, n)).cast(dtype.to_pyarrow())
+    raise TypeError(f"Unable to generate values of type {dtype}")
+
+
+def _assemble(
+    dataset: SyntheticDataset,
+    table_config: TableConfig,
+    n: int,
+    columns: dict[str, pa.Array],
+) -> pa.Table:
+    """Build a table in schema order, generating any column not provided"""
+    schema = table_config.schema
+    arrays = [
+        (
+            columns[name]
+            if name in columns
+            else random_values(dataset.rng, dtype, n, dataset.end)
+        )
+        for name, dtype in schema.items()
+    ]
+    return pa.Table.from_arrays(arrays, schema=schema.to_pyarrow())
+
+
+@dataclass
+class _Parties:
+    ids: pa.Array
+    validity_start_time: np.ndarray
+
+
+@dataclass
+class _Accounts:
+    ids: pa.Array
+    party: np.ndarray
+    """ Index of the party each account is linked to """
+    validity_start_time: np.ndarray
+
+
+def _party(
+    dataset: SyntheticDataset, table_config: TableConfig
+) -> tuple[_Parties, pa.Table]:
+    rng, n = dataset.rng, dataset.parties
+    schema = table_config.schema
+    consumer = rng.random(n) < 0.8
+    # Parties joined within the ten years before the transaction period
+    join_time = _uniform_times(
+        rng, dataset.start - 3650 * _US_PER_DAY, dataset.start - 30 * _US_PER_DAY, n
+    )
+    join_date = join_time - join_time % _US_PER_DAY
+    birth_date = _uniform_times(rng, _year(1930), _year(2000), n)
+    establishment_date = _uniform_times(rng, _year(1950), _year(2010), n)
+    validity_start_time = join_date + rng.integers(0, _US_PER_DAY, n)
+
+    def consumer_only(values: pa.Array) -> pa.Array:
+        return pc.if_else(pa.array(consumer), values, pa.nulls(n, values.type))
+
+    def company_only(values: pa.Array) -> pa.Array:
+        return pc.if_else(pa.array(consumer), pa.nulls(n, values.type), values)
+
+    columns = {
+        "party_id": _ids("party_", np.arange(n)),
+        "validity_start_time": _timestamps(validity_start_time),
+        "is_entity_deleted": pa.array(np.zeros(n, dtype=bool)),
+        "source_system": _choice(rng, SOURCE_SYSTEMS, n),
+        "type": pc.if_else(pa.array(consumer), "CONSUMER", "COMPANY"),
+        "birth_date": consumer_only(_dates(birth_date)),
+        "establishment_date": company_only(_dates(establishment_date)),
+        "occupation": consumer_only(_ids("OCCUPATION_", rng.integers(0, 50, n))),
+        "gender": consumer_only(_choice(rng, ["MALE", "FEMALE"], n)),
+        "nationalities": _regions(rng, schema["nationalities"], n),
+        "residencies": _regions(rng, schema["residencies"], n),
+        "exit_date": pa.nulls(n, pa.date32()),
+        "join_date": _dates(join_date),
+        "assets_value_range": pa.StructArray.from_arrays(
+            [
+                _currency_values(rng, t, n, mean=mean)
+                for t, mean in zip(schema["assets_value_range"].types, [1e4, 1e5])
+            ],
+            fields=list(schema["assets_value_range"].to_pyarrow()),
+        ),
+        "civil_status_code": _choice(rng, CIVIL_STATUS_CODES, n),
+        "education_level_code": _choice(rng, EDUCATION_LEVEL_CODES, n),
+    }
+    return _Parties(columns["party_id"], validity_start_time), _assemble(
+        dataset, table_config, n, columns
+    )
+
+
+def _account_party_link(
+    dataset: SyntheticDataset, table_config: TableConfig, parties: _Parties
+) -> tuple[_Accounts, pa.Table]:
+    rng = dataset.rng
+    counts = 1 + rng.poisson(0.5, dataset.parties)
+    party = np.repeat(np.arange(dataset.parties), counts)
+    n = len(party)
+    # Accounts are linked after the party joins, before any transactions
+    validity_start_time = _uniform_times(
+        rng, parties.validity_start_time[party], dataset.start, n
+    )
+    columns = {
+        "account_id": _ids("account_", np.arange(n)),
+        "party_id": parties.ids.take(party),
+        "validity_start_time": _timestamps(validity_start_time),
+        "is_entity_deleted": pa.array(np.zeros(n, dtype=bool)),
+        "role": _choice(rng, ["PRIMARY_HOLDER", "SECONDARY_HOLDER"], n, p=[0.9, 0.1]),
+        "source_system": _choice(rng, SOURCE_SYSTEMS, n),
+    }
+    return _Accounts(columns["account_id"], party, validity_start_time), _assemble(
+        dataset, table_config, n, columns
+    )
+
+
+def _transactions(
+    dataset: SyntheticDataset,
+    table_config: TableConfig,
+    accounts: _Accounts,
+    book_time: np.ndarray,
+    account: np.ndarray,
+    ids: pa.Array,
+) -> pa.Table:
+    rng, n = dataset.rng, len(book_time)
+    schema = table_config.schema
+    columns = {
+        "transaction_id": ids,
+        "validity_start_time": _timestamps(
+            book_time + rng.integers(1, 3_600_000_000, n)
+        ),
+        "is_entity_deleted": pa.array(np.zeros(n, dtype=bool)),
+        "source_system": _choice(rng, SOURCE_SYSTEMS, n),
+        "type": _choice(rng, TRANSACTION_TYPES, n, p=[0.3, 0.1, 0.1, 0.45, 0.05]),
+        "direction": _choice(rng, ["DEBIT", "CREDIT"], n),
+        "account_id": accounts.ids.take(account),
+        "counterparty_account": pa.StructArray.from_arrays(
+            [
+                _ids("counterparty_", rng.integers(0, max(n, 1), n)),
+                _choice(rng, get_valid_region_codes(), n),
+            ],
+            fields=list(schema["counterparty_account"].to_pyarrow()),
+        ),
+        "book_time": _timestamps(book_time),
+        "normalized_booked_amount": _currency_values(
+            rng, schema["normalized_booked_amount"], n, mean=100
+        ),
+    }
+    return _assemble(dataset, table_config, n, columns)
+
+
+def _risk_cases(
+    dataset: SyntheticDataset, accounts: _Accounts
+) -> tuple[np.ndarray, np.ndarray]:
+    """Choose the parties with risk cases, and a time and account around
+    which each case is built. A transaction is generated for each case so
+    every case has transactions in its suspicious period"""
+    rng = dataset.rng
+    n = max(int(dataset.parties * RISK_CASES_PER_PARTY), 1)
+    # The first account of each party
+    first_account = np.unique(accounts.party, return_index=True)[1]
+    party = rng.choice(dataset.parties, size=n, replace=False)
+    account = first_account[party]
+    anchor = _uniform_times(
+        rng, dataset.start + 2 * _US_PER_DAY, dataset.end - 2 * _US_PER_DAY, n
+    )
+    return account, anchor
+
+
+def _risk_case_event(
+    dataset: SyntheticDataset,
+    table_config: TableConfig,
+    accounts: _Accounts,
+    parties: _Parties,
+    case_account: np.ndarray,
+    anchor: np.ndarray,
+) -> pa.Table:
+    rng = dataset.rng
+    cases = np.arange(len(anchor))
+    # Offsets in days from the transaction each case is built around, and
+    # which cases have each event. Every event type is present at least
+    # once, in case 0
+    events = [
+        ("AML_SUSPICIOUS_ACTIVITY_START", -1, cases % 10 < 7),
+        ("AML_SUSPICIOUS_ACTIVITY_END", 1, cases % 10 < 7),
+        ("AML_PROCESS_START", 7, np.ones(len(cases), dtype=bool)),
+        ("AML_ALERT_LEGACY", 8, cases % 4 == 0),
+        ("AML_SAR", 14, cases % 2 == 0),
+        ("AML_EXIT", 21, cases % 3 == 0),
+        ("AML_PROCESS_END", 30, np.ones(len(cases), dtype=bool)),
+    ]
+    case = np.concatenate([cases[present] for _, _, present in events])
+    event_type = np.concatenate(
+        [np.full(present.sum(), name, dtype=object) for name, _, present in events]
+    )
+    event_time = np.concatenate(
+        [anchor[present] + days * _US_PER_DAY for _, days, present in events]
+    ) + rng.integers(0, 3_600_000_000, len(case))
+    n = len(case)
+    columns = {
+        "risk_case_event_id": _ids("risk_case_event_", np.arange(n)),
+        "event_time": _timestamps(event_time),
+        "type": pa.array(event_type, pa.string()),
+        "party_id": parties.ids.take(accounts.party[case_account[case]]),
+        "risk_case_id": _ids("risk_case_", case),
+    }
+    return _assemble(dataset, table_config, n, columns)
+
+
+def _party_supplementary_data(
+    dataset: SyntheticDataset, table_config: TableConfig, parties: _Parties
+) -> pa.Table:
+    rng = dataset.rng
+    with_data = np.flatnonzero(
+        rng.random(dataset.parties) < SUPPLEMENTARY_DATA_PER_PARTY
+    )
+    # Every party has the same set of supplementary data ids
+    party = np.repeat(with_data, len(SUPPLEMENTARY_DATA_IDS))
+    n = len(party)
+    schema = table_config.schema
+    columns = {
+        "party_supplementary_data_id": pa.array(
+            np.tile(SUPPLEMENTARY_DATA_IDS, len(with_data)), pa.string()
+        ),
+        "validity_start_time": _timestamps(
+            _uniform_times(rng, parties.validity_start_time[party], dataset.end, n)
+        ),
+        "is_entity_deleted": pa.array(np.zeros(n, dtype=bool)),
+        "source_system": _choice(rng, SOURCE_SYSTEMS, n),
+        "party_id": parties.ids.take(party),
+        "supplementary_data_payload": pa.StructArray.from_arrays(
+            [pa.array(rng.normal(size=n))],
+            fields=list(schema["supplementary_data_payload"].to_pyarrow()),
+        ),
+    }
+    return _assemble(dataset, table_config, n, columns)
+
+
+def generate(dataset: SyntheticDataset) -> Iterator[tuple[str, pa.Table]]:
+    """Generate the tables of a synthetic dataset
+
+    Args:
+        dataset: The parameters of the dataset
+
+    Yields:
+        Tuples of the unqualified table name and a chunk of its rows. Every
+        table is yielded at least once, even if it is empty.
+    """
+    schema = get_amlai_schema(cfg().schema_version)
+    inject = _defect_injector(dataset)
+
+    parties, party = _party(dataset, schema["party"])
+    yield "party", inject("party", party)
+    accounts, account_party_link = _account_party_link(
+        dataset, schema["account_party_link"], parties
+    )
+    yield "account_party_link", inject("account_party_link", account_party_link)
+
+    case_account, anchor = _risk_cases(dataset, accounts)
+    yield "risk_case_event", inject(
+        "risk_case_event",
+        _risk_case_event(
+            dataset,
+            schema["risk_case_event"],
+            accounts,
+            parties,
+            case_account,
+            anchor,
+        ),
+    )
+    yield "party_supplementary_data", inject(
+        "party_supplementary_data",
+        _party_supplementary_data(dataset, schema["party_supplementary_data"], parties),
+    )
+
+    transaction_config = schema["transaction"]
+    yield "transaction", inject(
+        "transaction",
+        _transactions(
+            dataset,
+            transaction_config,
+            accounts,
+            book_time=anchor,
+            account=case_account,
+            ids=_ids("transaction_case_", np.arange(len(anchor))),
+        ),
+    )
+    n_accounts = len(accounts.party)
+    for offset in range(0, dataset.transactions, dataset.chunk_size):
+        n = min(dataset.chunk_size, dataset.transactions - offset)
+        logger.debug("Generating transactions %s to %s", offset, offset + n)
+        yield "transaction", inject(
+            "transaction",
+            _transactions(
+                dataset,
+                transaction_config,
+                accounts,
+                book_time=_uniform_times(dataset.rng, dataset.start, dataset.end, n),
+                account=dataset.rng.integers(0, n_accounts, n),
+                ids=_ids("transaction_", np.arange(offset, offset + n)),
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class Defect:
+    """A defect which can be injected into a table
+
+    Args:
+        table:       The unqualified name of the table
+        column:      The dot delimited path of the column to corrupt, or None
+                     to duplicate the selected rows
+        corrupt:     Returns the corrupted values of the column for the
+                     selected rows
+        where:       Optionally restricts the rows which can be selected
+    """
+
+    table: str
+    column: Optional[str]
+    corrupt: Optional[Callable[[pa.Array, SyntheticDataset], pa.Array]] = None
+    where: Optional[Callable[[pa.Table], pa.Array]] = None
+
+
+def _constant(value, dtype: Optional[pa.DataType] = None):
+    return lambda values, dataset: pa.array([value] * len(values), dtype or values.type)
+
+
+def _shift(days: float):
+    def shift(values: pa.Array, dataset: SyntheticDataset) -> pa.Array:
+        delta = pa.scalar(datetime.timedelta(days=days))
+        if pa.types.is_date(values.type):
+            shifted = pc.add(pc.cast(values, pa.timestamp("us")), delta)
+            return pc.cast(shifted, values.type)
+        return pc.add(values, delta)
+
+    return shift
+
+
+def _future(values: pa.Array, dataset: SyntheticDataset) -> pa.Array:
+    future = _FUTURE
+    if pa.types.is_date(values.type):
+        future = future.date()
+    return pa.array([future] * len(values), values.type)
+
+
+def _period_end(values: pa.Array, dataset: SyntheticDataset) -> pa.Array:
+    """The end of the transaction period, which is after every party joined
+    but not in the future"""
+    return pc.cast(_dates(np.full(len(values), dataset.end)), values.type)
+
+
+def _on_the_hour(values: pa.Array, dataset: SyntheticDataset) -> pa.Array:
+    """Round timestamps down to the hour, as if dates were converted to
+    timestamps in the wrong time zone"""
+    return pc.floor_temporal(values, unit="hour")
+
+
+def _empty_list(values: pa.Array, dataset: SyntheticDataset) -> pa.Array:
+    return pa.array([[]] * len(values), values.type)
+
+
+def _consumers(table: pa.Table) -> pa.Array:
+    return pc.equal(table["type"], "CONSUMER")
+
+
+def _companies(table: pa.Table) -> pa.Array:
+    return pc.equal(table["type"], "COMPANY")
+
+
+DEFECTS: dict[str, Defect] = {
+    "PK001": Defect("party", None),
+    "PK002": Defect("account_party_link", None),
+    "PK003": Defect("transaction", None),
+    "PK004": Defect("risk_case_event", None),
+    "PK005": Defect("party_supplementary_data", None),
+    "C001": Defect(
+        "transaction",
+        "normalized_booked_amount.currency_code",
+        lambda values, dataset: pa.nulls(len(values), pa.string()),
+    ),
+    "C002": Defect("risk_case_event", "risk_case_id", _constant("   ")),
+    "E001": Defect("party", "type", _constant("TRUST")),
+    "E002": Defect("party", "civil_status_code", _constant("ENGAGED")),
+    "E003": Defect("party", "education_level_code", _constant("KINDERGARTEN")),
+    "E004": Defect("account_party_link", "role", _constant("OWNER")),
+    "E005": Defect("transaction", "type", _constant("BARTER")),
+    "E006": Defect("transaction", "direction", _constant("SIDEWAYS")),
+    "E007": Defect("risk_case_event", "type", _constant("AML_UNKNOWN")),
+    "FMT001": Defect(
+        "transaction", "normalized_booked_amount.currency_code", _constant("ZZZ")
+    ),
+    "FMT003": Defect("party", "residencies.region_code", _constant("ZZ")),
+    "FMT004": Defect("party", "nationalities.region_code", _constant("ZZ")),
+    "FMT006": Defect(
+        "transaction", "counterparty_account.region_code", _constant("ZZ")
+    ),
+    "P006": Defect("party", "nationalities", _empty_list, where=_consumers),
+    "P008": Defect("party", "residencies", _empty_list, where=_consumers),
+    "P049": Defect("transaction", "is_entity_deleted", _constant(True)),
+    "P052": Defect("transaction", "book_time", _on_the_hour),
+    "V005": Defect("party", "assets_value_range.start_amount.nanos", _constant(-1)),
+    "V006": Defect("party", "assets_value_range.end_amount.units", _constant(-1)),
+    "V008": Defect(
+        "party",
+        "birth_date",
+        _constant(datetime.date(1980, 1, 1), pa.date32()),
+        where=_companies,
+    ),
+    "V009": Defect(
+        "party",
+        "establishment_date",
+        _constant(datetime.date(1980, 1, 1), pa.date32()),
+        where=_consumers,
+    ),
+    "V010": Defect("party", "occupation", _constant("OCCUPATION_0"), where=_companies),
+    "V011": Defect("party", "gender", _constant("MALE"), where=_companies),
+    "V015": Defect(
+        "transaction", "normalized_booked_amount.nanos", _constant(2_000_000_000)
+    ),
+    "V016": Defect(
+        "transaction", "normalized_booked_amount.units", _constant(-1, pa.int64())
+    ),
+    "DT001": Defect("transaction", "validity_start_time", _future),
+    "DT002": Defect("party", "birth_date", _future, where=_consumers),
+    "DT003": Defect("party", "establishment_date", _future, where=_companies),
+    "DT004": Defect("party", "exit_date", _future),
+    "DT005": Defect("party", "join_date", _future),
+    "DT008": Defect("transaction", "book_time", _future),
+    "DT011": Defect("risk_case_event", "event_time", _future),
+    "DT012": Defect("party", "establishment_date", _period_end, where=_companies),
+    "DT013": Defect("party", "birth_date", _period_end, where=_consumers),
+    "DT014": Defect(
+        "risk_case_event",
+        "event_time",
+        _shift(-30),
+        where=lambda t: pc.equal(t["type"], "AML_SAR"),
+    ),
+    "DT017": Defect("party", "join_date", _shift(30)),
+    "DT018": Defect(
+        "party", "exit_date", _constant(datetime.date(1950, 1, 1), pa.date32())
+    ),
+    "RI001": Defect("account_party_link", "party_id", _constant("party_missing")),
+    "RI004": Defect("transaction", "account_id", _constant("account_missing")),
+    "RI011": Defect("transaction", "book_time", _shift(-7300)),
+}
+""" Defects which can be injected into a dataset, keyed by the id of the test
+each defect targets. There is a defect for every row level test. A defect may
+also fail tests which compare the corrupted column with others, for example
+a future join_date (DT005) is also after validity_start_time (DT017) """
+
+
+def _leaf(column: pa.Array, path: list[str]) -> pa.Array:
+    """The values of a possibly nested field. The values of arrays are
+    flattened, so there may be more values than rows"""
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    if not path:
+        return column
+    if pa.types.is_list(column.type):
+        return _leaf(column.values, path)
+    return _leaf(pc.struct_field(column, path[0]), path[1:])
+
+
+def _replace(column: pa.Array, path: list[str], mask: pa.Array, values) -> pa.Array:
+    """Replace the values of a possibly nested field where mask is true. The
+    values of arrays are replaced in every element of the selected rows"""
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    if not path:
+        return pc.if_else(mask, values, column)
+    if pa.types.is_list(column.type):
+        lengths = pc.fill_null(pc.list_value_length(column), 0).to_numpy()
+        element_mask = np.repeat(mask.to_numpy(zero_copy_only=False), lengths)
+        return pa.ListArray.from_arrays(
+            column.offsets,
+            _replace(column.values, path, pa.array(element_mask), values),
+            type=column.type,
+            mask=column.is_null(),
+        )
+    children = [
+        (
+            _replace(column.field(i), path[1:], mask, values)
+            if f.name == path[0]
+            else column.field(i)
+        )
+        for i, f in enumerate(column.type)
+    ]
+    return pa.StructArray.from_arrays(
+        children, fields=list(column.type), mask=column.is_null()
+    )
+
+
+def _defect_injector(dataset: SyntheticDataset) -> Callable[[str, pa.Table], pa.Table]:
+    """Build a function which injects the configured defects into a chunk of
+    a table"""
+
+    def inject(table_name: str, table: pa.Table) -> pa.Table:
+        for test_id, proportion in sorted(dataset.defects.items()):
+            defect = DEFECTS[test_id]
+            if defect.table != table_name or not len(table):
+                continue
+            mask = dataset.rng.random(len(table)) < proportion
+            if defect.where is not None:
+                mask &= defect.where(table).to_numpy(zero_copy_only=False)
+            if defect.column is None:
+                table = pa.concat_tables([table, table.filter(pa.array(mask))])
+                continue
+            name, *path = defect.column.split(".")
+            column = table[name]
+            values = defect.corrupt(_leaf(column, path), dataset)
+            table = table.set_column(
+                table.schema.get_field_index(name),
+                table.schema.field(name),
+                _replace(column, path, pa.array(mask), values),
+            )
+        return table
+
+    return inject
+
+
+def write_parquet(dataset: SyntheticDataset, directory: Path) -> dict[str, Path]:
+    """Write a synthetic dataset to a directory of Parquet files, one per
+    table
+
+    Args:
+        dataset:   The parameters of the dataset
+        directory: The directory to write to, which is created if necessary
+
+    Returns:
+        The path of the file written for each table
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    writers: dict[str, pq.ParquetWriter] = {}
+    try:
+        for name, table in generate(dataset):
+            if name not in writers:
+                writers[name] = pq.ParquetWriter(
+                    directory / f"{name}.parquet", table.schema
+                )
+            writers[name].write_table(table)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return {name: directory / f"{name}.parquet" for name in writers}
+
+
+def write_to_connection(dataset: SyntheticDataset, connection: BaseBackend) -> None:
+    """Write a synthetic dataset to tables in a backend, named as the tests
+    expect from the table_name_template and id options. Existing tables are
+    replaced.
+
+    Args:
+        dataset:    The parameters of the dataset
+        connection: The ibis connection to write to
+    """
+    schema = get_amlai_schema(cfg().schema_version)
+    created = set()
+    for name, table in generate(dataset):
+        table_name = get_table_name(name)
+        if name not in created:
+            connection.create_table(
+                table_name, schema=schema[name].schema, overwrite=True
+            )
+            created.add(name)
+        connection.insert(table_name, obj=ibis.memtable(table))
@@ -0,0 +1,149 @@
+"""Base statistics of each table, computed once per session.
+
+Several tests only need simple statistics of a table: the number of rows
+(T001), the number of distinct primary keys (PK001-PK005) and the number of
+null values in each required column (C001). When the share_table_stats option
+is set, rather than each test scanning the table again, the first test to need
+them computes all of the statistics of the table in a single aggregate query
+and the remaining tests read them from the [TableStatsCache]. Counting
+distinct keys is the most expensive of the aggregates, so this is only worth
+it when most of these tests are run.
+
+Statistics are keyed by the relation the tests run against, so sampled tables
+and the rows added since the last incremental run have their own statistics.
+They are not shared in estimate mode, where the cost of each test's own query
+is reported, or when sql is logged, so the sql of every test is written.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Hashable, Optional
+
+import ibis
+from ibis import BaseBackend, Expr, Table
+
+from amlaidatatests.config import cfg
+from amlaidatatests.schema.base import ResolvedTableConfig
+from amlaidatatests.singleton import Singleton
+
+KEY_SEPARATOR = "\x1f"
+""" Separates the values of a compound primary key when counting distinct keys """
+KEY_NULL = "\x1e"
+""" Replaces null values of a primary key when counting distinct keys """
+
+
+@dataclass
+class TableStats:
+    """Base statistics of a table"""
+
+    row_count: int
+    """ The number of rows in the table """
+    primary_key: Optional[tuple[str, ...]]
+    """ The primary key columns, or None if any are missing from the table """
+    distinct_keys: Optional[int]
+    """ The number of distinct primary keys, if the primary key exists """
+    null_counts: dict[str, int]
+    """ The number of null values in each required top level column """
+
+
+def _distinct_keys(table: Table, columns: tuple[str, ...]) -> Expr:
+    # BigQuery cannot count distinct structs, so keys are counted as strings.
+    # Nulls are replaced so, as in a distinct count of rows, a null key is
+    # counted as a value
+    return (
+        ibis.literal(KEY_SEPARATOR)
+        .join([table[c].cast("string").fill_null(KEY_NULL) for c in columns])
+        .nunique()
+    )
+
+
+def _null_count_columns(table: Table, table_config: ResolvedTableConfig) -> list[str]:
+    """Required top level columns of the table, excluding arrays, which are
+    unnested before their values are tested"""
+    return [
+        name
+        for name, dtype in table_config.schema.items()
+        if not dtype.nullable
+        and name in table.columns
+        and not table.schema()[name].is_array()
+    ]
+
+
+def table_stats_query(table: Table, table_config: ResolvedTableConfig) -> Table:
+    """Build the query computing the base statistics of a table
+
+    Args:
+        table:        The relation to compute statistics of
+        table_config: The config of the table the relation is built from
+
+    Returns:
+        A single row table with a row_count column, a distinct_keys column if
+        the primary key exists and a null_<column> column per required column
+    """
+    aggregates = {"row_count": table.count()}
+    primary_key = tuple(table_config.primary_key)
+    if primary_key and all(c in table.columns for c in primary_key):
+        aggregates["distinct_keys"] = _distinct_keys(table, primary_key)
+    for column in _null_count_columns(table, table_config):
+        aggregates[f"null_{column}"] = table.count(where=table[column].isnull())
+    return table.agg(**aggregates)
+
+
+class _Entry:
+    def __init__(self) -> None:
+        self.stats: Optional[TableStats] = None
+        self.lock = threading.Lock()
+
+
+class TableStatsCache(metaclass=Singleton):
+    """Session-wide cache of the base statistics of each table"""
+
+    def __init__(self) -> None:
+        self.entries: dict[Hashable, _Entry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def enabled() -> bool:
+        config = cfg()
+        return config.share_table_stats and not (config.estimate or config.log_sql_path)
+
+    def get(
+        self,
+        connection: BaseBackend,
+        table: Table,
+        table_config: ResolvedTableConfig,
+    ) -> TableStats:
+        """Get the statistics of a relation, computing them if this is the
+        first request for the relation this session
+
+        Args:
+            connection:   The ibis connection to execute against
+            table:        The relation to compute statistics of
+            table_config: The config of the table the relation is built from
+
+        Returns:
+            The statistics of the relation
+        """
+        key = (table.op(), table_config.resolved_name)
+        with self._lock:
+            entry = self.entries.setdefault(key, _Entry())
+        # Tests may be run concurrently, so only one computes the statistics.
+        # If the query fails, the next test to request them tries again
+        with entry.lock:
+            if entry.stats is None:
+                row = connection.execute(table_stats_query(table, table_config))
+                row = row.iloc[0]
+                has_keys = "distinct_keys" in row.index
+                entry.stats = TableStats(
+                    row_count=int(row["row_count"]),
+                    primary_key=(tuple(table_config.primary_key) if has_keys else None),
+                    distinct_keys=int(row["distinct_keys"]) if has_keys else None,
+                    null_counts={
+                        c: int(row[f"null_{c}"])
+                        for c in _null_count_columns(table, table_config)
+                    },
+                )
+            return entry.stats
+
+    def clear(self) -> None:
+        self.entries = {}
@@ -113,7 +113,7 @@ def get_entity_mutation_tests(
             column="validity_start_time",
             table_config=table_config,
             max_number=500,
-            group_by=table_config.entity_keys,
+            group_by=list(table_config.entity_keys),
             severity=AMLAITestSeverity.WARN,
             test_id="P057",
         ),
@@ -121,18 +121,18 @@ def get_entity_mutation_tests(
             column="validity_start_time",
             table_config=table_config,
             max_number=10000,
-            group_by=table_config.entity_keys,
+            group_by=list(table_config.entity_keys),
             severity=AMLAITestSeverity.WARN,
             test_id="P058",
         ),
         ConsecutiveEntityDeletionsTest(
             table_config=table_config,
-            entity_ids=table_config.entity_keys,
+            entity_ids=list(table_config.entity_keys),
             test_id="F002",
         ),
         OrphanDeletionsTest(
             table_config=table_config,
-            entity_ids=table_config.entity_keys,
+            entity_ids=list(table_config.entity_keys),
             test_id="F005",
         ),
         CountMatchingRows(
@@ -362,6 +362,7 @@ def get_generic_table_tests(
             CountMatchingRows(
                 table_config=table_config,
                 column="validity_start_time",
+                max_number=0,
                 expression=lambda t: t.validity_start_time > ibis.now(),
                 test_id="DT001",
             ),
@@ -5,23 +5,31 @@ import functools
 import itertools
 import warnings
 from functools import reduce
-from typing import Any, Callable, List, Literal, Optional, cast
+from typing import Any, Callable, List, Literal, Optional, Sequence
 
 import ibis
 import pytest
 from ibis import BaseBackend, Expr, Table, _
-from ibis.common.exceptions import IbisTypeError
-from ibis.expr.datatypes import Array, DataType, Struct
-
-from amlaidatatests.base import AbstractColumnTest, AbstractTableTest, resolve_field
+from ibis.expr.datatypes import DataType
+
+from amlaidatatests.base import (
+    APPROXIMATE_COUNT_ERROR,
+    AbstractColumnTest,
+    AbstractTableTest,
+    interval_window,
+    resolve_field,
+)
+from amlaidatatests.cache import LookupTableCache
 from amlaidatatests.config import cfg
 from amlaidatatests.exceptions import (
     AMLAITestSeverity,
     DataTestFailure,
+    DataTestInconclusive,
     DataTestWarning,
 )
 from amlaidatatests.schema.base import ResolvedTableConfig, TableType
-from amlaidatatests.schema.utils import get_entity_state_windows, resolve_table_config
+from amlaidatatests.schema.diff import ColumnDiff, diff_types
+from amlaidatatests.schema.utils import resolve_table_config
 from amlaidatatests.tests import common
 
 
@@ -38,6 +46,9 @@ class TableExcessColumnsTest(AbstractTableTest):
         test_id:        A unique identifier for the test
     """
 
+    # Only inspects the schema, so there is no query to run ahead of time
+    pooled = False
+
     def __init__(
         self,
         table_config: ResolvedTableConfig,
@@ -50,13 +61,11 @@ class TableExcessColumnsTest(AbstractTableTest):
         if cfg().dry_run:
             pytest.skip("Refusing to run a schema test during a dry run")
 
-        actual_columns = set(self.table.columns)
-        schema_columns = set(self.table_config.table.columns)
-        excess_columns = actual_columns.difference(schema_columns)
+        excess_columns = self.get_schema_diff(connection).excess_columns
         if len(excess_columns) > 0:
             raise DataTestWarning(
                 f"{len(excess_columns)} unexpected columns found in table"
-                f" {self.table.get_name()}"
+                f" {self.table_config.table.get_name()}"
             )
         # Schema table
 
@@ -76,6 +85,9 @@ class TableCountTest(AbstractTableTest):
                         are more rows than this in the overall table
     """
 
+    # Counts every row of the table
+    sample_safe = False
+
     def __init__(
         self,
         table_config: ResolvedTableConfig,
@@ -87,19 +99,30 @@ class TableCountTest(AbstractTableTest):
         super().__init__(table_config, severity, test_id=test_id)
 
     def _test(self, *, connection: BaseBackend):
-        count = connection.execute(self.table.count())
+        # When an interval is set, other tests share statistics of the
+        # interval rather than the whole table, and counting the whole table
+        # alone is cheaper
+        if (
+            interval_window() is None
+            and (stats := self._table_stats(connection)) is not None
+        ):
+            count = stats.row_count
+        else:
+            count = connection.execute(self.table.count())
         if count == 0:
-            raise DataTestFailure(f"Table {self.table.get_name()} is empty")
+            raise DataTestFailure(
+                f"Table {self.table_config.table.get_name()} is empty"
+            )
         if count > self.max_rows:
             raise DataTestFailure(
-                f"Table {self.table.get_name()} has more rows "
+                f"Table {self.table_config.table.get_name()} has more rows "
                 f"than seems feasible: {count} vs maximum {self.max_rows}. "
                 "To stop this error triggering, review "
                 "the data provided or increase the scale setting"
             )
         if count > (self.max_rows) * 0.9:
             raise DataTestWarning(
-                f"Table {self.table.get_name()} is close to "
+                f"Table {self.table_config.table.get_name()} is close to "
                 f"the feasibility ceiling: {count} vs maximum {self.max_rows}. "
                 "To stop this error triggering, review "
                 "the data provided or increase the scale setting"
@@ -118,6 +141,9 @@ class PrimaryKeyColumnsTest(AbstractTableTest):
         column:         The column being tested
     """
 
+    # Duplicate keys are unlikely to both be sampled
+    sample_safe = False
+
     def __init__(
         self,
         *,
@@ -137,14 +163,28 @@ class PrimaryKeyColumnsTest(AbstractTableTest):
             resolve_field(self.table_config.table, col)
         self.unique_combination_of_columns = unique_combination_of_columns
 
+    @property
+    def window_safe(self) -> bool:
+        # Duplicate keys share a partition, so fall in the same interval, only
+        # if the partition column is part of the key
+        return self.table_config.partition_column in self.unique_combination_of_columns
+
     def _test(self, *, connection: BaseBackend) -> None:
-        # TODO: Make into a single call rather than two
-        expr = self.table[self.unique_combination_of_columns].agg(
-            unique_rows=_.nunique(), count=_.count()
-        )
-        result = connection.execute(expr).loc[0]
-        n_pairs = result["unique_rows"]
-        n_total = result["count"]
+        stats = self._table_stats(connection)
+        if (
+            stats is not None
+            and stats.primary_key is not None
+            and set(stats.primary_key) == set(self.unique_combination_of_columns)
+        ):
+            n_pairs = stats.distinct_keys
+            n_total = stats.row_count
+        else:
+            expr = self.table[self.unique_combination_of_columns].agg(
+                unique_rows=_.nunique(), count=_.count()
+            )
+            result = connection.execute(expr).loc[0]
+            n_pairs = result["unique_rows"]
+            n_total = result["count"]
         if n_pairs != n_total:
             raise DataTestFailure(f"Found {n_total - n_pairs} duplicate values")
 
@@ -208,6 +248,12 @@ class ColumnCardinalityTest(AbstractColumnTest):
         self.having = having
         self.keep_nulls = keep_nulls
 
+    @property
+    def sample_safe(self) -> bool:
+        # A sample has fewer distinct values than the table, so the minimum
+        # cannot be checked
+        return self.min_number is None
+
     def _test(self, *, connection: BaseBackend) -> None:
         # References to validity_start_time are unnecessary, but they do ensure
         # that the column is present on the table
@@ -234,19 +280,39 @@ class ColumnCardinalityTest(AbstractColumnTest):
         if self.where is not None:
             table = table.filter(self.where)
         if grp_columns:
-            expr = table.group_by(grp_columns).agg(value_cnt=column.nunique())
+            expr = table.group_by(grp_columns).agg(value_cnt=self._nunique(column))
         else:
-            expr = table.agg(value_cnt=column.nunique())
+            expr = table.agg(value_cnt=self._nunique(column))
 
-        expr = expr.filter(
-            (expr.value_cnt > self.max_number if self.max_number else False)
-            | (expr.value_cnt < self.min_number if self.min_number else False)
-        )
+        def breached(value_cnt: Expr, margin: float = 0) -> Expr:
+            return (
+                value_cnt > self.max_number * (1 + margin) if self.max_number else False
+            ) | (
+                value_cnt < self.min_number * (1 - margin) if self.min_number else False
+            )
+
+        # Approximate counts within the error margin of a threshold may be
+        # on either side of it
+        margin = APPROXIMATE_COUNT_ERROR if self.approximate else 0
+        expr = expr.filter(breached(expr.value_cnt, -margin))
 
         if self.having is not None:
             expr = expr.filter(self.having)
 
-        results = connection.execute(expr.count())
+        if self.approximate:
+            certain = breached(expr.value_cnt, margin)
+            counts = connection.execute(
+                expr.agg(total=expr.count(), certain=expr.count(where=certain))
+            ).iloc[0]
+            if counts["total"] > 0 and counts["certain"] == 0:
+                raise DataTestInconclusive(
+                    f"{counts['total']} approximate distinct counts were within "
+                    f"{APPROXIMATE_COUNT_ERROR:.0%} of the threshold"
+                )
+            expr = expr.filter(certain)
+            results = counts["certain"]
+        else:
+            results = connection.execute(expr.count())
 
         if results > 0:
             direction = "high" if self.max_number else "low"
@@ -321,6 +387,11 @@ class CountFrequencyValues(AbstractColumnTest):
         self.group_by = group_by if group_by else []
         self.keep_nulls = keep_nulls
 
+    @property
+    def window_safe(self) -> bool:
+        # Frequency thresholds are calibrated on the whole table
+        return False
+
     def _test(self, *, connection: BaseBackend) -> None:
         table = self.table
         if self.table_config.table_type in (
@@ -430,6 +501,12 @@ class VerifyTypedValuePresence(AbstractColumnTest):
         self.where = compare_group_by_where
         self.keep_nulls = keep_nulls
 
+    @property
+    def window_safe(self) -> bool:
+        # Proportion thresholds are calibrated on the whole table, and a
+        # value may be absent from a short interval
+        return False
+
     def _test(self, *, connection: BaseBackend) -> None:
         table = self.table
         if self.table_config.table_type in (
@@ -452,8 +529,8 @@ class VerifyTypedValuePresence(AbstractColumnTest):
                 concat=reduce(lambda x, y: x + y, [i + _[i] for i in self.group_by], "")
             )
             .agg(
-                value_cnt=_["concat"].nunique(column == self.value),
-                group_count=_["concat"].nunique(**where_group_kwargs),
+                value_cnt=self._nunique(_["concat"], where=column == self.value),
+                group_count=self._nunique(_["concat"], **where_group_kwargs),
             )
             .mutate(proportion=_.value_cnt / _.group_count)
         )
@@ -465,15 +542,30 @@ class VerifyTypedValuePresence(AbstractColumnTest):
             group_by_narrative = f"unique {self.group_by[0]}"
         else:
             group_by_narrative = f"unique combinations of {self.group_by}"
-        if self.max_proportion and results["proportion"] >= self.max_proportion:
+        # The proportion is the ratio of two approximate counts, so its
+        # error margin is twice that of each count. Proportions within the
+        # margin of a threshold may be on either side of it
+        margin = 2 * APPROXIMATE_COUNT_ERROR if self.approximate else 0
+        if self.max_proportion and proportion >= self.max_proportion * (1 - margin):
+            if proportion < self.max_proportion * (1 + margin):
+                raise DataTestInconclusive(
+                    f"approximately {proportion:.0%} of {group_by_narrative} "
+                    f"had values of {self.value} in column, within the error "
+                    f"margin of the maximum {self.max_proportion:.0%}"
+                )
             raise DataTestFailure(
                 message=f"{proportion:.0%} of {group_by_narrative} "
                 f"had values of {self.value} in column. "
                 f"Expected at most {self.max_proportion:.0%}",
                 expr=expr,
             )
-        if self.min_proportion and results["proportion"] <= self.min_proportion:
-            proportion = results["proportion"]
+        if self.min_proportion and proportion <= self.min_proportion * (1 + margin):
+            if proportion > self.min_proportion * (1 - margin):
+                raise DataTestInconclusive(
+                    f"approximately {proportion:.0%} of {group_by_narrative} "
+                    f"had values of {self.value} in column, within the error "
+                    f"margin of the minimum {self.min_proportion:.0%}"
+                )
             raise DataTestFailure(
                 message=f"Only {proportion:.0%} of {group_by_narrative} "
                 f"had values of {self.value} in column. "
@@ -483,6 +575,9 @@ class VerifyTypedValuePresence(AbstractColumnTest):
 
 
 class VerifyEntitySubset(AbstractColumnTest):
+    # Compares rows of the same entity with each other
+    sample_safe = False
+
     def __init__(
         self,
         *,
@@ -567,6 +662,9 @@ class ConsecutiveEntityDeletionsTest(AbstractTableTest):
         test_id:        A unique identifier for the test
     """
 
+    # Compares consecutive versions of each entity
+    sample_safe = False
+
     def __init__(
         self, *, table_config: ResolvedTableConfig, entity_ids: List[str], test_id: str
     ) -> None:
@@ -604,6 +702,9 @@ class OrphanDeletionsTest(AbstractTableTest):
         column:         The column being tested
     """
 
+    # Compares consecutive versions of each entity
+    sample_safe = False
+
     def __init__(
         self,
         *,
@@ -656,13 +757,13 @@ class ColumnPresenceTest(AbstractColumnTest):
         column:         The column being tested
     """
 
+    pooled = False
+
     def _test(self, *, connection: BaseBackend):
         if cfg().dry_run:
             pytest.skip("Refusing to run a schema test during a dry run")
-        try:
-            self.table[self.column]
-        except IbisTypeError as e:
-            raise DataTestFailure("Missing Required Column") from e
+        if self.column not in self.get_schema_diff(connection).actual_paths:
+            raise DataTestFailure("Missing Required Column")
 
 
 class ColumnTypeTest(AbstractColumnTest):
@@ -684,107 +785,58 @@ class ColumnTypeTest(AbstractColumnTest):
         column:         The column being tested
     """
 
+    # Raises warnings directly, which are only captured in the main thread
+    pooled = False
+
     class _FieldComparisonInterrupt(Exception):
         """Utility class used during recursive field comparison"""
 
         pass
 
     def _test(self, *, connection: BaseBackend):
-        # connection is not used because [self.column] is a direct table
-        # reference
         if cfg().dry_run:
             pytest.skip("Refusing to run a schema test during a dry run")
 
-        actual_table = self.table
-        actual_type = actual_table.schema()[self.column]
-        schema_data_type = self.table_config.schema[self.column]
-
-        try:
-            # We compare stripped schema types with actual types
-            # to find only essential fields
-            extra_fields = self._check_field_types(
-                schema_data_type, actual_type, self.column
-            )
-            if len(extra_fields) > 0:
+        column = self.get_schema_diff(connection).columns[self.column]
+        self._warn_stricter(column)
+        if column.compatible:
+            if len(column.extra_fields) > 0:
                 warnings.warn(
                     message=DataTestWarning(
                         f"Additional fields found in struct"
-                        f" Full path to the extra fields were: {extra_fields}"
+                        f" Full path to the extra fields were: "
+                        f"{list(column.extra_fields)}"
                     )
                 )
             return
-        except ColumnTypeTest._FieldComparisonInterrupt:
-            # An issue with the datatypes was encounter
-            pass
         raise DataTestFailure(
-            f"Column type mismatch: expected {schema_data_type},"
-            f" found {actual_type}.",
+            f"Column type mismatch: expected {column.expected},"
+            f" found {column.actual}.",
         )
 
+    @staticmethod
+    def _warn_stricter(column: ColumnDiff) -> None:
+        for expected_type, actual_type in column.stricter:
+            warnings.warn(
+                message=DataTestWarning(
+                    "Schema is stricter than required: expected "
+                    f"{expected_type} found {actual_type}"
+                )
+            )
+
     @classmethod
     def _check_field_types(
-        cls, expected_type: DataType, actual_type: DataType, path="", level=0
-    ):
-        """Attempt to determine if the schema mismatch is because of an extra
-        field in a struct, including embedded structs
-        and arrays. If the fields are too dissimilar, raises
-        FieldComparisonInterrupt().
+        cls, expected_type: DataType, actual_type: DataType, path=""
+    ) -> list[str]:
+        """Compare a single type, see [diff_types]. Returns the paths of
+        extra struct fields if the types are compatible, otherwise raises
+        FieldComparisonInterrupt()
         """
-        level += 1
-        if expected_type.name != actual_type.name:
+        column = diff_types(expected_type, actual_type, path)
+        cls._warn_stricter(column)
+        if not column.compatible:
             raise ColumnTypeTest._FieldComparisonInterrupt()
-        if expected_type.nullable != actual_type.nullable:
-
-            if not actual_type.nullable:
-                warnings.warn(
-                    message=DataTestWarning(
-                        "Schema is stricter than required: expected "
-                        f"{expected_type} found {actual_type}"
-                    )
-                )
-            if not expected_type.nullable:
-                raise ColumnTypeTest._FieldComparisonInterrupt()
-        extra_fields = []
-        if expected_type.is_struct():
-            expected_type = cast(Struct, expected_type)
-            for name, actual_dtype in actual_type.items():
-                expected_dtype = expected_type.get(name)
-                if (
-                    expected_dtype is None
-                ):  # actual struct field does not exist on the expected field
-                    extra_fields.append(f"{path}.{name}")
-                else:
-                    fields = cls._check_field_types(
-                        expected_type=expected_dtype,
-                        actual_type=actual_dtype,
-                        path=f"{path}.{name}",
-                        level=level,
-                    )
-                    extra_fields += fields
-            # Also need to check all the fields in the expected type are present,
-            # and the type
-            for name, expected_dtype in expected_type.items():
-                actual_dtype = actual_type.get(name)
-                if actual_dtype is None:  # actual struct field does not exist
-                    if expected_dtype.nullable:
-                        # Ignore nullable fields, they
-                        # are not required
-                        continue
-                    raise ColumnTypeTest._FieldComparisonInterrupt()
-                # This is the name of the type, not the name of the field
-                if expected_dtype.name != actual_dtype.name:
-                    raise ColumnTypeTest._FieldComparisonInterrupt()
-
-        if expected_type.is_array():
-            expected_type = cast(Array, expected_type)
-            extra_fields += cls._check_field_types(
-                expected_type=expected_type.value_type,
-                actual_type=actual_type.value_type,
-                path=f"{path}.",
-                level=level,
-            )
-        # Finally,
-        return extra_fields
+        return list(column.extra_fields)
 
 
 class ColumnValuesTest(AbstractColumnTest):
@@ -796,13 +848,15 @@ class ColumnValuesTest(AbstractColumnTest):
                         Defaults to AMLAITestSeverity.ERROR
         test_id:        A unique identifier for the test
         column:         The column being tested
-        allowed_values: List of permitted column values
+        allowed_values: Permitted column values
     """
 
+    row_level = True
+
     def __init__(
         self,
         *,
-        allowed_values: List[Any],
+        allowed_values: Sequence[Any],
         table_config: ResolvedTableConfig,
         column: str,
         test_id: Optional[str] = None,
@@ -810,12 +864,29 @@ class ColumnValuesTest(AbstractColumnTest):
         super().__init__(table_config=table_config, column=column, test_id=test_id)
         self.allowed_values = allowed_values
 
+    def fusion_key(self, column: Optional[str]):
+        return self.column_fusion_key(column)
+
+    def fusion_aggregates(self, table: Table, column: Optional[str]):
+        table, field = resolve_field(table, column)
+        return {"count": table.count(where=field.notin(self.allowed_values))}
+
     def _test(self, *, connection: BaseBackend):
         table, field = resolve_field(self.table, self.column)
 
         expr = table.filter(field.notin(self.allowed_values)).select(field=field)
 
-        result = connection.execute(expr.count())
+        if (fused := self._fused_results(connection)) is not None:
+            result = fused["count"]
+        else:
+            # Long lists of values are semi-joined against a lookup table. The
+            # failure keeps the literal values, so its sql can be run after the
+            # session has ended
+            lookup = LookupTableCache().get(connection, tuple(self.allowed_values))
+            counted = expr
+            if lookup is not None:
+                counted = table.filter(field.notin(lookup.value)).select(field=field)
+            result = self._count_offending_rows(connection, counted)
 
         if result > 0:
             valid_values = " ".join(self.allowed_values)
@@ -837,6 +908,19 @@ class FieldNeverWhitespaceOnlyTest(AbstractColumnTest):
         column:         The column under test which contains event ids
     """
 
+    row_level = True
+
+    def fusion_key(self, column: Optional[str]):
+        return self.column_fusion_key(column)
+
+    def fusion_aggregates(self, table: Table, column: Optional[str]):
+        table, field = resolve_field(table, column)
+        predicates = [
+            field.strip() == "",
+            *self.filter_null_parent_fields(table, column),
+        ]
+        return {"count": table.count(where=ibis.and_(*predicates))}
+
     def _test(self, *, connection: BaseBackend):
         table, field = resolve_field(self.table, self.column)
 
@@ -844,7 +928,10 @@ class FieldNeverWhitespaceOnlyTest(AbstractColumnTest):
 
         expr = table.filter(predicates)
 
-        count_blank = connection.execute(expr.count())
+        if (fused := self._fused_results(connection)) is not None:
+            count_blank = fused["count"]
+        else:
+            count_blank = self._count_offending_rows(connection, expr)
 
         if count_blank > 0:
             raise DataTestFailure(
@@ -864,13 +951,41 @@ class FieldNeverNullTest(AbstractColumnTest):
         column:         The column under test which contains event ids
     """
 
+    row_level = True
+
+    def fusion_key(self, column: Optional[str]):
+        return self.column_fusion_key(column)
+
+    def fusion_aggregates(self, table: Table, column: Optional[str]):
+        table, field = resolve_field(table, column)
+        predicates = [field.isnull(), *self.filter_null_parent_fields(table, column)]
+        return {"count": table.count(where=ibis.and_(*predicates))}
+
+    def _table_stats_null_count(self, connection: BaseBackend) -> Optional[int]:
+        """The number of nulls in the column from the base statistics of the
+        table, which count nulls in required top level columns. Returns None
+        if the column is not counted, or rows are probed for individually"""
+        if cfg().probe_existence or "." in self.column:
+            return None
+        dtype = self.table_config.schema.get(self.column)
+        if dtype is None or dtype.nullable or dtype.is_array():
+            return None
+        if (stats := self._table_stats(connection)) is None:
+            return None
+        return stats.null_counts.get(self.column)
+
     def _test(self, *, connection: BaseBackend):
         table, field = resolve_field(self.table, self.column)
 
         predicates = [field.isnull(), *self.filter_null_parent_fields()]
         expr = table.filter(predicates)
 
-        count_null = connection.execute(expr.count())
+        if (fused := self._fused_results(connection)) is not None:
+            count_null = fused["count"]
+        elif (nulls := self._table_stats_null_count(connection)) is not None:
+            count_null = nulls
+        else:
+            count_null = self._count_offending_rows(connection, expr)
 
         if count_null > 0:
             raise DataTestFailure(
@@ -892,6 +1007,8 @@ class NullIfTest(AbstractColumnTest):
         column:         The column under test which contains event ids
     """
 
+    row_level = True
+
     def __init__(
         self,
         *,
@@ -910,7 +1027,7 @@ class NullIfTest(AbstractColumnTest):
         expr = self.table.filter(self.expression).filter(
             self.table[self.column].notnull()
         )
-        result = connection.execute(expr.count())
+        result = self._count_offending_rows(connection, expr)
         if result > 0:
             raise DataTestFailure(
                 f"{result} rows which should have null column values",
@@ -971,6 +1088,55 @@ class CountMatchingRows(AbstractColumnTest):
         if table_expression == AbstractColumnTest.get_latest_rows:
             self.table_expression = self.get_latest_rows
 
+    @property
+    def row_level(self) -> bool:
+        # Minimums apply to the whole table rather than each new row
+        return self.min_number is None and self.min_proportion is None
+
+    @property
+    def sample_safe(self) -> bool:
+        # A sample has fewer matching rows than the table, so absolute
+        # minimums cannot be checked
+        return self.min_number is None
+
+    @property
+    def window_safe(self) -> bool:
+        # Proportion thresholds are calibrated on the whole table
+        return (
+            self.sample_safe
+            and self.max_proportion is None
+            and self.min_proportion is None
+        )
+
+    def fusion_key(self, column: Optional[str]):
+        # Tests sharing a table expression are counted over the same relation.
+        # Its rows also depend on whether the table is sampled, windowed to an
+        # interval or only the rows added since the last run are tested
+        if self.table_expression is None:
+            relation = "table"
+        elif self.table_expression == self.get_latest_rows:
+            relation = "latest_rows"
+        else:
+            relation = self.table_expression
+        return (
+            self.table_config.resolved_name,
+            relation,
+            self.row_level,
+            self.sample_safe,
+            self.window_safe and interval_window() is not None,
+        )
+
+    def fusion_relation(self) -> Table:
+        if self.table_expression:
+            return self.table_expression(self.table)
+        return self.table
+
+    def fusion_aggregates(self, table: Table, column: Optional[str]):
+        return {
+            "total_rows": table.count(),
+            "matching_rows": table.count(where=self.expression),
+        }
+
     def _test(self, *, connection: BaseBackend):
         table = self.table
         if self.table_expression:
@@ -978,31 +1144,36 @@ class CountMatchingRows(AbstractColumnTest):
         expr = table.agg(
             total_rows=table.count(), matching_rows=table.count(where=self.expression)
         ).mutate(proportion=_.matching_rows / _.total_rows)
-        result = connection.execute(expr).iloc[0]
-        value = int(result["matching_rows"])
-        proportion = result["proportion"]
+        if (fused := self._fused_results(connection)) is not None:
+            value = int(fused["matching_rows"])
+            total = int(fused["total_rows"])
+            proportion = value / total if total else float("nan")
+        else:
+            result = connection.execute(expr).iloc[0]
+            value = int(result["matching_rows"])
+            proportion = result["proportion"]
         criteria_explained = (
             "criteria" if not self.explanation else f"criteria: {self.explanation}"
         )
-        if self.min_number and (value < self.min_number):
+        if self.min_number is not None and (value < self.min_number):
             raise DataTestFailure(
                 f"{value:d} rows met {criteria_explained}. "
                 f"Expected at least {self.min_number:d}.",
                 expr=expr,
             )
-        if self.max_number and (value > self.max_number):
+        if self.max_number is not None and (value > self.max_number):
             raise DataTestFailure(
                 f"{value:d} rows met {criteria_explained}. "
                 f"Expected at most {self.max_number:d}.",
                 expr=expr,
             )
-        if self.max_proportion and (proportion > self.max_proportion):
+        if self.max_proportion is not None and (proportion > self.max_proportion):
             raise DataTestFailure(
                 f"A high proportion ({proportion:.0%}) of rows met "
                 f" {criteria_explained}. Expected at most ({self.max_proportion:.0%})",
                 expr=expr,
             )
-        if self.min_proportion and (proportion < self.min_proportion):
+        if self.min_proportion is not None and (proportion < self.min_proportion):
             raise DataTestFailure(
                 f"A low proportion ({proportion:.0%}) of rows met "
                 f" {criteria_explained}. Expected at least ({self.min_proportion:.0%})",
@@ -1025,6 +1196,9 @@ class EventOrder(AbstractColumnTest):
         events:         An ordered list of events. The order is tested.
     """
 
+    # Compares the events of each entity with each other
+    sample_safe = False
+
     def __init__(
         self,
         *,
@@ -1088,6 +1262,8 @@ class AcceptedRangeTest(AbstractColumnTest):
         max_value:  The maximum allowable value of the column (inclusive)
     """
 
+    row_level = True
+
     def __init__(
         self,
         *,
@@ -1113,7 +1289,7 @@ class AcceptedRangeTest(AbstractColumnTest):
         predicates = [min_pred | max_pred]
         expr = table.filter(predicates)
 
-        result = connection.execute(expr.count())
+        result = self._count_offending_rows(connection, expr)
         if result > 0:
             raise DataTestFailure(
                 f"{result} rows were outside"
@@ -1132,6 +1308,9 @@ class ReferentialIntegrityTest(AbstractTableTest):
         AbstractTableTest: _description_
     """
 
+    # Sampled keys are unlikely to be in a sample of the other table
+    sample_safe = False
+
     def __init__(
         self,
         *,
@@ -1173,7 +1352,7 @@ class ReferentialIntegrityTest(AbstractTableTest):
                 )
                 raise DataTestFailure(msg, expr=expr)
 
-        result = connection.execute(expr.count())
+        result = self._count_offending_rows(connection, expr)
         if result > 0:
             msg = (
                 f"{result} keys found in table {self.table.get_name()} "
@@ -1214,6 +1393,11 @@ class TemporalProfileTest(AbstractColumnTest):
         self.threshold = threshold
         self.period = period
 
+    @property
+    def window_safe(self) -> bool:
+        # Periods cut by the edges of the interval have a low volume
+        return False
+
     def _test(self, *, connection: BaseBackend):
         # The superclass does not skip the test if the to_table is optional,
         # which it may be. If it is, skip the test.
@@ -1269,6 +1453,9 @@ class TemporalReferentialIntegrityTest(AbstractTableTest):
                                     not result in a test failure
     """
 
+    # Requires the full history of each entity in both tables
+    sample_safe = False
+
     MAX_DATETIME_VALUE = datetime.datetime(9995, 1, 1, tzinfo=datetime.timezone.utc)
 
     def __init__(
@@ -1317,19 +1504,20 @@ class TemporalReferentialIntegrityTest(AbstractTableTest):
         if self.validate_datetime_column:
             # If a different column is specified for validation,
             # then obtain the latest row and then validate it
-            latest_rows = self.get_latest_rows(
-                self.table_config.table, self.table_config
-            )
+            latest_rows = self.get_latest_rows(self.table, self.table_config)
             tbl = latest_rows.group_by(self.key).aggregate(
                 first_date=_[self.validate_datetime_column].min(),
                 last_date=_[self.validate_datetime_column].max(),
             )
         else:
-            tbl = get_entity_state_windows(
-                table_config=self.table_config, key=[self.key]
+            tbl = self.get_entity_state_windows(
+                table=self.table, table_config=self.table_config, key=[self.key]
             )
-        totbl = get_entity_state_windows(
-            table_config=self.to_table_config, key=[self.key]
+        to_table = self.get_table(
+            connection=connection, table_config=self.to_table_config
+        )
+        totbl = self.get_entity_state_windows(
+            table=to_table, table_config=self.to_table_config, key=[self.key]
         )
         # First, associate keys by joining
         # We want to find items where the
@@ -1470,6 +1658,11 @@ class ConsistentIDsPerColumn(AbstractColumnTest):
         )
         self.id_to_verify = id_to_verify
 
+    @property
+    def window_safe(self) -> bool:
+        # Compares the IDs of each entity over its history
+        return False
+
     def _test(self, *, connection: BaseBackend):
         # Allow callable to be passed in for expressions which cannot be generated at
         # runtime
@@ -1508,6 +1701,9 @@ class NoTransactionsWithinSuspiciousPeriod(AbstractTableTest):
         lookback_period: The period to look back over. Defaults to 365.
     """
 
+    # Requires every transaction of each risky party
+    sample_safe = False
+
     def __init__(
         self,
         table_config: common.ResolvedTableConfig,
@@ -1550,8 +1746,12 @@ class NoTransactionsWithinSuspiciousPeriod(AbstractTableTest):
             .filter((_.exits > 0) | (_.sars > 0))
         )
 
-        entity_state_windows = get_entity_state_windows(
-            self.account_party_link_table_config
+        account_party_link_table = self.get_table(
+            connection=connection, table_config=self.account_party_link_table_config
+        )
+        entity_state_windows = self.get_entity_state_windows(
+            table=account_party_link_table,
+            table_config=self.account_party_link_table_config,
         )
 
         # Get associated accounts only
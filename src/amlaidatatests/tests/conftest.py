@@ -10,12 +10,20 @@ import pytest
 from _pytest._code.code import ExceptionRepr, TerminalRepr
 from omegaconf import OmegaConf
 
-from amlaidatatests.base import AbstractBaseTest
+from amlaidatatests.base import AbstractBaseTest, AbstractTableTest
+from amlaidatatests.budget import USD_PER_TIB, BytesBudget, format_bytes
+from amlaidatatests.cache import LookupTableCache, RelationCache, TableCache
 from amlaidatatests.config import (
     ConfigSingleton,
     DatatestConfig,
+    cfg,
     init_parser_options_from_config,
 )
+from amlaidatatests.planner import QueryPlanner
+from amlaidatatests.pool import QueryPool
+from amlaidatatests.result_cache import ResultCache
+from amlaidatatests.table_stats import TableStatsCache
+from amlaidatatests.watermark import WatermarkStore
 
 pytest_plugins = [
     "amlaidatatests.tests.fixtures.fixtures",
@@ -103,6 +111,113 @@ def pytest_make_parametrize_id(config, val, argname) -> str | None:
     return None
 
 
+def register_tests(params: typing.Iterable[dict], distributed: bool = False) -> None:
+    """Register the tests which will be run with the session wide schedulers
+
+    If query fusion is enabled, registers each test with the [QueryPlanner] so
+    tests against the same table can share a query. If concurrent queries are
+    enabled, registers each test with the [QueryPool] so it can be run ahead
+    of time.
+
+    Args:
+        params:      The parameters each test function will be called with
+        distributed: Whether the tests are distributed between pytest-xdist
+                     workers. Each worker collects every test but only runs
+                     some of them, so tests are not run ahead of time.
+    """
+    planner = QueryPlanner()
+    planner.clear()
+    pool = QueryPool()
+    pool.clear()
+    # Estimates are of the queries of each test, which are not fused
+    fuse_queries = cfg().fuse_queries and not cfg().estimate
+    pool_queries = pool.enabled() and not distributed
+    if not (fuse_queries or pool_queries):
+        return
+    for p in params:
+        test = p.get("test")
+        if isinstance(test, AbstractBaseTest):
+            prefix = p.get("prefix")
+            if fuse_queries:
+                planner.register(test, prefix=prefix)
+            if pool_queries:
+                pool.register(test, prefix=prefix)
+
+
+def expect_tests(params: typing.Iterable[dict]) -> None:
+    """Record the row level tests of each table which are collected, whether
+    or not they are selected. See [WatermarkStore.expect]
+
+    Args:
+        params: The parameters each test function would be called with
+    """
+    watermarks = WatermarkStore()
+    for p in params:
+        test = p.get("test")
+        if isinstance(test, AbstractTableTest) and test.row_level:
+            watermarks.expect(test.table_config)
+
+
+def finish_session(completed: bool) -> None:
+    """Release the session wide state once every test has run
+
+    Args:
+        completed: Whether every selected test ran, whatever its outcome
+    """
+    QueryPool().clear()
+    QueryPlanner().clear()
+    RelationCache().clear()
+    TableCache().clear()
+    LookupTableCache().clear()
+    BytesBudget().clear()
+    ResultCache().clear()
+    TableStatsCache().clear()
+    watermarks = WatermarkStore()
+    # Rows of tables with failed or unrun tests are held back, see
+    # [WatermarkStore.save]. If the session was interrupted, every table is
+    # validated again
+    if completed:
+        watermarks.save()
+    watermarks.clear()
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items) -> None:
+    """Pytest hook running after collection and deselection of tests
+
+    Registers the selected tests, see [register_tests]
+
+    Args:
+        session: unused pytesthook argument
+        config: the pytest config
+        items: the selected test items
+    """
+    # pylint: disable=unused-argument
+    expect_tests(item.callspec.params for item in items if hasattr(item, "callspec"))
+    register_tests(
+        (item.callspec.params for item in items if hasattr(item, "callspec")),
+        # pytest-xdist workers are given the workerinput attribute
+        distributed=hasattr(config, "workerinput"),
+    )
+
+
+def pytest_deselected(items) -> None:
+    """Pytest hook running when tests are deselected, for example with -k
+
+    Args:
+        items: the deselected test items
+    """
+    expect_tests(item.callspec.params for item in items if hasattr(item, "callspec"))
+
+
+def pytest_sessionfinish(session, exitstatus) -> None:
+    # A session stopped early, for example with -x, did not run every test
+    finish_session(
+        completed=exitstatus in (pytest.ExitCode.OK, pytest.ExitCode.TESTS_FAILED)
+        and not (session.shouldstop or session.shouldfail)
+    )
+
+
 @pytest.hookimpl(optionalhook=True)
 def pytest_html_results_summary(prefix, summary, postfix) -> None:
     """Pytest-html hook. Does not run if pytest-html is not installed
@@ -313,15 +428,100 @@ def warn_report_to_payload(
     return arr
 
 
-def pytest_terminal_summary(terminalreporter, exitstatus, config):
+def render_query_summary(
+    terminalreporter, test_reports: list[AMLAITestReport], top: int
+):
+    """List the tests which spent the longest executing queries and, on
+    BigQuery, which processed the most bytes"""
+    measured = [f for f in test_reports if f.user_properties.get("query_count")]
+    if not measured or top <= 0:
+        return
+    rankings = [("slowest tests", "query_seconds", "{:.2f}s")]
+    if any(f.user_properties.get("bytes_processed") for f in measured):
+        rankings.append(("most bytes processed", "bytes_processed", "{:,} bytes"))
+    for title, key, fmt in rankings:
+        terminalreporter.section(title, sep="-", blue=True, bold=True)
+        ranked = sorted(measured, key=lambda f: f.user_properties[key], reverse=True)
+        for f in ranked[:top]:
+            props = f.user_properties
+            terminalreporter.write(fmt.format(props[key]).rjust(22) + "  ")
+            terminalreporter.write(f"{props['query_count']} queries".ljust(12))
+            terminalreporter.write(f.nodeid)
+            terminalreporter.write("\n")
+
+
+def render_cost_summary(terminalreporter, test_reports: list[AMLAITestReport]):
+    """Summarize the bytes processed on BigQuery and the use of the bytes
+    budgets"""
+    config = cfg()
+    if config.estimate:
+        # Nothing is processed, see [render_estimate_summary]
+        return
+    processed = sum(f.user_properties.get("bytes_processed", 0) for f in test_reports)
+    estimated = sum(f.user_properties.get("bytes_estimated", 0) for f in test_reports)
+    over_budget = [f for f in test_reports if "Over budget: " in (f.message or "")]
+    if not (processed or estimated or over_budget):
+        return
+    cost = processed / 2**40 * USD_PER_TIB
+    lines = [
+        ("bytes processed", f"{format_bytes(processed)} (~${cost:,.2f} on demand)")
+    ]
+    if config.max_bytes_per_run:
+        budget = format_bytes(config.max_bytes_per_run)
+        lines.append(("run budget", f"{format_bytes(estimated)} of {budget} used"))
+    if over_budget:
+        lines.append(("tests over budget", f"{len(over_budget)} skipped"))
+    terminalreporter.section("cost", sep="-", blue=True, bold=True)
+    for label, value in lines:
+        terminalreporter.write(f"{label}:".ljust(22) + value + "\n")
+
+
+def render_estimate_summary(terminalreporter, test_reports: list[AMLAITestReport]):
+    """List the estimated cost of every test in estimate mode, most expensive
+    first"""
+    estimated = [f for f in test_reports if f.user_properties.get("queries_estimated")]
+    if not estimated:
+        return
+    columns = [("plan_operators", "{:,} operators")]
+    if any(f.user_properties.get("rows_estimated") for f in estimated):
+        columns.insert(0, ("rows_estimated", "{:,} rows"))
+    if any(f.user_properties.get("bytes_estimated") for f in estimated):
+        columns.insert(0, ("bytes_estimated", "{:,} bytes"))
+    keys = [key for key, _ in columns]
+    terminalreporter.section("estimates", sep="-", blue=True, bold=True)
+    for f in sorted(
+        estimated,
+        key=lambda f: [f.user_properties.get(k, 0) for k in keys],
+        reverse=True,
+    ):
+        for key, fmt in columns:
+            value = f.user_properties.get(key, 0)
+            terminalreporter.write(fmt.format(value).rjust(22) + "  ")
+        terminalreporter.write(f.nodeid)
+        terminalreporter.write("\n")
+    totals = [
+        fmt.format(sum(f.user_properties.get(k, 0) for f in estimated))
+        for k, fmt in columns[:-1]
+    ]
+    terminalreporter.write(
+        f"{len(estimated)} tests estimated"
+        + "".join(f", {total} in total" for total in totals)
+        + "\n"
+    )
+
+
+def render_summary(
+    terminalreporter,
+    passed_tests: list[AMLAITestReport],
+    failed_tests: list[AMLAITestReport],
+    skipped_tests: list[AMLAITestReport],
+    errored_tests: list[AMLAITestReport],
+    warned_tests: list[AMLAITestReport],
+) -> None:
+    """Write the amlaidatatests summary of a session"""
     terminalreporter.ensure_newline()
     terminalreporter.section("amlaidatatests summary", sep="=", blue=True, bold=True)
 
-    passed_tests = test_report_to_payload(terminalreporter.getreports("passed"))
-    failed_tests = test_report_to_payload(terminalreporter.getreports("failed"))
-    skipped_tests = test_report_to_payload(terminalreporter.getreports("skipped"))
-    errored_tests = test_report_to_payload(terminalreporter.getreports("error"))
-
     terminalreporter.section(
         f"tests passed: {len(passed_tests)}", sep="-", blue=True, bold=True
     )
@@ -332,16 +532,11 @@ def pytest_terminal_summary(terminalreporter, exitstatus, config):
     if skipped_tests:
         render_test_summary(terminalreporter, skipped_tests, light=True)
 
-    # Warnings don't have user attributes on them, so we have to "join" the two lists
-    warned_tests = terminalreporter.getreports("warnings")
     terminalreporter.section(
         f"warnings: {len(warned_tests)}", sep="-", blue=True, bold=True
     )
     if warned_tests:
-        # Warnings can come from any test state, so we need to check all other test types
-        all_reports = passed_tests + failed_tests + skipped_tests + errored_tests
-        parsed_warnings = warn_report_to_payload(warned_tests, all_reports)
-        render_test_summary(terminalreporter, parsed_warnings, yellow=True)
+        render_test_summary(terminalreporter, warned_tests, yellow=True)
 
     terminalreporter.section(
         f"failures: {len(failed_tests)}", sep="-", blue=True, bold=True
@@ -355,6 +550,36 @@ def pytest_terminal_summary(terminalreporter, exitstatus, config):
     if errored_tests:
         render_test_summary(terminalreporter, errored_tests, red=True)
 
+    render_query_summary(
+        terminalreporter,
+        passed_tests + failed_tests + skipped_tests,
+        top=cfg().slowest_tests,
+    )
+    render_cost_summary(terminalreporter, passed_tests + failed_tests + skipped_tests)
+    render_estimate_summary(terminalreporter, skipped_tests)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    passed_tests = test_report_to_payload(terminalreporter.getreports("passed"))
+    failed_tests = test_report_to_payload(terminalreporter.getreports("failed"))
+    skipped_tests = test_report_to_payload(terminalreporter.getreports("skipped"))
+    errored_tests = test_report_to_payload(terminalreporter.getreports("error"))
+
+    # Warnings don't have user attributes on them, so we have to "join" the two lists
+    warned_tests = terminalreporter.getreports("warnings")
+    # Warnings can come from any test state, so we need to check all other test types
+    all_reports = passed_tests + failed_tests + skipped_tests + errored_tests
+    parsed_warnings = warn_report_to_payload(warned_tests, all_reports)
+
+    render_summary(
+        terminalreporter,
+        passed_tests,
+        failed_tests,
+        skipped_tests,
+        errored_tests,
+        parsed_warnings,
+    )
+
 
 @pytest.fixture(autouse=True)
 def auto_resource(record_property: typing.Callable[[str, typing.Any], None]):
@@ -81,14 +81,14 @@ def test_timestamp_fields(connection, test: AbstractColumnTest, request):
 
 
 @pytest.mark.parametrize(
-    "column",
+    "prefix",
     get_entities(table_config=TABLE_CONFIG, entity_types=["CurrencyValue"]),
 )
 @pytest.mark.parametrize(
     "test", get_entity_tests(table_config=TABLE_CONFIG, entity_name="CurrencyValue")
 )
-def test_currency_value_entity(connection, column, test: AbstractColumnTest, request):
-    test(connection=connection, prefix=column, request=request)
+def test_currency_value_entity(connection, prefix, test: AbstractColumnTest, request):
+    test(connection=connection, prefix=prefix, request=request)
 
 
 @pytest.mark.parametrize(
@@ -260,7 +260,7 @@ def test_RI002_referential_integrity(connection, request):
             column="join_date",
             table_config=TABLE_CONFIG,
             max_number=0,
-            expression=lambda t: t.join_date < t.exit_date,
+            expression=lambda t: t.join_date > t.exit_date,
             severity=AMLAITestSeverity.WARN,
             test_id="DT018",
         ),
@@ -348,8 +348,7 @@ def test_date_consistency(connection, test, request):
             max_proportion=0.05,
             severity=AMLAITestSeverity.WARN,
             test_id="P008",
-            expression=lambda t: (t.nationalities.length() == 0)
-            & (t.type == "CONSUMER"),
+            expression=lambda t: (t.residencies.length() == 0) & (t.type == "CONSUMER"),
         ),
         common.ColumnCardinalityTest(
             column="residencies.region_code",
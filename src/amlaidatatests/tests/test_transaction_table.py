@@ -128,14 +128,14 @@ def test_column_values(connection, test, request):
 
 
 @pytest.mark.parametrize(
-    "column",
+    "prefix",
     get_entities(table_config=TABLE_CONFIG, entity_types=["CurrencyValue"]),
 )
 @pytest.mark.parametrize(
     "test", get_entity_tests(table_config=TABLE_CONFIG, entity_name="CurrencyValue")
 )
-def test_currency_value_entity(connection, column, test: AbstractColumnTest, request):
-    test(connection=connection, prefix=column, request=request)
+def test_currency_value_entity(connection, prefix, test: AbstractColumnTest, request):
+    test(connection=connection, prefix=prefix, request=request)
 
 
 @pytest.mark.parametrize(
@@ -0,0 +1,193 @@
+"""Watermarks for incremental validation.
+
+The AML AI tables are mostly appended to, so most rows have already been
+validated by a previous run. When the incremental_state_path option is set,
+tests which check each row independently only validate rows whose timestamp is
+newer than the watermark stored for the table by the last successful run. The
+latest timestamp of each table is recorded as the session runs and written to
+the state file once the session has run. The watermark of a table is held back
+if any of its row level tests failed, or if any of them did not run because
+they were deselected or the session stopped early, so its new rows are
+validated again by the next run, while the watermarks of the other tables
+advance.
+"""
+
+import datetime
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+from ibis import BaseBackend, Table
+
+from amlaidatatests.config import cfg
+from amlaidatatests.schema.base import ResolvedTableConfig, TableType
+from amlaidatatests.singleton import Singleton
+
+logger = logging.getLogger(__name__)
+
+
+def watermark_column(table_config: ResolvedTableConfig) -> str:
+    """The column recording when each row of the table was added
+
+    Args:
+        table_config: The table to get the column for
+
+    Returns:
+        The name of the timestamp column
+    """
+    if table_config.table_type == TableType.EVENT:
+        return "event_time"
+    return "validity_start_time"
+
+
+class WatermarkStore(metaclass=Singleton):
+    """Session-wide store of the watermarks of each table
+
+    Watermarks are read from the state file when first needed. Watermarks
+    observed during the session only replace them when [save] is called.
+    """
+
+    def __init__(self) -> None:
+        self.watermarks: Optional[dict[str, str]] = None
+        """ Watermarks loaded from the state file, keyed by table name """
+        self.observed: dict[str, Optional[str]] = {}
+        """ The latest timestamp of each table seen during this session """
+        self.held: set[str] = set()
+        """ Tables with a failed row level test, whose watermarks are not
+        advanced """
+        self.pending: dict[str, int] = {}
+        """ The number of row level tests of each table which have not run.
+        Watermarks are only advanced once every one of them has run """
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def path() -> Optional[Path]:
+        """The path of the state file, or None if incremental validation is
+        not enabled. Sampled runs do not validate every new row, so they are
+        never incremental"""
+        config = cfg()
+        if (
+            config.dry_run
+            or config.estimate
+            or config.sample_fraction
+            or not config.incremental_state_path
+        ):
+            return None
+        return Path(config.incremental_state_path)
+
+    def _load(self, path: Path) -> dict[str, str]:
+        if self.watermarks is None:
+            self.watermarks = {}
+            if path.exists():
+                with open(path, encoding="utf-8") as f:
+                    self.watermarks = json.load(f)
+        return self.watermarks
+
+    def delta(
+        self,
+        connection: BaseBackend,
+        table: Table,
+        table_config: ResolvedTableConfig,
+    ) -> Table:
+        """Restrict the table to rows added since the table's watermark, and
+        record the latest timestamp of the table the first time it is seen.
+
+        Args:
+            connection:   The ibis connection the table belongs to
+            table:        The table to restrict
+            table_config: The config of the table
+
+        Returns:
+            The rows of the table newer than the watermark, or the whole
+            table if it has no watermark
+        """
+        path = self.path()
+        column_name = watermark_column(table_config)
+        if path is None or column_name not in table.columns:
+            return table
+        name = table_config.resolved_name
+        column = table[column_name]
+        with self._lock:
+            watermarks = self._load(path)
+            if name not in self.observed:
+                # pandas is already loaded by executing the query
+                import pandas as pd  # pylint: disable=import-outside-toplevel
+
+                latest = connection.execute(column.max())
+                self.observed[name] = None if pd.isna(latest) else latest.isoformat()
+        watermark = watermarks.get(name)
+        if watermark is None:
+            return table
+        return table.filter(column > datetime.datetime.fromisoformat(watermark))
+
+    def hold(self, table_config: ResolvedTableConfig) -> None:
+        """Keep the current watermark of a table when the session is saved,
+        because one of its row level tests failed
+
+        Args:
+            table_config: The config of the table
+        """
+        with self._lock:
+            self.held.add(table_config.resolved_name)
+
+    def expect(self, table_config: ResolvedTableConfig) -> None:
+        """Record a row level test of a table which is collected, whether or
+        not it is selected to run. The watermark of the table is only advanced
+        if the test runs.
+
+        Args:
+            table_config: The config of the table
+        """
+        name = table_config.resolved_name
+        with self._lock:
+            self.pending[name] = self.pending.get(name, 0) + 1
+
+    def complete(self, table_config: ResolvedTableConfig) -> None:
+        """Record that a row level test of a table has run, whatever its
+        outcome
+
+        Args:
+            table_config: The config of the table
+        """
+        name = table_config.resolved_name
+        with self._lock:
+            self.pending[name] = self.pending.get(name, 0) - 1
+
+    def save(self) -> None:
+        """Write the watermarks observed during the session to the state
+        file, except for tables which are held or have row level tests which
+        did not run"""
+        path = self.path()
+        if path is None or not self.observed:
+            return
+        incomplete = {k for k, v in self.pending.items() if v > 0}
+        watermarks = dict(self._load(path))
+        watermarks.update(
+            {
+                k: v
+                for k, v in self.observed.items()
+                if v is not None and k not in self.held and k not in incomplete
+            }
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(watermarks, f, indent=2, sort_keys=True)
+        logger.info("Saved watermarks for %s tables to %s", len(watermarks), path)
+        if self.held:
+            logger.info(
+                "Held back the watermarks of tables with failed tests: %s",
+                ", ".join(sorted(self.held)),
+            )
+        if incomplete - self.held:
+            logger.info(
+                "Held back the watermarks of tables with tests which did not "
+                "run: %s",
+                ", ".join(sorted(incomplete - self.held)),
+            )
+
+    def clear(self) -> None:
+        self.watermarks = None
+        self.observed = {}
+        self.held = set()
+        self.pending = {}
@@ -1,11 +1,15 @@
-from typing import Callable
+from typing import Any, Callable
 
 import ibis
 import pytest
 from ibis import BaseBackend, Table
+from ibis.expr.datatypes import DataType
 
 from amlaidatatests.config import ConfigSingleton, cfg
 from amlaidatatests.connection import connection_factory
+from amlaidatatests.planner import QueryPlanner
+from amlaidatatests.schema.base import ResolvedTableConfig
+from amlaidatatests.table_stats import TableStatsCache
 from amlaidatatests.tests.conftest import (
     pytest_addoption as passthrough_pytest_addoption,
 )
@@ -59,6 +63,30 @@ def create_test_table(test_connection: BaseBackend) -> Callable[..., Table]:
     return _create_test_table
 
 
+@pytest.fixture(scope="session")
+def create_test_table_config(
+    create_test_table: Callable[..., Table]
+) -> Callable[..., ResolvedTableConfig]:
+    """Utility for the creation of a temporary test table from rows of data,
+    returning a resolved table config for it. The table is created with
+    nullable columns, so rows may break the constraints of the schema"""
+
+    def _create_test_table_config(
+        data: list[dict[str, Any]], schema: dict[str, DataType], **kwargs
+    ) -> ResolvedTableConfig:
+        tbl = create_test_table(
+            ibis.memtable(
+                data=data,
+                schema={k: v.copy(nullable=True) for k, v in schema.items()},
+            )
+        )
+        return ResolvedTableConfig(
+            name=tbl, table=ibis.table(name=tbl, schema=schema), **kwargs
+        )
+
+    return _create_test_table_config
+
+
 @pytest.fixture()
 def test_raise_on_skip():
     """Patch pytest during associated tests to raise a SkipTest exception
@@ -70,3 +98,47 @@ def test_raise_on_skip():
     pytest.__AML_AI_TESTING_THE_TESTS = True
     yield
     del pytest.__AML_AI_TESTING_THE_TESTS
+
+
+@pytest.fixture()
+def query_planner():
+    """Provide an empty query planner, clearing any registered tests
+    afterwards"""
+    planner = QueryPlanner()
+    planner.clear()
+    yield planner
+    planner.clear()
+
+
+@pytest.fixture()
+def table_stats():
+    """Enable shared table statistics, providing an empty cache of them and
+    clearing it afterwards"""
+    cfg().share_table_stats = True
+    cache = TableStatsCache()
+    cache.clear()
+    yield cache
+    cache.clear()
+    cfg().share_table_stats = False
+
+
+@pytest.fixture()
+def approximate():
+    """Enable approximate aggregates for the duration of the test"""
+    cfg().approximate = True
+    yield
+    cfg().approximate = False
+
+
+@pytest.fixture()
+def count_queries(test_connection, monkeypatch):
+    """Count the number of queries executed against the test connection"""
+    queries = []
+    execute = test_connection.execute
+
+    def _execute(expr, *args, **kwargs):
+        queries.append(expr)
+        return execute(expr, *args, **kwargs)
+
+    monkeypatch.setattr(test_connection, "execute", _execute)
+    return queries
@@ -0,0 +1,79 @@
+import json
+import os
+
+from amlaidatatests.bench import compare, entry_point, summarize_tests
+
+
+def _results(seconds=1.0, rss=100, test_seconds=1.0, queries=1):
+    return {
+        "scales": {
+            "1000": {
+                "seconds": seconds,
+                "peak_rss_bytes": rss,
+                "tests": {"PK001": {"seconds": test_seconds, "query_count": queries}},
+            }
+        }
+    }
+
+
+def test_summarize_tests_by_test_id():
+    summary = summarize_tests(
+        {
+            "a": {"seconds": 1.0, "outcome": "passed", "test_id": "C001"},
+            "b": {
+                "seconds": 2.0,
+                "outcome": "failed",
+                "test_id": "C001",
+                "query_count": 3,
+            },
+            "c": {"seconds": 0.5, "outcome": "skipped"},
+        }
+    )
+    assert summary["C001"]["items"] == 2
+    assert summary["C001"]["seconds"] == 3.0
+    assert summary["C001"]["query_count"] == 3
+    assert summary["C001"]["failed"] == 1
+    assert summary["c"]["items"] == 1
+
+
+def test_compare_regressions():
+    baseline = _results()
+    assert not compare(baseline, _results(seconds=1.1, test_seconds=1.2))
+    assert len(compare(baseline, _results(seconds=2.0))) == 1
+    assert len(compare(baseline, _results(rss=200))) == 1
+    assert len(compare(baseline, _results(test_seconds=2.0))) == 1
+    assert len(compare(baseline, _results(queries=2))) == 1
+    # Peak memory is not measured on every platform
+    assert not compare(baseline, _results(rss=None))
+    # Scales missing from the baseline are not compared
+    assert not compare({"scales": {}}, _results(seconds=100))
+
+
+def test_bench_entry_point(tmp_path, protect_config):
+    output = tmp_path / "results.json"
+    args = ["--scales", "1000", "--workdir", str(tmp_path), "--output", str(output)]
+    assert entry_point([*args, "-k", "PK001"]) == 0
+    with open(output, encoding="utf-8") as f:
+        results = json.load(f)
+    run = results["scales"]["1000"]
+    assert run["exit_code"] == 0
+    assert run["peak_rss_bytes"] > 0
+    assert run["tests"]["PK001"]["query_count"] == 1
+
+    # The dataset is reused, and the results are compared to the baseline
+    assert (tmp_path / "synthetic_1000_0.ddb").exists()
+    # A large tolerance so the comparison is not sensitive to timing noise
+    compare_args = ["--baseline", str(output), "--tolerance", "10"]
+    assert entry_point([*args, *compare_args, "-k", "PK001"]) == 0
+
+
+def test_bench_without_resource_usage(tmp_path, protect_config, monkeypatch):
+    # As on Windows, where the resource usage of a process is not available
+    monkeypatch.delattr(os, "wait4")
+    output = tmp_path / "results.json"
+    args = ["--scales", "1000", "--workdir", str(tmp_path), "--output", str(output)]
+    assert entry_point([*args, "-k", "PK001"]) == 0
+    with open(output, encoding="utf-8") as f:
+        run = json.load(f)["scales"]["1000"]
+    assert run["exit_code"] == 0
+    assert run["peak_rss_bytes"] is None
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+from amlaidatatests.budget import BytesBudget, enforce_budget, format_bytes
+from amlaidatatests.config import cfg
+from amlaidatatests.exceptions import BudgetExceeded
+from amlaidatatests.instrumentation import QueryStats, record_queries
+
+
+class FakeBigQuery:
+    """A connection which estimates every query at a fixed number of bytes"""
+
+    name = "bigquery"
+
+    def __init__(self, estimate: int) -> None:
+        self.executed = 0
+        self.client = SimpleNamespace(
+            query=lambda sql, job_config: SimpleNamespace(
+                total_bytes_processed=estimate
+            )
+        )
+
+    def compile(self, expr, params=None):
+        return "SELECT 1"
+
+    def execute(self, expr):
+        self.executed += 1
+        return 1
+
+
+@pytest.fixture()
+def budget():
+    budget = BytesBudget()
+    budget.clear()
+    yield budget
+    budget.clear()
+    cfg().maximum_bytes_billed = None
+    cfg().max_bytes_per_run = None
+
+
+def test_query_over_maximum_bytes_billed_is_not_executed(budget):
+    cfg().maximum_bytes_billed = 1000
+    connection = FakeBigQuery(estimate=2000)
+    enforce_budget(connection)
+    with pytest.raises(BudgetExceeded, match="more than maximum_bytes_billed"):
+        connection.execute("expr")
+    assert connection.executed == 0
+
+
+def test_run_budget(budget):
+    cfg().max_bytes_per_run = 2500
+    connection = FakeBigQuery(estimate=1000)
+    enforce_budget(connection)
+    stats = QueryStats()
+    with record_queries(stats):
+        connection.execute("expr")
+        connection.execute("expr")
+        with pytest.raises(BudgetExceeded, match="over max_bytes_per_run"):
+            connection.execute("expr")
+    assert connection.executed == 2
+    assert stats.bytes_estimated == 2000
+    assert budget.spent == 2000
+
+
+def test_no_estimate_without_budget(budget):
+    connection = FakeBigQuery(estimate=2000)
+    connection.client = None
+    enforce_budget(connection)
+    assert connection.execute("expr") == 1
+
+
+def test_format_bytes():
+    assert format_bytes(10) == "10 bytes"
+    assert format_bytes(1536) == "1.5 KiB"
+    assert format_bytes(3 * 2**40) == "3.0 TiB"
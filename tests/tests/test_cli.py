@@ -1,3 +1,5 @@
+import subprocess
+import sys
 from typing import List
 
 import pytest
@@ -38,3 +40,29 @@ def test_failed_test(capsys, protect_config):
     # Catch where either no lines processed, or nothing matched failure
     if not line or line == len(lines):
         raise Exception("Could not find a line indicating failures in test output")
+
+
+STARTUP_SCRIPT = """
+import sys
+from amlaidatatests.cli import entry_point
+try:
+    entry_point(["--version"])
+except SystemExit:
+    pass
+print(",".join(sorted(sys.modules)))
+"""
+
+
+def test_startup_imports():
+    # Run in a fresh interpreter, as the test session has already imported
+    # everything
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = result.stdout.strip().split("\n")[-1]
+    imported = {m.split(".")[0] for m in modules.split(",")}
+    # Heavy and backend specific dependencies are only imported when needed
+    assert not imported & {"pandas", "ibis", "pytest", "google", "duckdb"}
@@ -2,7 +2,12 @@ import ibis
 import pytest
 from ibis.expr.datatypes import String
 
-from amlaidatatests.exceptions import DataTestFailure
+from amlaidatatests.exceptions import (
+    AMLAITestSeverity,
+    DataTestFailure,
+    DataTestInconclusive,
+    DataTestWarning,
+)
 from amlaidatatests.schema.base import ResolvedTableConfig, TableType
 from amlaidatatests.tests import common
 
@@ -280,3 +285,52 @@ def test_column_cardinality_test_global_min_max_fails(
     )
     with pytest.raises(expected_exception=DataTestFailure):
         t(test_connection, request)
+
+
+@pytest.fixture()
+def distinct_values_table_config(create_test_table_config):
+    return create_test_table_config(
+        data=[{"value": f"value{i}"} for i in range(100)],
+        schema={"value": String(nullable=False)},
+        table_type=TableType.EVENT,
+    )
+
+
+def test_column_cardinality_approximate_within_margin_inconclusive(
+    test_connection,
+    distinct_values_table_config,
+    approximate,
+    test_raise_on_skip,
+    request,
+):
+    t = common.ColumnCardinalityTest(
+        column="value",
+        table_config=distinct_values_table_config,
+        max_number=98,
+        severity=AMLAITestSeverity.WARN,
+    )
+    with pytest.raises(DataTestInconclusive, match="within 5% of the threshold"):
+        t(test_connection, request)
+
+
+def test_column_cardinality_approximate_beyond_margin_fails(
+    test_connection, distinct_values_table_config, approximate, request
+):
+    t = common.ColumnCardinalityTest(
+        column="value",
+        table_config=distinct_values_table_config,
+        max_number=50,
+        severity=AMLAITestSeverity.WARN,
+    )
+    with pytest.warns(DataTestWarning):
+        t(test_connection, request)
+
+
+def test_column_cardinality_approximate_error_severity_exact(
+    test_connection, distinct_values_table_config, approximate, request
+):
+    t = common.ColumnCardinalityTest(
+        column="value", table_config=distinct_values_table_config, max_number=98
+    )
+    with pytest.raises(DataTestFailure):
+        t(test_connection, request)
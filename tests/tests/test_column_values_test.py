@@ -2,7 +2,9 @@ import ibis
 import pytest
 from ibis.expr.datatypes import Array, String, Struct
 
+from amlaidatatests.cache import LookupTableCache
 from amlaidatatests.exceptions import DataTestFailure
+from amlaidatatests.io import get_valid_region_codes
 from amlaidatatests.schema.base import ResolvedTableConfig
 from amlaidatatests.tests import common
 
@@ -74,3 +76,103 @@ def test_column_only_has_allowed_values_embedded_struct(
     )
 
     t(test_connection, request)
+
+
+def test_column_values_fused_per_table(
+    test_connection, create_test_table, query_planner, count_queries, request
+):
+    schema = {"a": String(nullable=False), "b": String(nullable=False)}
+
+    tbl = create_test_table(
+        ibis.memtable(
+            data=[{"a": "alpha", "b": "x"}, {"a": "gamma", "b": "y"}],
+            schema=schema,
+        )
+    )
+    table_config = ResolvedTableConfig(
+        name=tbl, table=ibis.table(name=tbl, schema=schema)
+    )
+
+    passes = common.ColumnValuesTest(
+        table_config=table_config, column="b", allowed_values=["x", "y"]
+    )
+    fails = common.ColumnValuesTest(
+        table_config=table_config, column="a", allowed_values=["alpha", "beta"]
+    )
+    query_planner.register(passes)
+    query_planner.register(fails)
+
+    passes(test_connection, request)
+    with pytest.raises(expected_exception=DataTestFailure, match="1 rows"):
+        fails(test_connection, request)
+    assert len(count_queries) == 1
+
+
+def test_column_values_fused_with_prefixes(
+    test_connection, create_test_table, query_planner, count_queries, request
+):
+    currency = Struct(fields={"currency_code": String(nullable=False)})
+    schema = {"amount": currency, "other_amount": currency}
+
+    tbl = create_test_table(
+        ibis.memtable(
+            data=[
+                {"amount": {"currency_code": "GBP"}, "other_amount": None},
+                {"amount": None, "other_amount": {"currency_code": "XXX"}},
+            ],
+            schema=schema,
+        )
+    )
+    table_config = ResolvedTableConfig(
+        name=tbl, table=ibis.table(name=tbl, schema=schema)
+    )
+
+    t = common.ColumnValuesTest(
+        table_config=table_config, column="currency_code", allowed_values=["GBP"]
+    )
+    query_planner.register(t, prefix="amount")
+    query_planner.register(t, prefix="other_amount")
+
+    t(test_connection, request, prefix="amount")
+    with pytest.raises(expected_exception=DataTestFailure, match="1 rows"):
+        t(test_connection, request, prefix="other_amount")
+    assert len(count_queries) == 1
+
+
+@pytest.fixture()
+def lookup_tables():
+    cache = LookupTableCache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def test_long_lists_of_values_use_a_lookup_table(
+    test_connection, create_test_table, lookup_tables, count_queries, request
+):
+    schema = {"column": String()}
+
+    tbl = create_test_table(
+        ibis.memtable(
+            data=[{"column": "GB"}, {"column": "XX"}, {"column": None}],
+            schema=schema,
+        )
+    )
+    table_config = ResolvedTableConfig(
+        name=tbl, table=ibis.table(name=tbl, schema=schema)
+    )
+    codes = get_valid_region_codes()
+    name = LookupTableCache.table_name(codes)
+
+    t = common.ColumnValuesTest(
+        table_config=table_config, column="column", allowed_values=codes
+    )
+    with pytest.raises(DataTestFailure, match="1 rows") as excinfo:
+        t(test_connection, request)
+
+    assert len(lookup_tables.created) == 1
+    assert name in str(test_connection.compile(count_queries[-1]))
+    assert name not in excinfo.value.sql
+
+    lookup_tables.clear()
+    assert name not in test_connection.list_tables()
@@ -0,0 +1,47 @@
+import pytest
+from ibis.expr.datatypes import String
+
+from amlaidatatests.exceptions import DataTestFailure
+from amlaidatatests.tests import common
+
+
+@pytest.mark.parametrize(
+    "threshold,message",
+    [
+        ({"max_number": 0}, "Expected at most 0"),
+        ({"max_proportion": 0}, r"Expected at most \(0%\)"),
+    ],
+)
+def test_zero_thresholds_are_checked(
+    test_connection, create_test_table_config, threshold, message, request
+):
+    table_config = create_test_table_config(
+        data=[{"column": "alpha"}, {"column": "beta"}],
+        schema={"column": String()},
+    )
+    t = common.CountMatchingRows(
+        table_config=table_config,
+        column="column",
+        expression=lambda t: t.column == "beta",
+        table_expression=None,
+        **threshold,
+    )
+    with pytest.raises(DataTestFailure, match=message):
+        t(test_connection, request)
+
+
+def test_zero_thresholds_pass_without_matches(
+    test_connection, create_test_table_config, request
+):
+    table_config = create_test_table_config(
+        data=[{"column": "alpha"}], schema={"column": String()}
+    )
+    t = common.CountMatchingRows(
+        table_config=table_config,
+        column="column",
+        expression=lambda t: t.column == "beta",
+        max_number=0,
+        max_proportion=0,
+        table_expression=None,
+    )
+    t(test_connection, request)
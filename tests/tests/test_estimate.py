@@ -0,0 +1,47 @@
+import pytest
+from ibis.expr.datatypes import String
+
+from amlaidatatests.config import cfg
+from amlaidatatests.estimate import estimate_query
+from amlaidatatests.exceptions import SkipTest
+from amlaidatatests.tests import common
+
+
+@pytest.fixture()
+def estimated_table_config(create_test_table_config):
+    return create_test_table_config(
+        data=[{"id": str(i), "name": None} for i in range(10)],
+        schema={"id": String(), "name": String()},
+    )
+
+
+@pytest.fixture()
+def estimate_mode():
+    cfg().estimate = True
+    yield
+    cfg().estimate = False
+
+
+def test_estimate_duckdb_query(test_connection, estimated_table_config):
+    table = test_connection.table(estimated_table_config.name)
+    estimate = estimate_query(
+        test_connection, table.filter(table.name.isnull()).count()
+    )
+    assert estimate.rows_scanned == 10
+    assert estimate.plan_operators > 1
+    assert estimate.bytes_processed is None
+
+
+def test_test_is_estimated_not_executed(
+    test_connection, estimated_table_config, estimate_mode, test_raise_on_skip, request
+):
+    t = common.FieldNeverNullTest(table_config=estimated_table_config, column="name")
+    # The column is always null, so the test would fail if executed
+    with pytest.raises(SkipTest, match="Not executed in estimate mode"):
+        t(test_connection, request)
+
+    props = dict(request.node.user_properties)
+    assert props["query_count"] == 0
+    assert props["queries_estimated"] == 1
+    assert props["rows_estimated"] == 10
+    assert props["plan_operators"] > 1
@@ -0,0 +1,42 @@
+import ibis
+import pytest
+from ibis.expr.datatypes import String
+
+from amlaidatatests.config import cfg
+from amlaidatatests.exceptions import DataTestFailure
+from amlaidatatests.tests import common
+
+
+@pytest.fixture()
+def probe_existence():
+    cfg().probe_existence = True
+    yield
+    cfg().probe_existence = False
+
+
+@pytest.fixture()
+def probe_table_config(create_test_table_config):
+    return create_test_table_config(
+        data=[{"id": "1", "name": None}, {"id": "2", "name": None}],
+        schema={"id": String(), "name": String()},
+    )
+
+
+def test_probe_passing_test_does_not_count(
+    test_connection, probe_table_config, probe_existence, count_queries, request
+):
+    t = common.FieldNeverNullTest(table_config=probe_table_config, column="id")
+    t(test_connection, request)
+
+    assert len(count_queries) == 1
+    assert "LIMIT 1" in str(ibis.to_sql(count_queries[0], dialect="duckdb"))
+
+
+def test_probe_failing_test_reports_exact_count(
+    test_connection, probe_table_config, probe_existence, count_queries, request
+):
+    t = common.FieldNeverNullTest(table_config=probe_table_config, column="name")
+    with pytest.raises(DataTestFailure, match="2 rows found with null values"):
+        t(test_connection, request)
+
+    assert len(count_queries) == 2
@@ -0,0 +1,172 @@
+import datetime
+
+import pytest
+from ibis.expr.datatypes import Array, Boolean, String, Struct, Timestamp
+
+from amlaidatatests.exceptions import DataTestFailure
+from amlaidatatests.schema.base import TableType
+from amlaidatatests.tests import common
+
+
+@pytest.fixture()
+def fused_table_config(create_test_table_config):
+    return create_test_table_config(
+        data=[
+            {"id": "1", "name": " ", "parent": None, "regions": [{"code": "GB"}]},
+            {"id": None, "name": "a", "parent": {"id": None}, "regions": []},
+            {"id": None, "name": "b", "parent": {"id": "2"}, "regions": []},
+        ],
+        schema={
+            "id": String(nullable=False),
+            "name": String(nullable=False),
+            "parent": Struct(nullable=True, fields={"id": String(nullable=False)}),
+            "regions": Array(
+                value_type=Struct(fields={"code": String(nullable=False)})
+            ),
+        },
+    )
+
+
+def test_fused_tests_share_a_single_query(
+    test_connection, fused_table_config, query_planner, count_queries, request
+):
+    tests = [
+        common.FieldNeverNullTest(table_config=fused_table_config, column="id"),
+        common.FieldNeverNullTest(table_config=fused_table_config, column="parent.id"),
+        common.FieldNeverWhitespaceOnlyTest(
+            table_config=fused_table_config, column="name"
+        ),
+    ]
+    for t in tests:
+        query_planner.register(t)
+
+    with pytest.raises(DataTestFailure, match="2 rows found with null values"):
+        tests[0](test_connection, request)
+    with pytest.raises(DataTestFailure, match="1 rows found with null values"):
+        tests[1](test_connection, request)
+    with pytest.raises(DataTestFailure, match="1 rows found with whitespace-only"):
+        tests[2](test_connection, request)
+
+    assert len(count_queries) == 1
+
+
+def test_unnested_columns_are_not_fused(
+    test_connection, fused_table_config, query_planner, count_queries, request
+):
+    t = common.FieldNeverNullTest(
+        table_config=fused_table_config, column="regions.code"
+    )
+    query_planner.register(t)
+    assert not query_planner.groups
+
+    t(test_connection, request)
+    assert len(count_queries) == 1
+
+
+def test_fused_test_runs_individually_if_not_registered(
+    test_connection, fused_table_config, query_planner, count_queries, request
+):
+    registered = common.FieldNeverNullTest(
+        table_config=fused_table_config, column="parent.id"
+    )
+    query_planner.register(registered)
+    t = common.FieldNeverWhitespaceOnlyTest(
+        table_config=fused_table_config, column="name"
+    )
+
+    with pytest.raises(DataTestFailure, match="1 rows"):
+        t(test_connection, request)
+    assert len(count_queries) == 1
+
+
+@pytest.fixture()
+def entity_table_config(create_test_table_config):
+    data = [("1", "OLD", 1), ("1", "NEW", 2), ("2", "NEW", 1), ("3", None, 1)]
+    return create_test_table_config(
+        data=[
+            {
+                "id": id_,
+                "type": type_,
+                "is_entity_deleted": False,
+                "validity_start_time": datetime.datetime(
+                    2020, 1, day, tzinfo=datetime.timezone.utc
+                ),
+            }
+            for id_, type_, day in data
+        ],
+        schema={
+            "id": String(nullable=False),
+            "type": String(),
+            "is_entity_deleted": Boolean(),
+            "validity_start_time": Timestamp(timezone="UTC", nullable=False),
+        },
+        entity_keys=["id"],
+        table_type=TableType.CLOSED_ENDED_ENTITY,
+    )
+
+
+def test_count_matching_rows_on_latest_rows_share_a_single_query(
+    test_connection, entity_table_config, query_planner, count_queries, request
+):
+    tests = [
+        common.CountMatchingRows(
+            table_config=entity_table_config,
+            column="type",
+            expression=lambda t: t.type == "NEW",
+            max_number=1,
+        ),
+        common.CountMatchingRows(
+            table_config=entity_table_config,
+            column="type",
+            expression=lambda t: t.type.isnull(),
+            max_proportion=0.25,
+        ),
+        common.CountMatchingRows(
+            table_config=entity_table_config,
+            column="type",
+            expression=lambda t: t.type == "OLD",
+            max_number=1,
+        ),
+    ]
+    for t in tests:
+        query_planner.register(t)
+    assert len(query_planner.groups) == 1
+
+    with pytest.raises(DataTestFailure, match="2 rows met criteria"):
+        tests[0](test_connection, request)
+    with pytest.raises(DataTestFailure, match=r"high proportion \(33%\)"):
+        tests[1](test_connection, request)
+    tests[2](test_connection, request)
+
+    assert len(count_queries) == 1
+
+
+def test_count_matching_rows_on_different_relations_are_not_fused(
+    test_connection, entity_table_config, query_planner
+):
+    expression = lambda t: t.type == "NEW"  # noqa: E731
+    tests = [
+        common.CountMatchingRows(
+            table_config=entity_table_config,
+            column="type",
+            expression=expression,
+            max_number=1,
+        ),
+        common.CountMatchingRows(
+            table_config=entity_table_config,
+            column="type",
+            expression=expression,
+            max_number=1,
+            table_expression=None,
+        ),
+        common.CountMatchingRows(
+            table_config=entity_table_config,
+            column="type",
+            expression=expression,
+            min_number=1,
+        ),
+    ]
+    for t in tests:
+        query_planner.register(t)
+
+    assert len(query_planner.groups) == 3
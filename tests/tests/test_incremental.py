@@ -0,0 +1,128 @@
+import datetime
+import json
+
+import pytest
+from ibis.expr.datatypes import String, Timestamp
+
+from amlaidatatests.config import cfg
+from amlaidatatests.exceptions import DataTestFailure
+from amlaidatatests.schema.base import TableType
+from amlaidatatests.tests import common
+from amlaidatatests.tests.conftest import expect_tests, finish_session
+from amlaidatatests.watermark import WatermarkStore
+
+
+@pytest.fixture()
+def watermarks(tmp_path):
+    cfg().incremental_state_path = tmp_path / "watermarks.json"
+    store = WatermarkStore()
+    store.clear()
+    yield store
+    store.clear()
+    cfg().incremental_state_path = None
+
+
+@pytest.fixture()
+def event_table_config(create_test_table_config):
+    return create_test_table_config(
+        data=[
+            {
+                "id": id_,
+                "event_time": datetime.datetime(
+                    2020, 1, day, tzinfo=datetime.timezone.utc
+                ),
+            }
+            for id_, day in [(None, 1), ("1", 2)]
+        ],
+        schema={
+            "id": String(nullable=False),
+            "event_time": Timestamp(timezone="UTC", nullable=False),
+        },
+        table_type=TableType.EVENT,
+    )
+
+
+def test_watermark_saved_after_run(
+    test_connection, event_table_config, watermarks, request
+):
+    t = common.FieldNeverNullTest(table_config=event_table_config, column="event_time")
+    t(test_connection, request)
+    watermarks.save()
+
+    with open(cfg().incremental_state_path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved == {event_table_config.resolved_name: "2020-01-02T00:00:00+00:00"}
+
+
+def test_watermark_held_after_failure(
+    test_connection, create_test_table_config, event_table_config, watermarks, request
+):
+    passing_table_config = create_test_table_config(
+        data=[
+            {"event_time": datetime.datetime(2020, 2, 1, tzinfo=datetime.timezone.utc)}
+        ],
+        schema={"event_time": Timestamp(timezone="UTC", nullable=False)},
+        table_type=TableType.EVENT,
+    )
+    with open(cfg().incremental_state_path, "w", encoding="utf-8") as f:
+        json.dump({event_table_config.resolved_name: "2019-12-31T00:00:00+00:00"}, f)
+
+    t = common.FieldNeverNullTest(table_config=event_table_config, column="id")
+    # The null id is newer than the watermark, so is validated
+    with pytest.raises(DataTestFailure, match="1 rows found with null values"):
+        t(test_connection, request)
+    t = common.FieldNeverNullTest(
+        table_config=passing_table_config, column="event_time"
+    )
+    t(test_connection, request)
+    watermarks.save()
+
+    with open(cfg().incremental_state_path, encoding="utf-8") as f:
+        saved = json.load(f)
+    # Only the table with a failed test is validated again by the next run
+    assert saved == {
+        event_table_config.resolved_name: "2019-12-31T00:00:00+00:00",
+        passing_table_config.resolved_name: "2020-02-01T00:00:00+00:00",
+    }
+
+
+def test_watermark_held_when_tests_did_not_run(
+    test_connection, event_table_config, watermarks, request
+):
+    tests = [
+        common.FieldNeverNullTest(table_config=event_table_config, column=column)
+        for column in ["event_time", "id"]
+    ]
+    # Both tests are collected, but the second is deselected, as with -k
+    expect_tests({"test": t} for t in tests)
+    tests[0](test_connection, request)
+    finish_session(completed=True)
+
+    with open(cfg().incremental_state_path, encoding="utf-8") as f:
+        assert json.load(f) == {}
+
+
+def test_rows_before_watermark_not_validated(
+    test_connection, event_table_config, watermarks, request
+):
+    with open(cfg().incremental_state_path, "w", encoding="utf-8") as f:
+        json.dump({event_table_config.resolved_name: "2020-01-01T00:00:00+00:00"}, f)
+
+    t = common.FieldNeverNullTest(table_config=event_table_config, column="id")
+    t(test_connection, request)
+
+
+def test_whole_table_tests_not_incremental(
+    test_connection, event_table_config, watermarks, request
+):
+    with open(cfg().incremental_state_path, "w", encoding="utf-8") as f:
+        json.dump({event_table_config.resolved_name: "2020-01-01T00:00:00+00:00"}, f)
+
+    t = common.CountMatchingRows(
+        table_config=event_table_config,
+        column="id",
+        expression=lambda t: t.id.isnull(),
+        min_number=2,
+    )
+    with pytest.raises(DataTestFailure, match="1 rows met criteria"):
+        t(test_connection, request)
@@ -0,0 +1,41 @@
+import pytest
+from ibis.expr.datatypes import String
+
+from amlaidatatests.exceptions import DataTestFailure
+from amlaidatatests.instrumentation import QueryStats, current_stats, record_queries
+from amlaidatatests.tests import common
+
+
+@pytest.fixture()
+def instrumented_table_config(create_test_table_config):
+    return create_test_table_config(
+        data=[{"id": "1", "name": None}, {"id": "2", "name": "a"}],
+        schema={"id": String(), "name": String()},
+    )
+
+
+@pytest.mark.parametrize("column,fails", [("id", False), ("name", True)])
+def test_query_stats_added_to_user_properties(
+    test_connection, instrumented_table_config, column, fails, request
+):
+    t = common.FieldNeverNullTest(table_config=instrumented_table_config, column=column)
+    if fails:
+        with pytest.raises(DataTestFailure):
+            t(test_connection, request)
+    else:
+        t(test_connection, request)
+
+    props = dict(request.node.user_properties)
+    assert props["query_count"] == 1
+    assert props["rows_returned"] == 1
+    assert props["query_seconds"] > 0
+    assert props["bytes_processed"] == 0
+
+
+def test_record_queries_restores_previous_stats():
+    outer, inner = QueryStats(), QueryStats()
+    with record_queries(outer):
+        with record_queries(inner):
+            assert current_stats() is inner
+        assert current_stats() is outer
+    assert current_stats() is None
@@ -0,0 +1,139 @@
+import datetime
+
+import ibis
+import pytest
+from ibis.expr.datatypes import String, Timestamp
+
+from amlaidatatests.base import interval_window
+from amlaidatatests.config import cfg
+from amlaidatatests.exceptions import DataTestFailure
+from amlaidatatests.schema.base import TableType
+from amlaidatatests.tests import common
+
+
+def _utc(*args):
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture()
+def interval():
+    end_date = cfg().interval_end_date
+    cfg().interval_start_date = "2024-01-01"
+    cfg().interval_end_date = "2024-01-31"
+    yield
+    cfg().interval_start_date = None
+    cfg().interval_end_date = end_date
+
+
+@pytest.fixture()
+def window_table_config(create_test_table_config):
+    return create_test_table_config(
+        data=[
+            {"id": "1", "event_time": _utc(2023, 12, 30)},
+            {"id": "1", "event_time": _utc(2023, 12, 31, 23, 59)},
+            {"id": "2", "event_time": _utc(2024, 1, 1)},
+            {"id": "3", "event_time": _utc(2024, 1, 31, 23, 59)},
+            {"id": "4", "event_time": _utc(2024, 2, 1)},
+            {"id": "5", "event_time": None},
+        ],
+        schema={
+            "id": String(nullable=False),
+            "event_time": Timestamp(timezone="UTC"),
+        },
+        table_type=TableType.EVENT,
+        entity_keys=["id"],
+        partition_column="event_time",
+    )
+
+
+def test_tests_only_read_the_interval(
+    test_connection, window_table_config, interval, count_queries, request
+):
+    t = common.PrimaryKeyColumnsTest(
+        table_config=window_table_config,
+        unique_combination_of_columns=["id", "event_time"],
+    )
+    t(test_connection, request)
+
+    # Constant bounds on the partition column allow partitions to be pruned
+    sql = str(ibis.to_sql(count_queries[0], dialect="bigquery"))
+    assert "`event_time` >= TIMESTAMP('2024-01-01T00:00:00+00:00')" in sql
+    assert "`event_time` < TIMESTAMP('2024-02-01T00:00:00+00:00')" in sql
+
+
+def test_primary_keys_without_partition_column_read_the_whole_table(
+    test_connection, create_test_table_config, interval, request
+):
+    table_config = create_test_table_config(
+        data=[
+            {"id": "1", "event_time": _utc(2023, 12, 31)},
+            {"id": "1", "event_time": _utc(2024, 1, 1)},
+        ],
+        schema={
+            "id": String(nullable=False),
+            "event_time": Timestamp(timezone="UTC"),
+        },
+        table_type=TableType.EVENT,
+        partition_column="event_time",
+    )
+    t = common.PrimaryKeyColumnsTest(
+        table_config=table_config, unique_combination_of_columns=["id"]
+    )
+    assert not t.window_safe
+    # The duplicates straddle the start of the interval
+    with pytest.raises(DataTestFailure, match="Found 1 duplicate values"):
+        t(test_connection, request)
+
+
+def test_table_count_reads_the_whole_table(
+    test_connection, window_table_config, interval, request
+):
+    t = common.TableCountTest(table_config=window_table_config, max_rows=5)
+    with pytest.raises(DataTestFailure, match="more rows than seems feasible: 6"):
+        t(test_connection, request)
+
+
+def test_history_tests_read_the_whole_table(window_table_config, interval):
+    t = common.TemporalProfileTest(
+        table_config=window_table_config,
+        column="event_time",
+        period="MONTH",
+        threshold=0.5,
+    )
+    assert not t.window_safe
+
+
+def test_proportion_tests_read_the_whole_table(
+    test_connection, window_table_config, interval, request
+):
+    t = common.CountMatchingRows(
+        table_config=window_table_config,
+        column="id",
+        expression=lambda t: t.id == "1",
+        max_proportion=0.2,
+        table_expression=None,
+    )
+    assert not t.window_safe
+    # Both rows for the id are outside the interval
+    with pytest.raises(DataTestFailure, match=r"high proportion \(33%\)"):
+        t(test_connection, request)
+
+    for t in [
+        common.CountFrequencyValues(
+            table_config=window_table_config, column="id", max_proportion=0.5
+        ),
+        common.VerifyTypedValuePresence(
+            table_config=window_table_config,
+            column="id",
+            group_by=[],
+            min_proportion=0.5,
+            value="1",
+        ),
+    ]:
+        assert not t.window_safe
+
+
+def test_interval_must_be_ordered(interval):
+    cfg().interval_start_date = "2024-02-01"
+    with pytest.raises(ValueError, match="is after interval_end_date"):
+        interval_window()
@@ -0,0 +1,48 @@
+import datetime
+
+import ibis
+import pytest
+from ibis.expr.datatypes import Array, String, Struct
+
+from amlaidatatests.cli import build_parser
+from amlaidatatests.runner import collect
+
+
+@pytest.fixture()
+def suite_test(protect_config):
+    """Get the test of the suite with a test id"""
+    build_parser().parse_known_args(["--connection_string=duckdb://"])
+
+    def _suite_test(test_id):
+        (item,) = collect(test_id)
+        return item.params["test"]
+
+    return _suite_test
+
+
+def test_DT018_flags_join_date_after_exit_date(test_connection, suite_test):
+    t = suite_test("DT018")
+    table = ibis.memtable(
+        {
+            "join_date": [datetime.date(2020, 1, 1), datetime.date(2020, 1, 1)],
+            "exit_date": [datetime.date(2021, 1, 1), datetime.date(2019, 1, 1)],
+        }
+    )
+    matching = test_connection.execute(table.filter(t.expression(table)))
+    assert matching["exit_date"].tolist() == [datetime.date(2019, 1, 1)]
+
+
+def test_P008_flags_consumers_without_residencies(test_connection, suite_test):
+    t = suite_test("P008")
+    region = Array(Struct({"region_code": String()}))
+    table = ibis.memtable(
+        {
+            "type": ["CONSUMER", "CONSUMER"],
+            "nationalities": [[{"region_code": "GB"}], []],
+            "residencies": [[], [{"region_code": "GB"}]],
+        },
+        schema={"type": String(), "nationalities": region, "residencies": region},
+    )
+    matching = test_connection.execute(table.filter(t.expression(table)))
+    assert t.column == "residencies"
+    assert matching["nationalities"].tolist() == [[{"region_code": "GB"}]]
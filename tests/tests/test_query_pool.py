@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+from ibis.expr.datatypes import String
+
+from amlaidatatests import pool
+from amlaidatatests.config import cfg
+from amlaidatatests.exceptions import DataTestFailure
+from amlaidatatests.tests import common
+from amlaidatatests.tests.conftest import register_tests
+
+
+@pytest.fixture()
+def query_pool():
+    cfg().max_concurrent_queries = 2
+    query_pool = pool.QueryPool()
+    query_pool.clear()
+    yield query_pool
+    query_pool.clear()
+    cfg().max_concurrent_queries = 1
+
+
+@pytest.fixture()
+def pool_table_config(create_test_table_config):
+    return create_test_table_config(
+        data=[{"id": "1"}, {"id": None}], schema={"id": String(nullable=False)}
+    )
+
+
+@pytest.fixture()
+def query_threads(test_connection, monkeypatch):
+    """Record the name of the thread each query is executed in"""
+    threads = []
+    execute = test_connection.execute
+
+    def _execute(expr, *args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return execute(expr, *args, **kwargs)
+
+    monkeypatch.setattr(test_connection, "execute", _execute)
+    return threads
+
+
+def test_pooled_test_failure_raised_when_called(
+    test_connection, pool_table_config, query_pool, query_threads, request, monkeypatch
+):
+    # The duckdb connection cannot be shared between threads, so only one test
+    # is registered to avoid running queries concurrently
+    monkeypatch.setattr(pool, "CONCURRENT_BACKENDS", {"duckdb"})
+    t = common.FieldNeverNullTest(table_config=pool_table_config, column="id")
+    query_pool.register(t)
+    with pytest.raises(DataTestFailure, match="1 rows found with null values"):
+        t(test_connection, request)
+
+    assert len(query_threads) == 1
+    assert query_threads[0].startswith("amlaidatatests")
+
+
+def test_unsupported_backend_runs_sequentially(
+    test_connection, pool_table_config, query_pool, query_threads, request
+):
+    t = common.FieldNeverNullTest(table_config=pool_table_config, column="id")
+    query_pool.register(t)
+    with pytest.raises(DataTestFailure, match="1 rows found with null values"):
+        t(test_connection, request)
+
+    assert query_threads == [threading.current_thread().name]
+
+
+def test_prefixed_tests_are_not_pooled(pool_table_config, query_pool):
+    t = common.FieldNeverNullTest(table_config=pool_table_config, column="id")
+    query_pool.register(t)
+    query_pool.register(t, prefix="parent")
+    assert query_pool.tests == {}
+
+
+@pytest.mark.parametrize("distributed", [False, True])
+def test_distributed_tests_are_not_pooled(pool_table_config, query_pool, distributed):
+    t = common.FieldNeverNullTest(table_config=pool_table_config, column="id")
+    # Each pytest-xdist worker collects every test, but only runs some of them
+    register_tests([{"test": t}], distributed=distributed)
+    assert bool(query_pool.tests) is not distributed
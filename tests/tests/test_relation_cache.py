@@ -0,0 +1,135 @@
+import datetime
+
+import ibis
+import pytest
+from ibis.expr.datatypes import Boolean, String, Timestamp
+
+from amlaidatatests.cache import RelationCache
+from amlaidatatests.config import cfg
+from amlaidatatests.exceptions import DataTestFailure
+from amlaidatatests.schema.base import TableType
+from amlaidatatests.tests import common
+
+
+@pytest.fixture()
+def materialize_relations():
+    cfg().materialize_relations = True
+    cache = RelationCache()
+    cache.clear()
+    yield cache
+    cache.clear()
+    cfg().materialize_relations = False
+
+
+@pytest.fixture()
+def entity_table_config(create_test_table_config):
+    data = [
+        ("1", "OLD", 1),
+        ("1", "NEW", 2),
+        ("2", "NEW", 1),
+        ("3", "OLD", 1),
+    ]
+    return create_test_table_config(
+        data=[
+            {
+                "id": id_,
+                "type": type_,
+                "is_entity_deleted": False,
+                "validity_start_time": datetime.datetime(
+                    2020, 1, day, tzinfo=datetime.timezone.utc
+                ),
+            }
+            for id_, type_, day in data
+        ],
+        schema={
+            "id": String(nullable=False),
+            "type": String(),
+            "is_entity_deleted": Boolean(),
+            "validity_start_time": Timestamp(timezone="UTC"),
+        },
+        entity_keys=["id"],
+        table_type=TableType.CLOSED_ENDED_ENTITY,
+    )
+
+
+def test_latest_rows_materialized_once(
+    test_connection, entity_table_config, materialize_relations, request
+):
+    tests = [
+        common.CountMatchingRows(
+            table_config=entity_table_config,
+            column="type",
+            expression=lambda t: t.type == "NEW",
+            min_number=2,
+        ),
+        common.ColumnCardinalityTest(
+            table_config=entity_table_config, column="type", max_number=2
+        ),
+    ]
+    for t in tests:
+        t(test_connection, request)
+
+    assert len(materialize_relations.materialized) == 1
+
+
+def test_failure_sql_does_not_reference_materialized_relation(
+    test_connection, entity_table_config, materialize_relations, request
+):
+    t = common.CountMatchingRows(
+        table_config=entity_table_config,
+        column="type",
+        expression=lambda t: t.type == "NEW",
+        max_number=1,
+    )
+    with pytest.raises(DataTestFailure, match="2 rows") as excinfo:
+        t(test_connection, request)
+
+    assert len(materialize_relations.materialized) == 1
+    (materialized, _) = materialize_relations.materialized[0]
+    assert materialized.op().name not in excinfo.value.sql
+    assert test_connection.execute(excinfo.value.expr)["matching_rows"][0] == 2
+
+
+def test_materialized_relations_released(
+    test_connection, entity_table_config, materialize_relations, request
+):
+    t = common.ColumnCardinalityTest(
+        table_config=entity_table_config, column="type", max_number=2
+    )
+    t(test_connection, request)
+    (materialized, _) = materialize_relations.materialized[0]
+    assert materialized.op().name in test_connection.list_tables()
+
+    materialize_relations.clear()
+    assert materialized.op().name not in test_connection.list_tables()
+
+
+def test_unbound_relation_not_materialized(entity_table_config, materialize_relations):
+    relation = materialize_relations.get(
+        "unbound", lambda: entity_table_config.table.filter(ibis._.type == "NEW")
+    )
+    assert materialize_relations.materialized == []
+    assert materialize_relations.get("unbound", lambda: None) is relation
+
+
+def test_entity_state_windows_shared(
+    test_connection, entity_table_config, materialize_relations, request
+):
+    tests = [
+        common.TemporalReferentialIntegrityTest(
+            table_config=entity_table_config,
+            to_table_config=entity_table_config,
+            key="id",
+        ),
+        common.TemporalReferentialIntegrityTest(
+            table_config=entity_table_config,
+            to_table_config=entity_table_config,
+            key="id",
+            tolerance="day",
+        ),
+    ]
+    for t in tests:
+        t(test_connection, request)
+
+    # The windows of both tables in both tests are the same relation
+    assert len(materialize_relations.materialized) == 1
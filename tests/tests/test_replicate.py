@@ -0,0 +1,48 @@
+import ibis
+import pyarrow as pa
+
+from amlaidatatests.replicate import arrow_schema, reconcile_batch, replicate
+from amlaidatatests.schema.utils import get_table_config
+from amlaidatatests.synthetic import SyntheticDataset, write_to_connection
+
+
+def test_reconcile_batch():
+    schema = pa.schema([("a", pa.int64()), ("b", pa.string())])
+    batch = pa.RecordBatch.from_pydict(
+        {"extra": [1, 2], "a": pa.array([1, 2], type=pa.int32())}
+    )
+    reconciled = reconcile_batch(batch, schema)
+    assert reconciled.schema == schema
+    assert reconciled.to_pydict() == {"a": [1, 2], "b": [None, None]}
+
+
+def test_arrow_schema_is_nullable():
+    schema = arrow_schema(get_table_config("party").schema)
+    assert not any(f.type == pa.null() for f in schema)
+    assert all(f.nullable for f in schema)
+    assert all(f.nullable for f in schema.field("nationalities").type.value_type)
+
+
+def test_replicate():
+    # Separate connections, so the tables do not affect other tests
+    source = ibis.duckdb.connect()
+    write_to_connection(SyntheticDataset(transactions=500), source)
+    # An optional column missing from the source
+    source.create_table(
+        "party_source", source.table("party").drop("occupation"), overwrite=True
+    )
+    target = ibis.duckdb.connect()
+
+    rows = replicate(
+        source,
+        target,
+        {"party": "party_source", "transaction": "transaction"},
+        conform=True,
+        batch_size=100,
+    )
+
+    assert rows["transaction"] == source.table("transaction").count().execute()
+    assert rows["party"] == source.table("party").count().execute()
+    party = target.table("party")
+    assert tuple(party.columns) == get_table_config("party").schema.names
+    assert party.occupation.isnull().all().execute()
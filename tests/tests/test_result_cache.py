@@ -0,0 +1,97 @@
+import ibis
+import pytest
+
+from amlaidatatests.cache import LOOKUP_TABLE_MIN_VALUES, LookupTableCache
+from amlaidatatests.config import cfg
+from amlaidatatests.result_cache import ResultCache, cache_results
+
+
+@pytest.fixture()
+def result_cache(tmp_path):
+    cfg().result_cache_path = tmp_path / "cache"
+    cache = ResultCache()
+    cache.clear()
+    yield cache
+    cache.clear()
+    cfg().result_cache_path = None
+    cfg().result_cache_max_age = 86400
+
+
+def _counted_connection(connection):
+    """Count the queries reaching the connection"""
+    execute = connection.execute
+    connection.executed = 0
+
+    def _execute(*args, **kwargs):
+        connection.executed += 1
+        return execute(*args, **kwargs)
+
+    connection.execute = _execute
+    cache_results(connection)
+    return connection
+
+
+@pytest.fixture()
+def file_connection(tmp_path):
+    connection = ibis.duckdb.connect(tmp_path / "test.ddb")
+    connection.create_table("t", ibis.memtable({"a": [1, 2, 3]}))
+    yield _counted_connection(connection)
+    connection.disconnect()
+
+
+def test_unchanged_query_is_cached(file_connection, result_cache):
+    expr = file_connection.table("t").a.sum()
+    assert file_connection.execute(expr) == 6
+    assert file_connection.execute(expr) == 6
+    assert file_connection.executed == 1
+    # A different query is executed
+    assert file_connection.execute(expr, limit=None) == 6
+    assert file_connection.executed == 2
+
+
+def test_changed_table_is_executed(file_connection, result_cache):
+    expr = file_connection.table("t").a.sum()
+    assert file_connection.execute(expr) == 6
+    file_connection.insert("t", ibis.memtable({"a": [4]}))
+    # Tables are fingerprinted once per session
+    result_cache.clear()
+    assert file_connection.execute(expr) == 10
+    assert file_connection.executed == 2
+
+
+def test_expired_result_is_executed(file_connection, result_cache):
+    cfg().result_cache_max_age = 0
+    expr = file_connection.table("t").a.sum()
+    file_connection.execute(expr)
+    file_connection.execute(expr)
+    assert file_connection.executed == 2
+
+
+def test_in_memory_database_is_not_cached(result_cache):
+    connection = _counted_connection(ibis.duckdb.connect())
+    connection.create_table("t", ibis.memtable({"a": [1, 2, 3]}))
+    expr = connection.table("t").a.sum()
+    connection.execute(expr)
+    connection.execute(expr)
+    assert connection.executed == 2
+    assert not cfg().result_cache_path.exists()
+
+
+def test_lookup_tables_are_not_fingerprinted(file_connection, result_cache):
+    values = tuple(range(LOOKUP_TABLE_MIN_VALUES))
+    for _ in range(2):
+        # Lookup tables are temporary, so are created again each session
+        lookup = LookupTableCache().get(file_connection, values)
+        expr = file_connection.table("t").a.isin(lookup.value).sum()
+        assert file_connection.execute(expr) == 3
+        LookupTableCache().clear()
+        result_cache.clear()
+    assert file_connection.executed == 1
+
+
+def test_query_using_current_time_is_executed(file_connection, result_cache):
+    t = file_connection.table("t")
+    expr = t.filter(ibis.now() > ibis.timestamp("2020-01-01 00:00:00")).a.sum()
+    file_connection.execute(expr)
+    file_connection.execute(expr)
+    assert file_connection.executed == 2
@@ -0,0 +1,53 @@
+import sys
+import warnings
+
+import pytest
+
+from amlaidatatests import runner
+from amlaidatatests.cli import build_parser, entry_point
+from amlaidatatests.runner import TestItem, collect
+
+
+def test_skipped_test(capsys, protect_config):
+    # Test P035 is for an optional table (partysupplementary data)
+    with pytest.raises(SystemExit) as excinfo:
+        entry_point(["--native", "--connection_string=duckdb://", "-k P035"])
+    assert excinfo.value.code == 0
+    out, _ = capsys.readouterr()
+    final_line = out.split("\n")[-2]
+    assert "1 skipped" in final_line
+
+
+def test_failed_test(capsys, protect_config):
+    # Check for party.type which doesn't exist
+    with pytest.raises(SystemExit) as excinfo:
+        entry_point(["--native", "--connection_string=duckdb://", "-k E001"])
+    assert excinfo.value.code == 1
+    out, _ = capsys.readouterr()
+    lines = out.split("\n")
+    i = next(i for i, line in enumerate(lines) if "failures: 1" in line)
+    # As with pytest, the table is checked before the test records its id
+    assert lines[i + 1].startswith(
+        "test_party_table.py::test_column_values[E001-ColumnValuesTest-type]"
+    )
+    assert lines[i + 1].endswith("ValueError: Required table party does not exist\t")
+    assert "1 failed" in lines[-2]
+
+
+def test_collect_matches_pytest_ids(protect_config):
+    build_parser().parse_known_args(["--connection_string=duckdb://"])
+    nodeids = [item.nodeid for item in collect("test_party_table and PK001")]
+    assert nodeids == ["test_party_table.py::test_PK001_primary_keys"]
+
+
+def test_warnings_counted(capsys, protect_config, monkeypatch):
+    def warns():
+        warnings.warn("A warning")
+
+    item = TestItem("test_module.py::warns", sys.modules[__name__], warns, {})
+    monkeypatch.setattr(runner, "collect", lambda keyword: [item])
+    with pytest.raises(SystemExit) as excinfo:
+        entry_point(["--native", "--connection_string=duckdb://"])
+    assert excinfo.value.code == 0
+    out, _ = capsys.readouterr()
+    assert "1 passed, 1 warning in" in out.split("\n")[-2]
@@ -0,0 +1,55 @@
+import ibis
+import pytest
+from ibis.expr.datatypes import String
+
+from amlaidatatests.config import cfg
+from amlaidatatests.exceptions import SkipTest
+from amlaidatatests.schema.base import TableType
+from amlaidatatests.tests import common
+
+
+@pytest.fixture()
+def sample_fraction():
+    cfg().sample_fraction = 0.5
+    yield
+    cfg().sample_fraction = None
+
+
+@pytest.fixture()
+def sample_table_config(create_test_table_config):
+    return create_test_table_config(
+        data=[{"id": str(i)} for i in range(10)],
+        schema={"id": String(nullable=False)},
+        table_type=TableType.EVENT,
+    )
+
+
+def test_sampled_table_uses_tablesample(
+    test_connection, sample_table_config, sample_fraction, count_queries, request
+):
+    t = common.FieldNeverNullTest(table_config=sample_table_config, column="id")
+    t(test_connection, request)
+
+    sql = str(ibis.to_sql(count_queries[0], dialect="duckdb"))
+    assert "TABLESAMPLE system (50.0 PERCENT)" in sql
+
+
+def test_sample_unsafe_test_skipped(
+    test_connection, sample_table_config, sample_fraction, test_raise_on_skip, request
+):
+    t = common.TableCountTest(table_config=sample_table_config, max_rows=10)
+    with pytest.raises(SkipTest, match="not meaningful on a sample"):
+        t(test_connection, request)
+
+
+def test_minimum_matching_rows_sample_unsafe(sample_table_config):
+    def t(**kwargs):
+        return common.CountMatchingRows(
+            table_config=sample_table_config,
+            column="id",
+            expression=lambda t: t.id == "1",
+            **kwargs,
+        )
+
+    assert t(max_proportion=0.5).sample_safe
+    assert not t(min_number=1).sample_safe
@@ -6,6 +6,7 @@ import amlaidatatests.base
 import amlaidatatests.exceptions
 from amlaidatatests.exceptions import DataTestFailure, SkipTest
 from amlaidatatests.schema.base import ResolvedTableConfig
+from amlaidatatests.schema.diff import diff_schema
 from amlaidatatests.tests import common
 
 
@@ -582,3 +583,61 @@ def test_all_optional_columns_in_struct(test_connection, create_test_table, requ
 
     t = common.ColumnTypeTest(table_config=table_config, column="a")
     t(test_connection, request)
+
+
+def test_nested_column_present(test_connection, create_test_table, request):
+    tbl = create_test_table(
+        ibis.memtable(
+            data=[{"a": [{"a": "hello"}]}],
+            schema={"a": Array(value_type=Struct(fields={"a": String()}))},
+        )
+    )
+    table = ibis.table(
+        name=tbl,
+        schema={"a": Array(value_type=Struct(fields={"a": String()}))},
+    )
+    table_config = ResolvedTableConfig(name=table.get_name(), table=table)
+
+    t = common.ColumnPresenceTest(table_config=table_config, column="a.a")
+    t(test_connection, request)
+
+
+def test_schema_compared_once_per_table(test_connection, create_test_table, request):
+    tbl = create_test_table(
+        ibis.memtable(
+            data=[{"a": "hello", "b": 1}], schema={"a": String(), "b": Int64()}
+        )
+    )
+    table = ibis.table(name=tbl, schema={"a": String(), "b": Int64()})
+    table_config = ResolvedTableConfig(name=table.get_name(), table=table)
+
+    diff_schema.cache_clear()
+    for column in ["a", "b"]:
+        common.ColumnPresenceTest(table_config=table_config, column=column)(
+            test_connection, request
+        )
+        common.ColumnTypeTest(table_config=table_config, column=column)(
+            test_connection, request
+        )
+    assert diff_schema.cache_info().misses == 1
+
+
+def test_schema_diff_of_nested_paths():
+    expected = ibis.schema(
+        {
+            "a": Array(value_type=Struct(fields={"x": String(), "y": String()})),
+            "b": String(nullable=True),
+        }
+    )
+    actual = ibis.schema(
+        {
+            "a": Array(value_type=Struct(fields={"x": String(), "z": String()})),
+            "c": String(),
+        }
+    )
+    diff = diff_schema(expected, actual)
+
+    assert diff.missing_paths == {"a.y", "b"}
+    assert diff.excess_columns == ("c",)
+    assert diff.columns["a"].compatible
+    assert diff.columns["a"].extra_fields == ("a.z",)
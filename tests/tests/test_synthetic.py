@@ -0,0 +1,85 @@
+import datetime
+
+import ibis
+import pyarrow as pa
+import pyarrow.compute as pc
+import pytest
+
+from amlaidatatests.schema.utils import get_table_config
+from amlaidatatests.synthetic import SyntheticDataset, generate, write_to_connection
+
+
+def _tables(dataset: SyntheticDataset) -> dict[str, pa.Table]:
+    chunks: dict[str, list[pa.Table]] = {}
+    for name, table in generate(dataset):
+        chunks.setdefault(name, []).append(table)
+    return {name: pa.concat_tables(tables) for name, tables in chunks.items()}
+
+
+def test_tables_conform_to_schema():
+    tables = _tables(SyntheticDataset(transactions=2500, chunk_size=1000))
+    for name, table in tables.items():
+        assert table.schema == get_table_config(name).schema.to_pyarrow()
+    # One transaction is generated for each risk case
+    risk_cases = pc.count_distinct(tables["risk_case_event"]["risk_case_id"]).as_py()
+    assert len(tables["transaction"]) == 2500 + risk_cases
+
+
+def test_generation_is_deterministic():
+    first = _tables(SyntheticDataset(transactions=500, seed=1))
+    second = _tables(SyntheticDataset(transactions=500, seed=1))
+    assert first["transaction"].equals(second["transaction"])
+
+
+def test_dataset_dates_are_fixed_by_reference_date():
+    tables = _tables(SyntheticDataset(transactions=500))
+    book_time = tables["transaction"]["book_time"]
+    # Transactions end at least a month before the reference date
+    assert pc.max(book_time).as_py() < datetime.datetime(
+        2024, 12, 1, tzinfo=datetime.timezone.utc
+    )
+
+    dataset = SyntheticDataset(
+        transactions=500, months=1, reference_date=datetime.date(2020, 3, 15)
+    )
+    book_time = _tables(dataset)["transaction"]["book_time"]
+    assert pc.min(book_time).as_py() >= datetime.datetime(
+        2020, 1, 1, tzinfo=datetime.timezone.utc
+    )
+    assert pc.max(book_time).as_py() < datetime.datetime(
+        2020, 2, 1, tzinfo=datetime.timezone.utc
+    )
+
+
+def test_defect_injection():
+    tables = _tables(SyntheticDataset(transactions=500, defects={"E005": 1}))
+    assert pc.all(pc.equal(tables["transaction"]["type"], "BARTER")).as_py()
+
+    tables = _tables(SyntheticDataset(transactions=500, defects={"C001": 1}))
+    currency_codes = pc.struct_field(
+        tables["transaction"]["normalized_booked_amount"], "currency_code"
+    )
+    assert currency_codes.null_count == len(tables["transaction"])
+
+
+def test_defect_injection_into_arrays():
+    tables = _tables(SyntheticDataset(transactions=500, defects={"FMT004": 1}))
+    nationalities = pc.list_flatten(tables["party"]["nationalities"])
+    assert pc.all(pc.equal(pc.struct_field(nationalities, "region_code"), "ZZ")).as_py()
+    # Only the nationalities of each party are corrupted
+    residencies = pc.list_flatten(tables["party"]["residencies"])
+    assert not pc.any(
+        pc.equal(pc.struct_field(residencies, "region_code"), "ZZ")
+    ).as_py()
+
+
+def test_unknown_defect():
+    with pytest.raises(ValueError, match="Unknown defects"):
+        SyntheticDataset(transactions=500, defects={"X001": 0.1})
+
+
+def test_write_to_connection():
+    # A separate connection, so the tables do not affect other tests
+    connection = ibis.duckdb.connect()
+    write_to_connection(SyntheticDataset(transactions=500), connection)
+    assert connection.table("transaction").count().execute() > 500
@@ -0,0 +1,61 @@
+import pytest
+from ibis.expr.datatypes import String
+
+from amlaidatatests.cache import TableCache
+from amlaidatatests.tests import common
+
+
+@pytest.fixture()
+def table_cache():
+    cache = TableCache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.fixture()
+def lookups(test_connection, monkeypatch):
+    """Record the tables looked up from the test connection"""
+    names = []
+    table = test_connection.table
+
+    def _table(name, *args, **kwargs):
+        names.append(name)
+        return table(name, *args, **kwargs)
+
+    monkeypatch.setattr(test_connection, "table", _table)
+    return names
+
+
+@pytest.fixture()
+def cached_table_config(create_test_table_config):
+    return create_test_table_config(
+        data=[{"id": "1", "name": "a"}],
+        schema={"id": String(nullable=False), "name": String()},
+    )
+
+
+def test_tables_are_looked_up_once(
+    test_connection, cached_table_config, table_cache, lookups, request
+):
+    tests = [
+        common.ColumnPresenceTest(table_config=cached_table_config, column="id"),
+        common.ColumnTypeTest(table_config=cached_table_config, column="name"),
+        common.FieldNeverNullTest(table_config=cached_table_config, column="id"),
+    ]
+    for t in tests:
+        t(test_connection, request)
+
+    assert lookups == [cached_table_config.name]
+
+
+def test_invalidated_tables_are_looked_up_again(
+    test_connection, cached_table_config, table_cache, lookups
+):
+    name = cached_table_config.name
+    table_cache.get(test_connection, name)
+    table_cache.invalidate(name)
+    table_cache.get(test_connection, name)
+    table_cache.get(test_connection, name)
+
+    assert lookups == [name, name]
@@ -0,0 +1,34 @@
+import dataclasses
+
+import pytest
+
+from amlaidatatests.schema.utils import get_table_config, resolve_table_config
+from amlaidatatests.tests import common
+
+
+def test_resolved_configs_share_fields():
+    table_config = get_table_config("party")
+    resolved = resolve_table_config("party")
+
+    assert resolved.entity_keys is table_config.entity_keys
+    assert resolved.schema == table_config.schema
+
+
+def test_tests_share_their_table_config():
+    table_config = resolve_table_config("party")
+    tests = [
+        common.ColumnPresenceTest(table_config=table_config, column="party_id"),
+        common.FieldNeverNullTest(table_config=table_config, column="party_id"),
+    ]
+
+    assert all(t.table_config is table_config for t in tests)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        table_config.entity_keys = ["source_system"]
+
+
+def test_entity_keys_are_immutable():
+    table_config = resolve_table_config("party")
+
+    assert table_config.entity_keys == ("party_id",)
+    with pytest.raises(AttributeError):
+        table_config.entity_keys.append("source_system")
@@ -0,0 +1,90 @@
+import datetime
+
+import ibis
+import pytest
+from ibis.expr.datatypes import String, Timestamp
+
+from amlaidatatests.exceptions import DataTestFailure
+from amlaidatatests.schema.base import TableType
+from amlaidatatests.table_stats import TableStatsCache
+from amlaidatatests.tests import common
+
+T = datetime.datetime(2024, 1, 1)
+
+
+@pytest.fixture()
+def stats_table_config(create_test_table_config):
+    return create_test_table_config(
+        data=[
+            {"id": "1", "validity_start_time": T, "name": "a"},
+            {"id": "1", "validity_start_time": T, "name": None},
+            {"id": "2", "validity_start_time": T, "name": None},
+            {"id": None, "validity_start_time": T, "name": None},
+        ],
+        schema={
+            "id": String(nullable=False),
+            "validity_start_time": Timestamp(nullable=False),
+            "name": String(nullable=True),
+        },
+        entity_keys=["id"],
+        table_type=TableType.CLOSED_ENDED_ENTITY,
+    )
+
+
+def test_base_stats_are_computed_once(
+    test_connection, stats_table_config, table_stats, count_queries, request
+):
+    count = common.TableCountTest(stats_table_config, max_rows=3)
+    with pytest.raises(DataTestFailure, match="more rows than seems feasible: 4"):
+        count(test_connection, request)
+
+    primary_key = common.PrimaryKeyColumnsTest(
+        table_config=stats_table_config,
+        unique_combination_of_columns=["validity_start_time", "id"],
+    )
+    # The null key is counted as a value
+    with pytest.raises(DataTestFailure, match="Found 1 duplicate values"):
+        primary_key(test_connection, request)
+
+    never_null = common.FieldNeverNullTest(table_config=stats_table_config, column="id")
+    with pytest.raises(DataTestFailure, match="1 rows found with null values"):
+        never_null(test_connection, request)
+
+    assert len(count_queries) == 1
+
+
+def test_other_keys_run_their_own_query(
+    test_connection, stats_table_config, table_stats, count_queries, request
+):
+    common.TableCountTest(stats_table_config, max_rows=10)(test_connection, request)
+    primary_key = common.PrimaryKeyColumnsTest(
+        table_config=stats_table_config,
+        unique_combination_of_columns=["validity_start_time"],
+    )
+    with pytest.raises(DataTestFailure, match="Found 3 duplicate values"):
+        primary_key(test_connection, request)
+
+    assert len(count_queries) == 2
+
+
+def test_nullable_columns_are_not_counted(
+    test_connection, stats_table_config, table_stats, count_queries, request
+):
+    never_null = common.FieldNeverNullTest(
+        table_config=stats_table_config, column="name"
+    )
+    with pytest.raises(DataTestFailure, match="3 rows found with null values"):
+        never_null(test_connection, request)
+
+    assert len(count_queries) == 1
+
+
+def test_stats_not_shared_by_default(
+    test_connection, stats_table_config, count_queries, request
+):
+    common.TableCountTest(stats_table_config, max_rows=10)(test_connection, request)
+
+    # The table count does not pay for counting distinct keys
+    assert len(count_queries) == 1
+    assert "DISTINCT" not in str(ibis.to_sql(count_queries[0]))
+    assert not TableStatsCache.enabled()
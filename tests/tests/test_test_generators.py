@@ -1,11 +1,14 @@
 import datetime
 
 import ibis
-from ibis.expr.datatypes import String, Struct, Timestamp
+import pytest
+from ibis.expr.datatypes import Boolean, String, Struct, Timestamp
 
-from amlaidatatests.schema.base import ResolvedTableConfig
+from amlaidatatests.exceptions import DataTestFailure
+from amlaidatatests.schema.base import ResolvedTableConfig, TableType
 from amlaidatatests.test_generators import (
     find_consistent_timestamp_offset,
+    get_generic_table_tests,
     get_non_nullable_fields,
     get_timestamp_fields,
 )
@@ -66,3 +69,33 @@ def test_find_consistent_timestamp_offset(test_connection, create_test_table, re
     expr = find_consistent_timestamp_offset(field="a", table=table)
     result = test_connection.execute(table.count(where=expr))
     assert result == 1
+
+
+def test_DT001_flags_future_validity_start_times(
+    test_connection, create_test_table_config, request
+):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    table_config = create_test_table_config(
+        data=[
+            {
+                "id": str(i),
+                "validity_start_time": now + datetime.timedelta(days=days),
+                "is_entity_deleted": False,
+            }
+            for i, days in enumerate([-1, 1])
+        ],
+        schema={
+            "id": String(nullable=False),
+            "validity_start_time": Timestamp(timezone="UTC", nullable=False),
+            "is_entity_deleted": Boolean(),
+        },
+        entity_keys=["id"],
+        table_type=TableType.CLOSED_ENDED_ENTITY,
+    )
+    (t,) = [
+        t
+        for t in get_generic_table_tests(table_config, expected_max_rows=10)
+        if t.test_id == "DT001"
+    ]
+    with pytest.raises(DataTestFailure, match="Expected at most 0"):
+        t(test_connection, request)
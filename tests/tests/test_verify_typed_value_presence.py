@@ -2,7 +2,11 @@ import ibis
 import pytest
 from ibis.expr.datatypes import String
 
-from amlaidatatests.exceptions import AMLAITestSeverity, DataTestFailure
+from amlaidatatests.exceptions import (
+    AMLAITestSeverity,
+    DataTestFailure,
+    DataTestInconclusive,
+)
 from amlaidatatests.schema.base import ResolvedTableConfig, TableType
 from amlaidatatests.tests import common
 
@@ -547,3 +551,32 @@ def test_proportion_counts_fails(test_connection, create_test_table, request):
     )
     with pytest.raises(DataTestFailure):
         t(test_connection, request)
+
+
+def test_approximate_proportion_within_margin_inconclusive(
+    test_connection, create_test_table, approximate, test_raise_on_skip, request
+):
+    schema = {"account_id": String(nullable=False), "column": String(nullable=False)}
+
+    tbl = create_test_table(
+        ibis.memtable(
+            data=[
+                {"account_id": "1", "column": "married"},
+                {"account_id": "2", "column": "born"},
+            ],
+            schema=schema,
+        )
+    )
+    table_config = ResolvedTableConfig(
+        name=tbl, table=ibis.table(name=tbl, schema=schema), table_type=TableType.EVENT
+    )
+
+    t = common.VerifyTypedValuePresence(
+        table_config=table_config,
+        group_by=["account_id"],
+        max_proportion=0.48,
+        column="column",
+        value="married",
+    )
+    with pytest.raises(DataTestInconclusive, match="error margin of the maximum"):
+        t(test_connection, request)